@@ -0,0 +1,168 @@
+"""
+Import-time profile of the Streamlit app's pages.
+
+Every module is imported in a fresh interpreter with ``python -X importtime``
+(run from logic/, like ``streamlit run app.py``), several times. Absolute
+times depend on the machine, so each page's median import time is divided
+by the median of streamlit measured in the same run, and that ratio is
+compared with the one tracked in import_time_baseline.json.
+
+Usage:
+    python benchmarks/import_time.py                 # profile and compare
+    python benchmarks/import_time.py --save          # profile and update the baseline
+    python benchmarks/import_time.py --top 15 chat   # show the 15 slowest imports of chat
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+LOGIC_DIR = os.path.join(ROOT_DIR, "logic")
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "import_time_baseline.json")
+
+# streamlit is what every start pays, and the reference the pages are
+# measured against; the rest are the app's pages, which app.py imports only
+# when selected.
+REFERENCE = "streamlit"
+MODULES = [REFERENCE, "chat", "dashboard_reviews", "dashboard_surveys", "rag_chat"]
+
+# A module regresses when its time relative to streamlit is this much higher
+# than in the baseline...
+DEFAULT_TOLERANCE = 0.25
+# ...and that costs at least this many milliseconds in this run, to ignore
+# noise on fast imports.
+MIN_REGRESSION_MS = 50
+
+
+def profile_import(module):
+    """
+    Import ``module`` once in a cold interpreter.
+
+    Returns:
+        tuple: (cumulative import time of the module in ms, {package: cumulative ms})
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=LOGIC_DIR,
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{result.stderr.strip().splitlines()[-1]}")
+
+    packages = {}
+    for line in result.stderr.splitlines():
+        # import time: self [us] | cumulative | imported package
+        if not line.startswith("import time:") or "imported package" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        packages[name.strip()] = int(cumulative) / 1000
+    return packages[module], packages
+
+
+def profile(modules, repeat):
+    """Median cumulative import time (ms) and slowest imports of each module."""
+    report = {}
+    for module in modules:
+        times = []
+        packages = {}
+        for _ in range(repeat):
+            total, packages = profile_import(module)
+            times.append(total)
+        report[module] = {
+            "median_ms": round(statistics.median(times), 1),
+            "min_ms": round(min(times), 1),
+            "slowest": sorted(
+                ((name, ms) for name, ms in packages.items() if name != module),
+                key=lambda item: item[1], reverse=True,
+            ),
+        }
+    return report
+
+
+def load_baseline(path=BASELINE_PATH):
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+def relative_times(report):
+    """Median import time of each module divided by that of REFERENCE."""
+    reference = report[REFERENCE]["median_ms"]
+    return {module: round(stats["median_ms"] / reference, 3) for module, stats in report.items()}
+
+
+def save_baseline(report, path=BASELINE_PATH):
+    baseline = {
+        "python": sys.version.split()[0],
+        "reference": REFERENCE,
+        # Only for reading: comparisons use the relative times
+        "modules": {module: stats["median_ms"] for module, stats in report.items()},
+        "relative": relative_times(report),
+    }
+    with open(path, "w") as f:
+        json.dump(baseline, f, indent=2)
+        f.write("\n")
+
+
+def compare(report, baseline, tolerance=DEFAULT_TOLERANCE):
+    """
+    Print the report against the baseline, in multiples of REFERENCE's import time.
+
+    Returns:
+        list: Modules that regressed beyond the tolerance
+    """
+    regressions = []
+    reference_ms = report[REFERENCE]["median_ms"]
+    relative = relative_times(report)
+    previous = baseline.get("relative", {})
+    print(f"{'module':<20}{'median ms':>12}{'x ' + REFERENCE:>14}{'baseline':>10}{'change':>10}")
+    for module, stats in report.items():
+        median, ratio = stats["median_ms"], relative[module]
+        base = previous.get(module)
+        if module == REFERENCE or base is None:
+            print(f"{module:<20}{median:>12.1f}{ratio:>14.2f}{'-':>10}{'-':>10}")
+            continue
+        change = (ratio - base) / base if base else 0.0
+        flag = ""
+        if change > tolerance and (ratio - base) * reference_ms > MIN_REGRESSION_MS:
+            regressions.append(module)
+            flag = "  REGRESSION"
+        print(f"{module:<20}{median:>12.1f}{ratio:>14.2f}{base:>10.2f}{change:>+10.0%}{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("modules", nargs="*", default=MODULES)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--top", type=int, default=0, help="list the slowest imports of each module")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE)
+    parser.add_argument("--save", action="store_true", help="write the results as the new baseline")
+    args = parser.parse_args()
+
+    # The reference is always measured, since every comparison is relative to it
+    modules = [REFERENCE] + [module for module in args.modules if module != REFERENCE]
+    report = profile(modules, args.repeat)
+    regressions = compare(report, load_baseline(), args.tolerance)
+
+    if args.top:
+        for module, stats in report.items():
+            print(f"\nSlowest imports of {module}:")
+            for name, ms in stats["slowest"][:args.top]:
+                print(f"  {ms:>9.1f} ms  {name}")
+
+    if args.save:
+        save_baseline(report)
+        print(f"\nBaseline written to {BASELINE_PATH}")
+    elif regressions:
+        print(f"\nImport time regressed for: {', '.join(regressions)}")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
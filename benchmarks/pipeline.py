@@ -0,0 +1,404 @@
+"""
+Throughput and memory of the survey pipeline's hot paths, offline.
+
+Data-bound cases run on survey responses and reviews of 1k, 100k and 1M
+rows from logic/synthetic_data.py; the others run a fixed workload against local stand-ins (the
+fake Firecrawl server, a fake Gemini stream, the stub ASR engine and a
+temporary SQLite database), so no network access or API keys are needed.
+
+Each case runs in its own process and is timed --repeat times (once from
+100k rows); its best throughput is compared with
+benchmarks/pipeline_baseline.json. Peak memory is the tracemalloc peak of
+one more run of the case body, so it counts what the case allocates
+(NumPy and pandas buffers included, DuckDB's and SQLite's own buffers not)
+rather than how much the process happened to grow; cases peaking under
+MIN_MEMORY_MB are shown without memory.
+
+Usage:
+    python benchmarks/pipeline.py                        # 1k and 100k rows, compare with the baseline
+    python benchmarks/pipeline.py --sizes 1k,100k,1M     # also 1M rows (several minutes)
+    python benchmarks/pipeline.py --save                 # update the baseline
+    python benchmarks/pipeline.py survey_aggregations dataframe_info
+"""
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+
+import numpy as np
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+LOGIC_DIR = os.path.join(ROOT_DIR, "logic")
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "pipeline_baseline.json")
+
+SIZES = {"1k": 1_000, "100k": 100_000, "1M": 1_000_000}
+DEFAULT_SIZES = ["1k", "100k"]
+
+# A case regresses when its throughput drops by more than this share of the
+# baseline, or its peak memory grows by more than this share and at least
+# MIN_MEMORY_REGRESSION_MB.
+DEFAULT_TOLERANCE = 0.25
+MIN_MEMORY_REGRESSION_MB = 5
+# Smaller peaks are left out rather than compared
+MIN_MEMORY_MB = 0.1
+
+EXTRACTION_PAGES = 20
+QUESTIONS_PER_PAGE = 30
+SAVE_SUBMISSIONS = 400
+SAVE_THREADS = 8
+AUDIO_FRAMES = 500
+MIN_SAMPLE_SECONDS = 0.2
+
+SURVEY_URL = "https://docs.google.com/forms/d/e/benchmark/viewform"
+
+
+def setup_environment(work_dir):
+    """Point the apps at a temporary database and working directory, then set up Django."""
+    sys.path[:0] = [ROOT_DIR, LOGIC_DIR]
+    os.environ.update(
+        DJANGO_SETTINGS_MODULE="public_engagement.settings",
+        SQLITE_PATH=os.path.join(work_dir, "benchmark.sqlite3"),
+        VOICE_ASR_ENGINE="stub",
+        VOICE_DISPATCH="local",
+    )
+    # The logic scripts read prompts/ relative to the working directory
+    os.symlink(os.path.join(LOGIC_DIR, "prompts"), os.path.join(work_dir, "prompts"))
+    os.chdir(work_dir)
+    import db
+    db.setup()
+    from django.core.management import call_command
+    call_command("migrate", verbosity=0)
+
+
+def as_loaded(data):
+    """Generated columns are Categoricals; give them the object dtype of a CSV read."""
+    return data.astype({column: object for column in data.select_dtypes("category")})
+
+
+def synthetic_surveys(n, seed=0):
+    """``n`` survey responses from logic/synthetic_data.py."""
+    import synthetic_data
+    return as_loaded(synthetic_data.SurveyGenerator(seed=seed).sample(n))
+
+
+def synthetic_reviews(n, seed=0):
+    """``n`` reviews from logic/synthetic_data.py."""
+    import synthetic_data
+    return as_loaded(synthetic_data.ReviewGenerator(seed=seed).sample(n))
+
+
+# Each case prepares its input (untimed) and returns the function to time.
+
+def case_question_extraction(n, work_dir):
+    """utils.get_list_of_questions on pages from the fake Firecrawl server, with a fake Gemini stream."""
+    import fake_firecrawl
+    import my_gemini
+    import utils
+    server = fake_firecrawl.start_server()
+    os.environ["FIRECRAWL_API_URL"] = f"http://127.0.0.1:{server.server_port}"
+    answer = json.dumps([
+        {"question": f"Question {i}?", "question type": "Multiple Choice", "answer": ["Yes", "No"]}
+        for i in range(QUESTIONS_PER_PAGE)
+    ])
+
+    def fake_ask_stream(context, question, gemini_api_key=None, response_schema=None):
+        for start in range(0, len(answer), 64):
+            yield answer[start:start + 64]
+
+    my_gemini.ask_stream = fake_ask_stream
+    runs = iter(range(1_000_000))
+
+    def run():
+        # New URLs every run, so neither snapshots nor cached extractions are reused
+        batch = next(runs)
+        for page in range(n):
+            questions = utils.get_list_of_questions(f"{os.environ['FIRECRAWL_API_URL']}/forms/{batch}-{page}")
+            if len(questions) != QUESTIONS_PER_PAGE:
+                raise RuntimeError(f"expected {QUESTIONS_PER_PAGE} questions, got {len(questions)}")
+    return run
+
+
+def survey_questions(columns):
+    return [{"question": column, "question type": "Short Answer", "answer": []} for column in columns]
+
+
+def case_save_responses(n, work_dir):
+    """form_utils.save_responses from concurrent sessions (batched by the write queue)."""
+    import form_utils
+    data = synthetic_surveys(n)
+    questions = survey_questions(data.columns)
+    rows = [dict(enumerate(values)) for values in data.fillna("").itertuples(index=False, name=None)]
+
+    def run():
+        def session(part):
+            for responses in part:
+                form_utils.save_responses(SURVEY_URL, responses, questions, source="benchmark")
+        threads = [threading.Thread(target=session, args=(rows[i::SAVE_THREADS],)) for i in range(SAVE_THREADS)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    return run
+
+
+def case_bulk_save(n, work_dir):
+    """my_app.submissions.save_submissions: bulk insert of n responses."""
+    from my_app import submissions
+    data = synthetic_surveys(n)
+    questions = survey_questions(data.columns)
+    rows = [dict(enumerate(values)) for values in data.fillna("").itertuples(index=False, name=None)]
+    return lambda: submissions.save_submissions(SURVEY_URL, questions, rows, source="benchmark")
+
+
+def case_sentiment_scoring(n, work_dir):
+    """Sentiment scoring done by dashboard_reviews.load_data for reviews outside the store."""
+    import review_store
+    reviews = synthetic_reviews(n)
+    return lambda: review_store.add_sentiment(reviews.copy())
+
+
+def survey_aggregations(path):
+    """The queries dashboard_surveys runs for one filter selection."""
+    import analytics
+    survey = analytics.survey_table(path)
+    filters = {"gender": "Female", "age_group": None, "visit_frequency": None}
+    # DuckDB is imported with the first query; a running dashboard has done that already
+    analytics.cursor().close()
+
+    def run():
+        for column in ["age_group", "gender", "visit_frequency"]:
+            analytics.distinct(survey, column)
+        analytics.count(survey, filters)
+        analytics.means(survey, ["cleanliness_rating", "safety_rating"], filters)
+        for column in ["visit_frequency", "parks_visited", "age_group", "gender", "neighborhood", "purpose",
+                       "travel_method", "cleanliness_rating", "safety_rating", "accessibility",
+                       "amenities_used", "events_participated", "event_experience"]:
+            analytics.value_counts(survey, column, filters)
+        analytics.crosstab(survey, "age_group", "visit_frequency", filters)
+        analytics.crosstab(survey, "age_group", "amenities_used", filters)
+        analytics.group_mean(survey, "parks_visited", "cleanliness_rating", filters)
+        analytics.group_mean(survey, "parks_visited", "safety_rating", filters)
+    return run
+
+
+def case_survey_aggregations(n, work_dir):
+    """dashboard_surveys aggregations (analytics.py) over a responses CSV."""
+    path = os.path.join(work_dir, f"surveys_{n}.csv")
+    synthetic_surveys(n).to_csv(path, index=False)
+    return survey_aggregations(path)
+
+
+def case_survey_aggregations_parquet(n, work_dir):
+    """The same aggregations over a Parquet file."""
+    path = os.path.join(work_dir, f"surveys_{n}.parquet")
+    synthetic_surveys(n).to_parquet(path, index=False)
+    return survey_aggregations(path)
+
+
+def case_dataframe_info(n, work_dir):
+    """rag_chat.get_dataframe_info, built for every chat prompt."""
+    import rag_chat
+    data = synthetic_surveys(n)
+    return lambda: rag_chat.get_dataframe_info(data, "surveys")
+
+
+def case_audio_consumer(n, work_dir):
+    """AudioConsumer handling n binary PCM frames (stub ASR engine) and a stop message."""
+    from channels.testing import WebsocketCommunicator
+    from my_app.audio_protocol import pack_frame
+    from my_app.consumers import AudioConsumer
+    samples = np.arange(1024)
+    # Alternating speech and silence, so utterances are cut and transcribed
+    speech = (3000 * np.sin(samples / 5)).astype("<i2").tobytes()
+    silence = np.zeros(1024, dtype="<i2").tobytes()
+    frames = [pack_frame(speech if (i // 10) % 2 == 0 else silence, i, sample_rate=16000) for i in range(n)]
+
+    async def session():
+        communicator = WebsocketCommunicator(AudioConsumer.as_asgi(), "/ws/audio/")
+        connected, _ = await communicator.connect(timeout=60)
+        if not connected:
+            raise RuntimeError("WebSocket connection refused")
+        await communicator.send_to(text_data=json.dumps({"type": "start", "sample_rate": 16000}))
+        for frame in frames:
+            await communicator.send_to(bytes_data=frame)
+        await communicator.send_to(text_data=json.dumps({"type": "stop"}))
+        while not await communicator.receive_nothing(0.05):
+            await communicator.receive_from()
+        await communicator.disconnect()
+
+    return lambda: asyncio.run(session())
+
+
+# name: (prepare, unit, sizes); sizes None means the row counts chosen with --sizes
+CASES = {
+    "question_extraction": (case_question_extraction, "pages", {str(EXTRACTION_PAGES): EXTRACTION_PAGES}),
+    "save_responses": (case_save_responses, "submissions", {str(SAVE_SUBMISSIONS): SAVE_SUBMISSIONS}),
+    "bulk_save": (case_bulk_save, "rows", None),
+    "sentiment_scoring": (case_sentiment_scoring, "rows", None),
+    "survey_aggregations": (case_survey_aggregations, "rows", None),
+    "survey_aggregations_parquet": (case_survey_aggregations_parquet, "rows", None),
+    "dataframe_info": (case_dataframe_info, "rows", None),
+    "audio_consumer": (case_audio_consumer, "frames", {str(AUDIO_FRAMES): AUDIO_FRAMES}),
+}
+
+
+def measure(run, n, repeat):
+    """
+    Time ``run`` and measure its peak memory.
+
+    Each sample calls ``run`` until MIN_SAMPLE_SECONDS have passed, and the
+    fastest sample is kept: slower ones only add noise from the machine.
+    The peak is taken in a separate run, since tracemalloc slows it down.
+
+    Returns:
+        dict: per_sec (throughput in units per second), seconds (per run) and
+        peak_mb (None below MIN_MEMORY_MB)
+    """
+    times = []
+    for _ in range(repeat):
+        runs = 0
+        start = time.perf_counter()
+        while True:
+            run()
+            runs += 1
+            elapsed = time.perf_counter() - start
+            if elapsed >= MIN_SAMPLE_SECONDS:
+                break
+        times.append(elapsed / runs)
+    tracemalloc.start()
+    try:
+        run()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    peak_mb = round(peak / 2 ** 20, 1)
+    seconds = min(times)
+    return {
+        "per_sec": round(n / seconds, 1), "seconds": round(seconds, 4),
+        "peak_mb": peak_mb if peak_mb >= MIN_MEMORY_MB else None,
+    }
+
+
+def run_case(name, label, repeat):
+    """Run one case in this process, on a fresh database; prints its result as JSON."""
+    prepare, unit, fixed_sizes = CASES[name]
+    n = (fixed_sizes or SIZES)[label]
+    with tempfile.TemporaryDirectory() as work_dir:
+        setup_environment(work_dir)
+        run = prepare(n, work_dir)
+        result = measure(run, n, 1 if n >= SIZES["100k"] else repeat)
+        os.chdir(ROOT_DIR)
+    result["unit"] = unit
+    print(json.dumps(result))
+
+
+def benchmark(cases, sizes, repeat):
+    """
+    Run every case and size in its own process, so memory left over from one
+    case does not hide the next one's.
+
+    Returns:
+        dict: {"case@size": result}, in order
+    """
+    report = {}
+    for name in cases:
+        fixed_sizes = CASES[name][2]
+        for label in fixed_sizes or sizes:
+            child = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), "--case", f"{name}@{label}", "--repeat", str(repeat)],
+                cwd=ROOT_DIR,
+                capture_output=True,
+                text=True,
+            )
+            if child.returncode != 0:
+                raise RuntimeError(f"{name}@{label} failed:\n{child.stderr.strip()}")
+            report[f"{name}@{label}"] = json.loads(child.stdout.strip().splitlines()[-1])
+    return report
+
+
+def load_baseline(path=BASELINE_PATH):
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_baseline(report, path=BASELINE_PATH):
+    # Cases not run this time keep their previous baseline
+    cases = load_baseline(path).get("cases", {})
+    cases.update({key: {"per_sec": result["per_sec"], "peak_mb": result["peak_mb"]} for key, result in report.items()})
+    with open(path, "w") as f:
+        json.dump({"python": sys.version.split()[0], "cases": cases}, f, indent=2)
+        f.write("\n")
+
+
+def compare(report, baseline, tolerance=DEFAULT_TOLERANCE):
+    """
+    Print the report against the baseline.
+
+    Returns:
+        list: Cases that regressed beyond the tolerance
+    """
+    regressions = []
+    previous = baseline.get("cases", {})
+    print(f"{'case':<36}{'per second':>14}{'unit':>13}{'peak MB':>10}{'baseline /s':>14}{'change':>9}")
+    for key, result in report.items():
+        base = previous.get(key)
+        peak = "-" if result["peak_mb"] is None else f"{result['peak_mb']:.1f}"
+        line = f"{key:<36}{result['per_sec']:>14,.0f}{result['unit']:>13}{peak:>10}"
+        if base is None:
+            print(f"{line}{'-':>14}{'-':>9}")
+            continue
+        change = (result["per_sec"] - base["per_sec"]) / base["per_sec"] if base["per_sec"] else 0.0
+        flags = []
+        if change < -tolerance:
+            flags.append("SLOWER")
+        if result["peak_mb"] is not None and base.get("peak_mb") is not None:
+            memory_growth = result["peak_mb"] - base["peak_mb"]
+            if memory_growth > MIN_MEMORY_REGRESSION_MB and memory_growth > tolerance * base["peak_mb"]:
+                flags.append("MORE MEMORY")
+        if flags:
+            regressions.append(key)
+        print(f"{line}{base['per_sec']:>14,.0f}{change:>+9.0%}  {' '.join(flags)}".rstrip())
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("cases", nargs="*", default=list(CASES))
+    parser.add_argument("--sizes", default=",".join(DEFAULT_SIZES), help=f"row counts, from {', '.join(SIZES)}")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE)
+    parser.add_argument("--save", action="store_true", help="write the results as the new baseline")
+    parser.add_argument("--case", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.case:
+        run_case(*args.case.split("@"), args.repeat)
+        return
+    sizes = [size for size in args.sizes.split(",") if size]
+    for size in sizes:
+        if size not in SIZES:
+            parser.error(f"unknown size '{size}', expected one of {list(SIZES)}")
+    for name in args.cases:
+        if name not in CASES:
+            parser.error(f"unknown case '{name}', expected one of {list(CASES)}")
+
+    report = benchmark(args.cases, sizes, args.repeat)
+    regressions = compare(report, load_baseline(), args.tolerance)
+
+    if args.save:
+        save_baseline(report)
+        print(f"\nBaseline written to {BASELINE_PATH}")
+    elif regressions:
+        print(f"\nRegressed: {', '.join(regressions)}")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,105 @@
+"""
+Time-to-first-request of the ASGI application, for HTTP and WebSocket separately.
+
+Each measurement runs in a fresh interpreter that imports
+public_engagement.asgi and serves exactly one request through the Channels
+test communicators: ``GET /`` for HTTP, a connection to ``ws/audio/`` for
+WebSocket. It reports the import time, the time of that first request and
+whether the voice stack (my_app.asr) ended up loaded in the process.
+
+Usage:
+    python benchmarks/startup_time.py               # both protocols, 5 runs each
+    python benchmarks/startup_time.py --prewarm     # with VOICE_PREWARM=1
+    python benchmarks/startup_time.py --repeat 10 websocket
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PROTOCOLS = ["http", "websocket"]
+
+# Runs in the cold child process; prints one JSON line
+CHILD = r'''
+import asyncio, json, os, sys, time
+start = time.perf_counter()
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "public_engagement.settings")
+from public_engagement.asgi import application
+from channels.testing import HttpCommunicator, WebsocketCommunicator
+imported = time.perf_counter()
+
+async def first_request(protocol):
+    if protocol == "http":
+        communicator = HttpCommunicator(application, "GET", "/", headers=[(b"host", b"localhost")])
+        response = await communicator.get_response(timeout=60)
+        return response["status"] == 200
+    communicator = WebsocketCommunicator(application, "/ws/audio/")
+    connected, _ = await communicator.connect(timeout=60)
+    await communicator.disconnect()
+    return connected
+
+ok = asyncio.run(first_request(sys.argv[1]))
+done = time.perf_counter()
+print(json.dumps({
+    "ok": ok,
+    "import_ms": (imported - start) * 1000,
+    "first_request_ms": (done - imported) * 1000,
+    "total_ms": (done - start) * 1000,
+    "voice_stack_loaded": "my_app.asr" in sys.modules,
+}))
+'''
+
+
+def measure(protocol, prewarm=False):
+    """
+    Start a cold process and time its first request.
+
+    Returns:
+        dict: import_ms, first_request_ms, total_ms and voice_stack_loaded
+    """
+    env = dict(os.environ, VOICE_PREWARM="1" if prewarm else "0")
+    result = subprocess.run(
+        [sys.executable, "-c", CHILD, protocol],
+        cwd=ROOT_DIR,
+        env=env,
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"{protocol} run failed:\n{result.stderr.strip()}")
+    sample = json.loads(result.stdout.strip().splitlines()[-1])
+    if not sample["ok"]:
+        raise RuntimeError(f"{protocol} first request did not succeed")
+    return sample
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("protocols", nargs="*", default=PROTOCOLS, help="http and/or websocket")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--prewarm", action="store_true", help="run with VOICE_PREWARM=1")
+    args = parser.parse_args()
+    for protocol in args.protocols:
+        if protocol not in PROTOCOLS:
+            parser.error(f"unknown protocol '{protocol}', expected one of {PROTOCOLS}")
+
+    print(f"{'protocol':<12}{'import ms':>12}{'first req ms':>14}{'total ms':>12}  voice stack loaded")
+    for protocol in args.protocols:
+        samples = [measure(protocol, args.prewarm) for _ in range(args.repeat)]
+        median = {
+            key: statistics.median(sample[key] for sample in samples)
+            for key in ("import_ms", "first_request_ms", "total_ms")
+        }
+        loaded = all(sample["voice_stack_loaded"] for sample in samples)
+        print(
+            f"{protocol:<12}{median['import_ms']:>12.1f}{median['first_request_ms']:>14.1f}"
+            f"{median['total_ms']:>12.1f}  {'yes' if loaded else 'no'}"
+        )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,132 @@
+"""
+Sustained submission inserts per second with many concurrent writers.
+
+Each mode runs against a fresh SQLite database. Writers are threads spread
+over several processes (like Streamlit sessions, the ASGI server and
+synthetic generation writing at once); every writer saves submissions to a
+16-question form for a fixed time.
+
+Modes:
+    default   SQLite defaults (SQLITE_TUNING=0), one transaction per submission
+    tuned     WAL and the pragmas in settings.SQLITE_PRAGMAS, one transaction per submission
+    batched   tuned, with submissions coalesced by my_app.write_queue
+
+Usage:
+    python benchmarks/write_concurrency.py                  # all modes, 4 processes x 4 threads
+    python benchmarks/write_concurrency.py --processes 2 --threads 8 --seconds 10 batched
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+MODES = ["default", "tuned", "batched"]
+
+# Runs in each writer process; prints one JSON line
+CHILD = r'''
+import json, os, sys, threading, time
+import django
+django.setup()
+from django.db import OperationalError, connection
+from my_app import submissions, write_queue
+
+mode, threads, seconds = sys.argv[1], int(sys.argv[2]), float(sys.argv[3])
+url = "https://docs.google.com/forms/d/e/benchmark/viewform"
+questions = [{"question": f"Question {i}", "question type": "Short Answer", "answer": []} for i in range(16)]
+responses = {i: f"answer {i}" for i in range(16)}
+counts = {"saved": 0, "errors": 0}
+lock = threading.Lock()
+
+def writer(stop_at):
+    saved = errors = 0
+    while time.monotonic() < stop_at:
+        try:
+            if mode == "batched":
+                write_queue.save_submission(url, questions, responses, source="benchmark")
+            else:
+                submissions.save_submission(url, questions, responses, source="benchmark")
+            saved += 1
+        except OperationalError:
+            errors += 1
+    connection.close()
+    with lock:
+        counts["saved"] += saved
+        counts["errors"] += errors
+
+# Create the form and questions before the clock starts
+submissions.save_submission(url, questions, responses, source="warmup")
+stop_at = time.monotonic() + seconds
+workers = [threading.Thread(target=writer, args=(stop_at,)) for _ in range(threads)]
+for worker in workers:
+    worker.start()
+for worker in workers:
+    worker.join()
+counts["batches"] = write_queue.get_writer().batches if mode == "batched" else counts["saved"]
+print(json.dumps(counts))
+'''
+
+
+def run_mode(mode, processes, threads, seconds):
+    """
+    Run one mode against a fresh database.
+
+    Returns:
+        dict: saved, errors and batches summed over the writer processes
+    """
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        env = dict(
+            os.environ,
+            DJANGO_SETTINGS_MODULE="public_engagement.settings",
+            SQLITE_PATH=os.path.join(tmp_dir, "benchmark.sqlite3"),
+            SQLITE_TUNING="0" if mode == "default" else "1",
+        )
+        subprocess.run(
+            [sys.executable, "manage.py", "migrate", "--verbosity", "0"], cwd=ROOT_DIR, env=env, check=True
+        )
+        children = [
+            subprocess.Popen(
+                [sys.executable, "-c", CHILD, mode, str(threads), str(seconds)],
+                cwd=ROOT_DIR,
+                env=env,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                text=True,
+            )
+            for _ in range(processes)
+        ]
+        totals = {"saved": 0, "errors": 0, "batches": 0}
+        for child in children:
+            out, err = child.communicate()
+            if child.returncode != 0:
+                raise RuntimeError(f"{mode} writer failed:\n{err.strip()}")
+            for key, value in json.loads(out.strip().splitlines()[-1]).items():
+                totals[key] += value
+    return totals
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("modes", nargs="*", default=MODES, help="default, tuned and/or batched")
+    parser.add_argument("--processes", type=int, default=4)
+    parser.add_argument("--threads", type=int, default=4, help="writer threads per process")
+    parser.add_argument("--seconds", type=float, default=5)
+    args = parser.parse_args()
+    for mode in args.modes:
+        if mode not in MODES:
+            parser.error(f"unknown mode '{mode}', expected one of {MODES}")
+
+    writers = args.processes * args.threads
+    print(f"{writers} writers ({args.processes} processes x {args.threads} threads), {args.seconds:g} s per mode")
+    print(f"{'mode':<10}{'submissions/s':>15}{'answers/s':>12}{'commits':>10}{'lock errors':>13}")
+    for mode in args.modes:
+        totals = run_mode(mode, args.processes, args.threads, args.seconds)
+        rate = totals["saved"] / args.seconds
+        print(f"{mode:<10}{rate:>15.0f}{rate * 16:>12.0f}{totals['batches']:>10}{totals['errors']:>13}")
+
+
+if __name__ == '__main__':
+    main()
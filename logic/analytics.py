@@ -0,0 +1,237 @@
+import os
+import sys
+import pandas as pd
+import review_store
+
+# Aggregations for the dashboards, run as SQL by DuckDB directly on the CSV /
+# Parquet files. Only the columns a query touches are read, filters are
+# applied while scanning, and only the (small) aggregated result becomes a
+# DataFrame. Parquet files make both much cheaper than CSV; convert with
+#   python analytics.py form_responses.csv form_responses.parquet
+SURVEY_FILE = "form_responses.csv"
+SURVEY_PARQUET = "form_responses.parquet"
+
+# Cleaning done by dashboard_surveys.load_and_clean_data, as SQL
+SURVEY_TEXT_COLUMNS = ['neighborhood', 'accessibility', 'improvements', 'event_experience', 'concerns', 'comments']
+SURVEY_NUMERIC_COLUMNS = ['cleanliness_rating', 'safety_rating']
+
+_connection = None
+
+
+class Table:
+    """
+    A dataset queries run against: a file path or glob read by DuckDB, or a
+    DataFrame already in memory (e.g. responses loaded from the database).
+
+    Args:
+        source (str or pd.DataFrame): .csv / .parquet path or glob, or a DataFrame
+        select (str): Select list applied on top of the source, e.g. to clean columns
+    """
+
+    def __init__(self, source, select="*"):
+        self.source = source
+        self.select = select
+
+    def sql(self, cursor):
+        """Table expression for a query on ``cursor``."""
+        if isinstance(self.source, pd.DataFrame):
+            cursor.register("frame", self.source)
+            base = "frame"
+        else:
+            base = scan(self.source)
+        return f"(SELECT {self.select} FROM {base})"
+
+
+def quote(name):
+    return '"' + name.replace('"', '""') + '"'
+
+
+def scan(path):
+    """DuckDB table function reading a file or glob; month=... directories become a column."""
+    literal = "'" + str(path).replace("'", "''") + "'"
+    if str(path).endswith(".parquet"):
+        return f"read_parquet({literal}, hive_partitioning = true, union_by_name = true)"
+    return f"read_csv({literal}, header = true, hive_partitioning = true, union_by_name = true)"
+
+
+def cursor():
+    """A cursor on the shared in-memory DuckDB database (one per query, so threads never share one)."""
+    global _connection
+    if _connection is None:
+        # Imported on first query, so importing a dashboard does not load DuckDB
+        import duckdb
+        _connection = duckdb.connect()
+    return _connection.cursor()
+
+
+def survey_table(source=None):
+    """
+    Survey responses, cleaned like dashboard_surveys.load_and_clean_data.
+
+    Args:
+        source (str or pd.DataFrame): Defaults to SURVEY_PARQUET if it exists,
+            else SURVEY_FILE. DataFrames are expected to be cleaned already.
+    """
+    if isinstance(source, pd.DataFrame):
+        return Table(source)
+    if source is None:
+        source = SURVEY_PARQUET if os.path.exists(SURVEY_PARQUET) else SURVEY_FILE
+    # Same as str.strip(): the CSV's text answers end with newlines
+    replaced = [f"regexp_replace({quote(col)}, '^\\s+|\\s+$', '', 'g') AS {quote(col)}" for col in SURVEY_TEXT_COLUMNS]
+    replaced += [f"TRY_CAST({quote(col)} AS DOUBLE) AS {quote(col)}" for col in SURVEY_NUMERIC_COLUMNS]
+    return Table(source, f"* REPLACE ({', '.join(replaced)})")
+
+
+def reviews_table(store_dir=review_store.STORE_DIR):
+    """
+    Reviews in the partitioned review store, or None if the store is empty.
+
+    Filters on the "month" column ("YYYY-MM") only read the matching partitions.
+    """
+    if not review_store.list_months(store_dir):
+        return None
+    pattern = os.path.join(store_dir, review_store.PARTITIONS_DIR, "month=*", review_store.PARTITION_FILE)
+    return Table(pattern, "* REPLACE (CAST(month AS VARCHAR) AS month)")
+
+
+def where(filters):
+    """
+    WHERE clause and parameters for ``{column: value}`` filters.
+
+    A list, tuple or set matches any of its values; None means no filter.
+    """
+    clauses, params = [], []
+    for column, value in (filters or {}).items():
+        if value is None:
+            continue
+        if isinstance(value, (list, tuple, set)):
+            values = list(value)
+            if not values:
+                clauses.append("FALSE")
+                continue
+            clauses.append(f"{quote(column)} IN ({', '.join('?' * len(values))})")
+            params += values
+        else:
+            clauses.append(f"{quote(column)} = ?")
+            params.append(value)
+    return ("WHERE " + " AND ".join(clauses) if clauses else ""), params
+
+
+def query(table, sql, filters=None, params=None):
+    """
+    Run ``sql`` with ``{table}`` and ``{where}`` filled in.
+
+    Returns:
+        pd.DataFrame: The result
+    """
+    cur = cursor()
+    try:
+        where_sql, where_params = where(filters)
+        return cur.execute(sql.format(table=table.sql(cur), where=where_sql), where_params + list(params or [])).df()
+    finally:
+        cur.close()
+
+
+def count(table, filters=None):
+    return int(query(table, "SELECT count(*) AS n FROM {table} {where}", filters)["n"].iloc[0])
+
+
+def means(table, columns, filters=None):
+    """Mean of each column (NaN when there are no rows)."""
+    select = ", ".join(f"avg({quote(col)}) AS {quote(col)}" for col in columns)
+    return query(table, f"SELECT {select} FROM {{table}} {{where}}", filters).iloc[0].to_dict()
+
+
+def nunique(table, column, filters=None):
+    sql = f"SELECT count(DISTINCT {quote(column)}) AS n FROM {{table}} {{where}}"
+    return int(query(table, sql, filters)["n"].iloc[0])
+
+
+def distinct(table, column, filters=None):
+    """Sorted distinct non-null values of a column."""
+    sql = f"SELECT DISTINCT {quote(column)} AS value FROM {{table}} {{where}} ORDER BY value"
+    return query(table, sql, filters)["value"].dropna().tolist()
+
+
+def value_counts(table, column, filters=None, limit=None):
+    """
+    Rows per value of a column, most frequent first, like Series.value_counts.
+
+    Returns:
+        pd.DataFrame: Columns ``column`` and "count"
+    """
+    sql = (
+        f"SELECT {quote(column)}, count(*) AS count FROM {{table}} {{where}} "
+        f"GROUP BY 1 HAVING {quote(column)} IS NOT NULL ORDER BY count DESC, 1"
+    )
+    if limit:
+        sql += f" LIMIT {int(limit)}"
+    return query(table, sql, filters)
+
+
+def group_mean(table, by, column, filters=None):
+    """
+    Mean of ``column`` per value of ``by``, like df.groupby(by)[column].mean().
+
+    Returns:
+        pd.DataFrame: Columns ``by`` and ``column``
+    """
+    sql = (
+        f"SELECT {quote(by)}, avg({quote(column)}) AS {quote(column)} FROM {{table}} {{where}} "
+        f"GROUP BY 1 HAVING {quote(by)} IS NOT NULL ORDER BY 1"
+    )
+    return query(table, sql, filters)
+
+
+def crosstab(table, index, columns, filters=None, normalize=False):
+    """
+    Counts per combination of two columns, like pd.crosstab.
+
+    Args:
+        normalize (bool): Divide each row by its total, like normalize="index"
+
+    Returns:
+        pd.DataFrame: ``index`` values as rows, ``columns`` values as columns
+    """
+    sql = (
+        f"SELECT {quote(index)} AS row, {quote(columns)} AS col, count(*) AS n FROM {{table}} {{where}} "
+        f"GROUP BY 1, 2 HAVING row IS NOT NULL AND col IS NOT NULL"
+    )
+    counts = query(table, sql, filters)
+    wide = counts.pivot(index="row", columns="col", values="n").fillna(0).astype(int)
+    wide = wide.sort_index().sort_index(axis=1)
+    if normalize:
+        wide = wide.div(wide.sum(axis=1), axis=0)
+    wide.index.name, wide.columns.name = index, columns
+    return wide
+
+
+def select(table, columns, filters=None):
+    """Only the given columns of the matching rows."""
+    sql = f"SELECT {', '.join(quote(col) for col in columns)} FROM {{table}} {{where}}"
+    return query(table, sql, filters)
+
+
+def to_parquet(table, path):
+    """Write a table to a Parquet file, e.g. to convert a large CSV once."""
+    cur = cursor()
+    try:
+        literal = "'" + path.replace("'", "''") + "'"
+        cur.execute(f"COPY (SELECT * FROM {table.sql(cur)}) TO {literal} (FORMAT parquet)")
+    finally:
+        cur.close()
+
+
+def main():
+    """
+    Convert a CSV to Parquet: python analytics.py form_responses.csv form_responses.parquet
+    """
+    if len(sys.argv) < 3:
+        print("Usage: python analytics.py input.csv output.parquet")
+        sys.exit(1)
+    to_parquet(Table(sys.argv[1]), sys.argv[2])
+    print(f"Wrote {sys.argv[2]}")
+
+
+if __name__ == '__main__':
+    main()
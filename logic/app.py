@@ -1,19 +1,17 @@
 # app.py
+import importlib
 import streamlit as st
-from chat import main as chat_main
-from dashboard_reviews import main as dashboard_reviews_main
-from dashboard_surveys import main as dashboard_surveys_main
-from rag_chat import main as rag_chat_main
+
+# Page label -> module exposing main(). A page's module (and its heavy
+# third-party dependencies) is imported only when the page is selected.
+PAGES = {
+    "Chat": "chat",
+    "Dashboard Reviews": "dashboard_reviews",
+    "Dashboard Surveys": "dashboard_surveys",
+    "Rag Chat": "rag_chat",
+}
 
 st.sidebar.title("Navigation")
-page = st.sidebar.radio("Go to", 
-    ["Chat", "Dashboard Reviews", "Dashboard Surveys", "Rag Chat"])
+page = st.sidebar.radio("Go to", list(PAGES))
 
-if page == "Chat":
-    chat_main()
-elif page == "Dashboard Reviews":
-    dashboard_reviews_main()
-elif page == "Dashboard Surveys":
-    dashboard_surveys_main()
-elif page == "Rag Chat":
-    rag_chat_main()
+importlib.import_module(PAGES[page]).main()
@@ -5,6 +5,15 @@ import pandas as pd
 import requests
 import google.generativeai as genai
 import my_gemini
+from form_options import (
+    AGE_GROUP_OPTIONS,
+    AMENITIES_USED_OPTIONS,
+    GENDER_OPTIONS,
+    PARKS_VISITED_OPTIONS,
+    PURPOSE_OPTIONS,
+    TRAVEL_METHOD_OPTIONS,
+    VISIT_FREQUENCY_OPTIONS,
+)
 
 # Set up Gemini API
 genai.configure(api_key="YOUR_API_KEY")
@@ -30,47 +39,20 @@ def choose_rating():
     return str(random.randint(1, 5))
 
 def submit_form():
-    # Define valid options for fields based on the form HTML
-    age_group_options = ["Under 18", "18–24", "25–34", "35–44", "45–54", "55–64", "65+"]
-    gender_options = ["Male", "Female", "Non-binary/Other", "Prefer not to say"]
-    visit_frequency_options = ["Daily", "Weekly", "Monthly", "A few times a year", "Rarely/Never"]
-    parks_visited_options = ["Nose Hill Park", "Fish Creek Provincial Park", "Confederation Park", "Other"]
-    purpose_options = [
-        "Exercise/Walking/Running",
-        "Picnicking/Relaxing",
-        "Social gatherings/Events",
-        "Dog walking",
-        "Sports and recreational activities",
-        "Enjoying nature/Scenery",
-        "Other"
-    ]
-    travel_method_options = ["Walking", "Cycling", "Driving", "Public transit", "Other"]
-    amenities_used_options = [
-        "Walking/Running trails",
-        "Playgrounds",
-        "Sports fields/courts",
-        "Picnic areas",
-        "Restrooms",
-        "Water fountains",
-        "Dog parks",
-        "Community event spaces",
-        "Other"
-    ]
-    
     # Answer each question appropriately:
-    age_group = choose_option(age_group_options)
-    gender = choose_option(gender_options)
+    age_group = choose_option(AGE_GROUP_OPTIONS)
+    gender = choose_option(GENDER_OPTIONS)
     neighborhood = generate_answer("What is your neighborhood or area? Say something randomly in Calgary")
-    visit_frequency = choose_option(visit_frequency_options)
-    parks_visited = choose_option(parks_visited_options)
-    purpose = choose_option(purpose_options)
+    visit_frequency = choose_option(VISIT_FREQUENCY_OPTIONS)
+    parks_visited = choose_option(PARKS_VISITED_OPTIONS)
+    purpose = choose_option(PURPOSE_OPTIONS)
     
     time.sleep(5)  # Optional delay between calls
-    travel_method = choose_option(travel_method_options)
+    travel_method = choose_option(TRAVEL_METHOD_OPTIONS)
     cleanliness_rating = choose_rating()
     safety_rating = choose_rating()
     accessibility = generate_answer("How accessible are the park facilities and amenities to you?")
-    amenities_used = choose_option(amenities_used_options)
+    amenities_used = choose_option(AMENITIES_USED_OPTIONS)
     improvements = generate_answer("What improvements or new amenities would you like to see in Calgary parks?")
     time.sleep(5)
     
@@ -119,5 +101,6 @@ def submit_form_multiple_times(n):
         # After the first write, the file will exist so subsequent writes won't include the header.
         file_exists = True
 
-# Example usage: Submit the form 500 times
-submit_form_multiple_times(500)
+if __name__ == '__main__':
+    # Example usage: Submit the form 500 times
+    submit_form_multiple_times(500)
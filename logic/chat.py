@@ -1,52 +1,67 @@
 import streamlit as st
 import json
-import scrape
-import speech_recognition as sr
-import threading
-import time
 import utils
-import my_gemini
 import os
 from dotenv import load_dotenv
-import pandas as pd
-import form_utils  # This is the new module we created
+import tts
+
+# speech_recognition, selenium (form_utils) and the scraping/Gemini clients
+# are imported where they are used, so opening the page does not load them.
 
 def main():
     load_dotenv()
 
-    # Safe version of the speak function to avoid the "run loop already started" error
+    # Read text out in the user's browser. Audio comes from the TTS service's
+    # on-disk cache, so repeated phrases play without synthesizing again.
     def safe_speak(text):
         try:
-            # Import voice module only when needed
-            import voice
-            
-            # Use a flag to check if the function has been called recently
-            if 'last_speak_time' not in st.session_state:
-                st.session_state.last_speak_time = 0
-            
-            # Only allow speaking if at least 1 second has passed since last call
-            current_time = time.time()
-            if current_time - st.session_state.last_speak_time > 1:
-                # Use a separate thread to prevent blocking the Streamlit app
-                def speak_thread():
-                    try:
-                        voice.speak(text)
-                    except Exception as e:
-                        st.error(f"TTS Error: {str(e)}")
-                
-                threading.Thread(target=speak_thread).start()
-                st.session_state.last_speak_time = current_time
-                return True
+            audio = tts.get_service().synthesize(text)
+            if audio is None:
+                st.warning("Text-to-speech timed out.")
+                return False
+            st.audio(audio, format=tts.mime_type(audio), autoplay=True)
+            return True
+        except (tts.TTSUnavailable, tts.TTSFailed) as e:
+            st.warning(str(e))
             return False
         except Exception as e:
             st.warning(f"Could not use text-to-speech: {str(e)}")
             return False
 
+    # What is read out for a question: its text followed by any answer options
+    def question_speech(question):
+        if question.get("answer"):
+            return f"{question['question']} The options are: {', '.join(question['answer'])}."
+        return question["question"]
+
+    # Synthesize every question's read-out in the background as soon as the
+    # form is loaded, so moving between questions plays from the TTS cache.
+    def prefetch_question_audio(survey_url, questions):
+        if st.session_state.get('tts_prefetched_url') == survey_url:
+            return
+        try:
+            tts.get_service().prefetch(question_speech(q) for q in questions)
+            st.session_state.tts_prefetched_url = survey_url
+        except Exception as e:
+            print(f"Could not prefetch question audio: {str(e)}")
+
+    # One recognizer per user session: ambient noise is calibrated on the first
+    # recording only and the dynamic energy threshold keeps adapting afterwards,
+    # so later recordings start listening immediately.
+    def get_recognizer(source):
+        import speech_recognition as sr
+        if 'recognizer' not in st.session_state:
+            recognizer = sr.Recognizer()
+            recognizer.dynamic_energy_threshold = True
+            recognizer.adjust_for_ambient_noise(source, duration=1)
+            st.session_state.recognizer = recognizer
+        return st.session_state.recognizer
+
     # Speech to text function
     def speech_to_text(audio_data):
         try:
             import voice
-            return voice.speech_to_text(audio_data, voice.speech_recognizer)
+            return voice.speech_to_text(audio_data, st.session_state.recognizer)
         except Exception as e:
             st.error(f"Speech recognition error: {str(e)}")
             return ""
@@ -65,29 +80,23 @@ def main():
             st.session_state.questions = questions
         if 'question_read' not in st.session_state:
             st.session_state.question_read = set()
-        if 'page_loaded_time' not in st.session_state:
-            st.session_state.page_loaded_time = time.time()
         if 'transcribed_text' not in st.session_state:
             st.session_state.transcribed_text = {}
         if 'form_submitted' not in st.session_state:
             st.session_state.form_submitted = False
-        if 'csv_saved' not in st.session_state:
-            st.session_state.csv_saved = False
+        if 'responses_saved' not in st.session_state:
+            st.session_state.responses_saved = False
 
     # Navigation functions
     def go_to_next_question():
         if st.session_state.current_question_idx < len(st.session_state.questions) - 1:
             st.session_state.current_question_idx += 1
-            # Reset page load time for the new question
-            st.session_state.page_loaded_time = time.time()
         else:
             st.session_state.review_mode = True
 
     def go_to_prev_question():
         if st.session_state.current_question_idx > 0:
             st.session_state.current_question_idx -= 1
-            # Reset page load time for the new question
-            st.session_state.page_loaded_time = time.time()
 
     def toggle_recording():
         st.session_state.is_recording = not st.session_state.is_recording
@@ -96,19 +105,22 @@ def main():
         st.session_state.submitted = True
 
     def save_and_submit_form(survey_url, responses, questions):
-        # Try to get a meaningful form name
-        form_name = form_utils.get_form_name(survey_url)
-        csv_filename = f"{form_name}.csv"
-        
-        # Save to CSV
-        csv_path = form_utils.save_responses_to_csv(survey_url, responses, questions)
-        st.session_state.csv_saved = True
+        import form_utils
+        # Save to the database; the form is still submitted if this fails
+        try:
+            submission_id = form_utils.save_responses(survey_url, responses, questions)
+            st.session_state.responses_saved = True
+        except Exception as e:
+            print(f"Error saving responses: {str(e)}")
+            submission_id = None
+            st.session_state.responses_saved = False
+            st.session_state.save_error = str(e)
         
         # Submit to Google Form
         submission_success = form_utils.submit_google_form(survey_url, responses, questions)
         st.session_state.form_submitted = submission_success
         
-        return csv_path, submission_success
+        return submission_id, submission_success
 
     st.title("Survey Assistant")
 
@@ -122,11 +134,19 @@ def main():
         is_google_form = "docs.google.com/forms" in survey_url
         
         if is_google_form:
-            # Get the list of questions from the survey page.
-            questions = utils.get_list_of_questions(survey_url)
+            # Get the list of questions from the survey page. When they have to
+            # be extracted by Gemini, show them as they arrive.
+            progress = st.empty()
+            arrived = []
+            def show_question(q):
+                arrived.append(q["question"])
+                progress.markdown("\n".join(f"- {text}" for text in arrived))
+            questions = utils.get_list_of_questions(survey_url, show_question)
+            progress.empty()
             
             # Initialize session state
             init_session_state(questions)
+            prefetch_question_audio(survey_url, questions)
             
             # Let the user choose a mode.
             mode = st.radio("Select mode", ["Normal Filling", "Voice Assisted"])
@@ -158,11 +178,13 @@ def main():
                         st.session_state.responses = responses
                         
                         # Save to CSV and submit to Google Form
-                        csv_path, submission_success = save_and_submit_form(survey_url, responses, questions)
+                        submission_id, submission_success = save_and_submit_form(survey_url, responses, questions)
                         
                         # Display results
-                        if st.session_state.csv_saved:
-                            st.success(f"Responses saved to {csv_path}")
+                        if st.session_state.responses_saved:
+                            st.success(f"Responses saved (submission #{submission_id})")
+                        else:
+                            st.error(f"Could not save your responses: {st.session_state.save_error}")
                         
                         if st.session_state.form_submitted:
                             st.success("Form submitted successfully!")
@@ -233,11 +255,13 @@ def main():
                                     st.session_state.responses[idx] = response
                                 
                                 # Save to CSV and submit to Google Form
-                                csv_path, submission_success = save_and_submit_form(survey_url, st.session_state.responses, questions)
+                                submission_id, submission_success = save_and_submit_form(survey_url, st.session_state.responses, questions)
                                 
                                 # Display results
-                                if st.session_state.csv_saved:
-                                    st.success(f"Responses saved to {csv_path}")
+                                if st.session_state.responses_saved:
+                                    st.success(f"Responses saved (submission #{submission_id})")
+                                else:
+                                    st.error(f"Could not save your responses: {st.session_state.save_error}")
                                 
                                 if st.session_state.form_submitted:
                                     st.success("Form submitted successfully!")
@@ -275,21 +299,19 @@ def main():
                     q_type = current_q["question type"].lower()
                     current_response = st.session_state.responses.get(current_idx, "")
                     
-                    # Auto-read question after a 1-second delay
+                    # Auto-read the question once; audio was prefetched when the form loaded
                     question_key = f"q_{current_idx}"
-                    current_time = time.time()
                     
                     # Check if we need to read this question
-                    if (question_key not in st.session_state.question_read and 
-                        current_time - st.session_state.page_loaded_time > 1):
+                    if question_key not in st.session_state.question_read:
                         
                         # Try to speak the question
-                        if safe_speak(current_q["question"]):
+                        if safe_speak(question_speech(current_q)):
                             st.session_state.question_read.add(question_key)
                     
                     # Add a manual button for re-reading the question if needed
                     if st.button("🔊 Read Question Again", key=f"read_btn_{current_idx}"):
-                        safe_speak(current_q["question"])
+                        safe_speak(question_speech(current_q))
                     
                     # Display different input methods based on question type
                     if q_type in ["short answer", "paragraph"]:
@@ -322,14 +344,11 @@ def main():
                             st.write("🔴 Recording... Speak now")
                             
                             try:
-                                # Import here to avoid loading until needed
-                                import speech_recognition as sr
-                                recognizer = sr.Recognizer()
-                                
                                 # Capture audio from the microphone
+                                import speech_recognition as sr
                                 with sr.Microphone() as source:
-                                    # Adjust for ambient noise
-                                    recognizer.adjust_for_ambient_noise(source, duration=1)
+                                    # Session recognizer, calibrated on first use
+                                    recognizer = get_recognizer(source)
                                     
                                     # Display a spinner while recording
                                     with st.spinner("Listening..."):
@@ -411,8 +430,11 @@ def main():
                             go_to_next_question()
                             st.rerun()
         else:
-            scrape_result = scrape.scrape_data(survey_url, api_key=os.getenv("SCRAPE_API_KEY"))
-            survey_summary = my_gemini.ask(scrape_result, "give me a summary of the survey content")
+            import scrape
+            # Cached per page content: reruns and repeat visits cost no scraping or LLM calls
+            survey_summary = scrape.ask_about_page(
+                survey_url, "give me a summary of the survey content", api_key=os.getenv("SCRAPE_API_KEY")
+            )
             
             # Display the survey summary
             st.header("Generic Survey Filling")
@@ -450,14 +472,11 @@ def main():
                 st.write("🔴 Recording... Speak now")
                 
                 try:
-                    # Import here to avoid loading until needed
-                    import speech_recognition as sr
-                    recognizer = sr.Recognizer()
-                    
                     # Capture audio from the microphone
+                    import speech_recognition as sr
                     with sr.Microphone() as source:
-                        # Adjust for ambient noise
-                        recognizer.adjust_for_ambient_noise(source, duration=1)
+                        # Session recognizer, calibrated on first use
+                        recognizer = get_recognizer(source)
                         
                         # Display a spinner while recording
                         with st.spinner("Recording..."):
@@ -472,7 +491,7 @@ def main():
             # Process audio data after recording stops
             if not st.session_state.is_recording and st.session_state.audio_data:
                 try:
-                    recognizer = sr.Recognizer()
+                    recognizer = st.session_state.recognizer
                     audio = st.session_state.audio_data
                     
                     # Convert speech to text
@@ -0,0 +1,231 @@
+import argparse
+import os
+import pandas as pd
+import analytics
+import review_store
+
+# Files bigger than memory are processed a chunk of rows at a time; partial
+# aggregates are sums and counts, so merging chunks is simple addition and
+# peak memory depends on CHUNK_SIZE, not on the file size.
+CHUNK_SIZE = 100_000
+
+
+def iter_chunks(path, chunksize=CHUNK_SIZE, columns=None):
+    """
+    Read a CSV or Parquet file as a sequence of DataFrames.
+
+    Args:
+        path (str): .csv or .parquet file
+        chunksize (int): Rows per chunk
+        columns (list, optional): Only read these columns
+
+    Yields:
+        pd.DataFrame: Consecutive chunks of rows
+    """
+    if path.endswith(".parquet"):
+        import pyarrow.parquet as pq
+        parquet_file = pq.ParquetFile(path)
+        for batch in parquet_file.iter_batches(batch_size=chunksize, columns=columns):
+            yield batch.to_pandas()
+    else:
+        yield from pd.read_csv(path, chunksize=chunksize, usecols=columns)
+
+
+def clean_survey_chunk(chunk):
+    """The cleaning of dashboard_surveys.load_and_clean_data, for one chunk."""
+    for col in analytics.SURVEY_TEXT_COLUMNS:
+        if col in chunk:
+            # A chunk where a column is all empty reads it as float
+            chunk[col] = chunk[col].astype("string").str.strip()
+    for col in analytics.SURVEY_NUMERIC_COLUMNS:
+        if col in chunk:
+            chunk[col] = pd.to_numeric(chunk[col], errors="coerce")
+    return chunk
+
+
+def score_review_chunk(chunk):
+    """Add sentiment columns to a chunk of reviews that does not have them yet."""
+    if "Sentiment" in chunk:
+        if "Sentiment Category" not in chunk:
+            chunk["Sentiment Category"] = chunk["Sentiment"].apply(review_store.sentiment_category)
+        return chunk
+    return review_store.add_sentiment(chunk)
+
+
+def add(total, partial):
+    """Merge a chunk's partial counts or sums into the running total (None before the first chunk)."""
+    return partial if total is None else total.add(partial, fill_value=0)
+
+
+class ChunkAggregate:
+    """
+    Aggregates accumulated chunk by chunk.
+
+    Every statistic is kept as sums and counts, so ``update`` only adds the
+    chunk's partial aggregate to the running one. ``value_counts``,
+    ``crosstab`` and ``group_mean`` give the same results as the pandas
+    calls on the whole file.
+
+    Args:
+        count_columns (list): Columns to count values of
+        crosstabs (list): (index, columns) pairs to count combinations of
+        means (list): (group column, value column) pairs to average; a group
+            column of None averages over all rows
+    """
+
+    def __init__(self, count_columns=(), crosstabs=(), means=()):
+        self.rows = 0
+        self.counts = dict.fromkeys(count_columns)
+        self.pairs = dict.fromkeys(crosstabs)
+        self.sums = dict.fromkeys(means)
+
+    def update(self, chunk, filters=None):
+        """
+        Add a chunk.
+
+        Args:
+            chunk (pd.DataFrame): Rows to add
+            filters (dict, optional): ``{column: value or list}``; other rows are skipped
+        """
+        for column, value in (filters or {}).items():
+            if value is None:
+                continue
+            values = value if isinstance(value, (list, tuple, set)) else [value]
+            chunk = chunk[chunk[column].isin(values)]
+        self.rows += len(chunk)
+        for col in self.counts:
+            self.counts[col] = add(self.counts[col], chunk[col].value_counts())
+        for index, columns in self.pairs:
+            partial = chunk.groupby([index, columns]).size()
+            self.pairs[(index, columns)] = add(self.pairs[(index, columns)], partial)
+        for by, column in self.sums:
+            values = pd.to_numeric(chunk[column], errors="coerce")
+            keys = chunk[by] if by is not None else pd.Series(0, index=chunk.index)
+            partial = values.groupby(keys).agg(["sum", "count"]).rename(columns={"count": "n"})
+            self.sums[(by, column)] = add(self.sums[(by, column)], partial)
+        return self
+
+    def value_counts(self, column):
+        counts = self.counts[column] if self.counts[column] is not None else pd.Series(dtype="int64")
+        counts = counts.astype("int64")
+        return counts.sort_values(ascending=False, kind="stable").rename("count").rename_axis(column)
+
+    def crosstab(self, index, columns, normalize=False):
+        if self.pairs[(index, columns)] is None:
+            return pd.DataFrame()
+        wide = self.pairs[(index, columns)].astype("int64").unstack(fill_value=0)
+        wide = wide.sort_index().sort_index(axis=1)
+        if normalize:
+            wide = wide.div(wide.sum(axis=1), axis=0)
+        wide.index.name, wide.columns.name = index, columns
+        return wide
+
+    def group_mean(self, by, column):
+        sums = self.sums[(by, column)]
+        if sums is None:
+            return float("nan") if by is None else pd.Series(dtype="float64", name=column)
+        means = (sums["sum"] / sums["n"].where(sums["n"] > 0)).rename(column)
+        if by is None:
+            return means.iloc[0] if len(means) else float("nan")
+        return means.sort_index().rename_axis(by)
+
+
+def aggregate_file(path, aggregate, clean=None, filters=None, chunksize=CHUNK_SIZE, columns=None):
+    """
+    Stream a file through ``clean`` and into ``aggregate``.
+
+    Returns:
+        ChunkAggregate: The aggregate, updated with every chunk
+    """
+    for chunk in iter_chunks(path, chunksize, columns):
+        if clean is not None:
+            chunk = clean(chunk)
+        aggregate.update(chunk, filters)
+    return aggregate
+
+
+def convert_file(path, output_path, clean=None, chunksize=CHUNK_SIZE):
+    """
+    Clean a CSV chunk by chunk into a Parquet file (e.g. for analytics.py).
+
+    Returns:
+        int: Number of rows written
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    rows = 0
+    writer = None
+    tmp_path = output_path + ".tmp"
+    try:
+        for chunk in iter_chunks(path, chunksize):
+            if clean is not None:
+                chunk = clean(chunk)
+            table = pa.Table.from_pandas(chunk, preserve_index=False)
+            if writer is None:
+                writer = pq.ParquetWriter(tmp_path, table.schema)
+            else:
+                # Later chunks may infer other types, e.g. all-null columns
+                table = table.cast(writer.schema)
+            writer.write_table(table)
+            rows += len(chunk)
+    finally:
+        if writer is not None:
+            writer.close()
+    if writer is not None:
+        os.replace(tmp_path, output_path)
+    return rows
+
+
+def summarize_surveys(path, filters=None, chunksize=CHUNK_SIZE):
+    """The survey dashboard's main aggregates for a responses file of any size."""
+    aggregate = ChunkAggregate(
+        count_columns=["visit_frequency", "parks_visited", "age_group", "gender", "neighborhood"],
+        crosstabs=[("age_group", "visit_frequency")],
+        means=[(None, "cleanliness_rating"), (None, "safety_rating"),
+               ("parks_visited", "cleanliness_rating"), ("parks_visited", "safety_rating")],
+    )
+    return aggregate_file(path, aggregate, clean_survey_chunk, filters, chunksize)
+
+
+def summarize_reviews(path, filters=None, chunksize=CHUNK_SIZE):
+    """Per-park and overall review aggregates, scoring sentiment chunk by chunk where missing."""
+    aggregate = ChunkAggregate(
+        count_columns=["Park Name", "Rating", "Sentiment Category"],
+        crosstabs=[("Park Name", "Sentiment Category"), ("Park Name", "Rating")],
+        means=[(None, "Rating"), ("Park Name", "Rating"), ("Park Name", "Sentiment")],
+    )
+    return aggregate_file(path, aggregate, score_review_chunk, filters, chunksize)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Process survey or review files larger than memory")
+    parser.add_argument("--chunksize", type=int, default=CHUNK_SIZE)
+    commands = parser.add_subparsers(dest="command", required=True)
+    summarize = commands.add_parser("summarize", help="print the dashboard aggregates of a file")
+    summarize.add_argument("kind", choices=["surveys", "reviews"])
+    summarize.add_argument("path")
+    convert = commands.add_parser("convert", help="clean a survey CSV into a Parquet file")
+    convert.add_argument("path")
+    convert.add_argument("output_path")
+    args = parser.parse_args()
+
+    if args.command == "convert":
+        rows = convert_file(args.path, args.output_path, clean_survey_chunk, args.chunksize)
+        print(f"Wrote {rows} rows to {args.output_path}")
+        return
+    if args.kind == "surveys":
+        aggregate = summarize_surveys(args.path, chunksize=args.chunksize)
+        print(f"{aggregate.rows} responses, average cleanliness "
+              f"{aggregate.group_mean(None, 'cleanliness_rating'):.2f}, "
+              f"average safety {aggregate.group_mean(None, 'safety_rating'):.2f}")
+        print(aggregate.value_counts("visit_frequency").to_string())
+        print(aggregate.crosstab("age_group", "visit_frequency").to_string())
+    else:
+        aggregate = summarize_reviews(args.path, chunksize=args.chunksize)
+        print(f"{aggregate.rows} reviews, average rating {aggregate.group_mean(None, 'Rating'):.2f}")
+        print(aggregate.value_counts("Sentiment Category").to_string())
+        print(aggregate.group_mean("Park Name", "Rating").sort_values(ascending=False).head(20).to_string())
+
+
+if __name__ == '__main__':
+    main()
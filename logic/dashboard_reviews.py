@@ -1,11 +1,13 @@
 import streamlit as st
 import pandas as pd
-import matplotlib.pyplot as plt
-import seaborn as sns
-from wordcloud import WordCloud
-from textblob import TextBlob
 import plotly.express as px
-import numpy as np
+import analytics
+import review_store
+import text_processing
+import topic_model
+
+# Columns of the filtered reviews the word cloud, scatter and topic charts use
+TEXT_COLUMNS = ["Park Name", "Rating", "Sentiment", "Sentiment Category", "Text"]
 
 def main():
     # Set page configuration
@@ -44,31 +46,55 @@ def main():
 
     # Load data
     @st.cache_data
-    def load_data():
+    def load_csv_reviews():
+        # Flat scrape output, used while the review store is empty
         df = pd.read_csv("park_reviews.csv")
         # Add sentiment analysis
-        df["Sentiment"] = df["Text"].apply(lambda text: TextBlob(str(text)).sentiment.polarity)
-        df["Sentiment Category"] = df["Sentiment"].apply(
-            lambda x: "Positive" if x > 0.1 else ("Negative" if x < -0.1 else "Neutral")
-        )
+        return review_store.add_sentiment(df)
+
+    def reviews_table():
+        # Aggregations run as SQL on the review store files (only the rows and
+        # columns they need are read), or on the flat file without a store
+        return analytics.reviews_table() or analytics.Table(load_csv_reviews())
+
+    @st.cache_data
+    def load_text(filters, store_mtime):
+        # Only the filtered reviews and the columns the text tabs use are
+        # loaded; tokenized once for the word clouds and top-word charts.
+        # store_mtime is only part of the cache key, so new reviews show up.
+        df = analytics.select(reviews_table(), TEXT_COLUMNS, filters)
+        df["Tokens"] = text_processing.tokenize_series(df["Text"])
         return df
 
-    # Loading message
-    with st.spinner('Loading data...'):
-        df = load_data()
+    # Topic model fitted offline by `python topic_model.py reviews`
+    @st.cache_resource
+    def load_topic_labels():
+        model = topic_model.load_topic_model("reviews")
+        return topic_model.topic_labels(model) if model is not None else None
+
+    @st.cache_data
+    def load_topics(data):
+        return topic_model.attach_topics(data[["Park Name", "Text"]], "reviews")
+
+    @st.cache_data
+    def load_rollups(store_mtime):
+        return review_store.read_rollups()
+
+    reviews = reviews_table()
 
     # Show dataframe sample in an expander
     with st.expander("View sample data"):
-        st.dataframe(df.head(10))
+        st.dataframe(analytics.query(reviews, "SELECT * FROM {table} LIMIT 10"))
 
     # Sidebar for filters
     st.sidebar.markdown("<h2 class='section-header'>Filters</h2>", unsafe_allow_html=True)
 
     # Filter by ratings
+    ratings = analytics.distinct(reviews, "Rating")
     rating_filter = st.sidebar.multiselect(
         "Filter by Rating",
-        options=sorted(df["Rating"].unique()),
-        default=sorted(df["Rating"].unique())
+        options=ratings,
+        default=ratings
     )
 
     # Filter by sentiment
@@ -82,7 +108,10 @@ def main():
     top_n = st.sidebar.slider("Show Top N Parks", min_value=5, max_value=50, value=10, step=5)
 
     # Apply filters
-    filtered_df = df[df["Rating"].isin(rating_filter) & df["Sentiment Category"].isin(sentiment_filter)]
+    filters = {"Rating": rating_filter, "Sentiment Category": sentiment_filter}
+    # Loading message
+    with st.spinner('Loading data...'):
+        filtered_df = load_text(filters, review_store.store_mtime())
 
     # Main dashboard layout with tabs
     tab1, tab3, tab4 = st.tabs(["Overview", "Review Text Analysis", "Advanced Analysis"])
@@ -96,8 +125,12 @@ def main():
         with col1:
             # Distribution of ratings
             st.markdown("<h3 class='section-header'>Rating Distribution</h3>", unsafe_allow_html=True)
+            rating_counts = analytics.value_counts(reviews, "Rating", filters).sort_values("Rating")
+            # Plotting libraries are imported when drawn, not with the page
+            import matplotlib.pyplot as plt
+            import seaborn as sns
             fig, ax = plt.subplots(figsize=(10, 6))
-            sns.histplot(filtered_df["Rating"], bins=5, kde=True, ax=ax)
+            sns.barplot(data=rating_counts, x="Rating", y="count", color="#2c7fb8", ax=ax)
             ax.set_xlabel("Rating")
             ax.set_ylabel("Count of Reviews")
             ax.set_title("Distribution of Park Ratings")
@@ -106,7 +139,7 @@ def main():
         with col2:
             # Sentiment distribution
             st.markdown("<h3 class='section-header'>Sentiment Distribution</h3>", unsafe_allow_html=True)
-            sentiment_counts = filtered_df["Sentiment Category"].value_counts().reset_index()
+            sentiment_counts = analytics.value_counts(reviews, "Sentiment Category", filters)
             sentiment_counts.columns = ["Sentiment", "Count"]
             fig = px.pie(
                 sentiment_counts, 
@@ -123,18 +156,20 @@ def main():
         st.markdown("<h3 class='section-header'>Key Statistics</h3>", unsafe_allow_html=True)
         
         stat_col1, stat_col2, stat_col3, stat_col4 = st.columns(4)
+        total_reviews = sentiment_counts["Count"].sum()
         
         with stat_col1:
-            st.metric("Total Parks", filtered_df["Park Name"].nunique())
+            st.metric("Total Parks", analytics.nunique(reviews, "Park Name", filters))
         
         with stat_col2:
-            st.metric("Total Reviews", len(filtered_df))
+            st.metric("Total Reviews", total_reviews)
         
         with stat_col3:
-            st.metric("Average Rating", round(filtered_df["Rating"].mean(), 2))
+            st.metric("Average Rating", round(analytics.means(reviews, ["Rating"], filters)["Rating"], 2))
         
         with stat_col4:
-            positive_pct = (filtered_df["Sentiment Category"] == "Positive").mean() * 100
+            positive = sentiment_counts.loc[sentiment_counts["Sentiment"] == "Positive", "Count"].sum()
+            positive_pct = positive / total_reviews * 100 if total_reviews else float("nan")
             st.metric("Positive Reviews", f"{positive_pct:.1f}%")
 
     with tab3:
@@ -174,17 +209,20 @@ def main():
         
         with wc_col2:
             # Generate and display word cloud
-            if len(wc_data) > 0:
-                text_data = " ".join(wc_data["Text"].astype(str))
-                
-                # Generate word cloud
+            import matplotlib.pyplot as plt
+            from wordcloud import WordCloud, STOPWORDS
+            word_counts = text_processing.word_frequencies(wc_data["Tokens"])
+            # Keep WordCloud's own, larger stoplist, as when it split the text itself
+            word_counts = {word: count for word, count in word_counts.items() if word not in STOPWORDS}
+            if word_counts:
+                # Generate word cloud from the precomputed tokens
                 wordcloud = WordCloud(
                     width=800, 
                     height=400, 
                     background_color="white",
                     max_words=200,
                     collocations=False
-                ).generate(text_data)
+                ).generate_from_frequencies(word_counts)
                 
                 # Display
                 fig, ax = plt.subplots(figsize=(12, 6))
@@ -198,23 +236,8 @@ def main():
         # Top words
         st.markdown("<h3 class='section-header'>Top Words by Category</h3>", unsafe_allow_html=True)
         
-        def get_top_words(texts, n=10):
-            """Extract top words from a series of texts"""
-            # Join all texts
-            all_text = " ".join(texts.astype(str)).lower()
-            
-            # Simple tokenization and counting (could be improved with nltk or spacy)
-            words = all_text.split()
-            # Filter out short words and common stopwords
-            stopwords = ["the", "a", "and", "is", "in", "to", "of", "for", "with", "on", "at", "from", "by", "an", "this", "that", "are", "was", "were", "be", "been", "being", "have", "has", "had", "do", "does", "did", "i", "you", "he", "she", "it", "we", "they", "me", "him", "her", "us", "them"]
-            words = [word for word in words if len(word) > 3 and word.isalpha() and word not in stopwords]
-            
-            # Count words
-            word_counts = pd.Series(words).value_counts().head(n)
-            return word_counts
-        
         # Create tabs for different word analyses
-        word_tab1, word_tab2 = st.tabs(["Words by Rating", "Words by Sentiment"])
+        word_tab1, word_tab2, word_tab3 = st.tabs(["Words by Rating", "Words by Sentiment", "Common Phrases"])
         
         with word_tab1:
             rating_cols = st.columns(len(rating_filter))
@@ -223,7 +246,7 @@ def main():
                 with rating_cols[i % len(rating_cols)]:
                     rating_df = filtered_df[filtered_df["Rating"] == rating]
                     if len(rating_df) > 0:
-                        top_words = get_top_words(rating_df["Text"])
+                        top_words = text_processing.top_words(rating_df["Tokens"])
                         
                         # Create bar chart
                         fig = px.bar(
@@ -244,7 +267,7 @@ def main():
                 with sentiment_cols[i % len(sentiment_cols)]:
                     sentiment_df = filtered_df[filtered_df["Sentiment Category"] == sentiment]
                     if len(sentiment_df) > 0:
-                        top_words = get_top_words(sentiment_df["Text"])
+                        top_words = text_processing.top_words(sentiment_df["Tokens"])
                         
                         # Create bar chart
                         fig = px.bar(
@@ -257,6 +280,20 @@ def main():
                         st.plotly_chart(fig, use_container_width=True)
                     else:
                         st.write(f"No {sentiment} reviews in the filtered data.")
+        
+        with word_tab3:
+            top_phrases = text_processing.top_bigrams(filtered_df["Tokens"], n=15)
+            if len(top_phrases) > 0:
+                fig = px.bar(
+                    x=top_phrases.values,
+                    y=top_phrases.index,
+                    orientation='h',
+                    title="Most Common Two-Word Phrases",
+                    labels={"x": "Count", "y": "Phrase"}
+                )
+                st.plotly_chart(fig, use_container_width=True)
+            else:
+                st.write("No phrases found in the filtered data.")
 
     with tab4:
         st.markdown("<h2 class='section-header'>Advanced Analysis</h2>", unsafe_allow_html=True)
@@ -283,7 +320,7 @@ def main():
         st.markdown("<h3 class='section-header'>Park Comparison</h3>", unsafe_allow_html=True)
         
         # Allow selection of parks to compare
-        top_parks = filtered_df["Park Name"].value_counts().head(20).index.tolist()
+        top_parks = analytics.value_counts(reviews, "Park Name", filters, limit=20)["Park Name"].tolist()
         selected_parks = st.multiselect(
             "Select parks to compare:",
             options=top_parks,
@@ -292,14 +329,14 @@ def main():
         
         if selected_parks:
             # Filter data for selected parks
-            parks_df = filtered_df[filtered_df["Park Name"].isin(selected_parks)]
+            park_filters = dict(filters, **{"Park Name": selected_parks})
             
             # Create comparison metrics
             comp_col1, comp_col2 = st.columns(2)
             
             with comp_col1:
                 # Average ratings comparison
-                avg_ratings = parks_df.groupby("Park Name")["Rating"].mean().reset_index()
+                avg_ratings = analytics.group_mean(reviews, "Park Name", "Rating", park_filters)
                 fig = px.bar(
                     avg_ratings,
                     x="Park Name",
@@ -312,10 +349,8 @@ def main():
             
             with comp_col2:
                 # Sentiment comparison
-                sentiment_comp = pd.crosstab(
-                    parks_df["Park Name"], 
-                    parks_df["Sentiment Category"], 
-                    normalize="index"
+                sentiment_comp = analytics.crosstab(
+                    reviews, "Park Name", "Sentiment Category", park_filters, normalize=True
                 ).reset_index().melt(
                     id_vars=["Park Name"],
                     var_name="Sentiment",
@@ -336,10 +371,7 @@ def main():
                 st.plotly_chart(fig, use_container_width=True)
             
             # Rating distribution by park
-            rating_dist = pd.crosstab(
-                parks_df["Park Name"],
-                parks_df["Rating"]
-            ).reset_index().melt(
+            rating_dist = analytics.crosstab(reviews, "Park Name", "Rating", park_filters).reset_index().melt(
                 id_vars=["Park Name"],
                 var_name="Rating",
                 value_name="Count"
@@ -356,27 +388,74 @@ def main():
             fig.update_layout(xaxis_title="Park", yaxis_title="Number of Reviews")
             st.plotly_chart(fig, use_container_width=True)
         
-        # Time analysis (if date column exists in the data)
-        if "Date" in df.columns:
-            st.markdown("<h3 class='section-header'>Temporal Analysis</h3>", unsafe_allow_html=True)
+        # Topics discussed per park, from the stored topic assignments
+        labels = load_topic_labels()
+        if labels is not None and selected_parks:
+            st.markdown("<h3 class='section-header'>Review Topics by Park</h3>", unsafe_allow_html=True)
+            
+            topics_df = load_topics(filtered_df.loc[filtered_df["Park Name"].isin(selected_parks), ["Park Name", "Text"]])
+            topic_comp = topic_model.topic_distribution(topics_df, "Park Name", labels).reset_index().melt(
+                id_vars=["Park Name"],
+                var_name="Topic",
+                value_name="Percentage"
+            )
+            topic_comp["Percentage"] = topic_comp["Percentage"] * 100
             
-            # Convert to datetime
-            filtered_df["Date"] = pd.to_datetime(filtered_df["Date"])
-            filtered_df["Month"] = filtered_df["Date"].dt.to_period("M")
+            fig = px.bar(
+                topic_comp,
+                x="Park Name",
+                y="Percentage",
+                color="Topic",
+                title="Topic Distribution by Park",
+                barmode="stack"
+            )
+            fig.update_layout(xaxis_title="Park", yaxis_title="Percentage (%)")
+            st.plotly_chart(fig, use_container_width=True)
+        
+        # Time analysis from the precomputed monthly rollups of the review store
+        rollups = load_rollups(review_store.store_mtime())
+        if not rollups.empty:
+            st.markdown("<h3 class='section-header'>Temporal Analysis</h3>", unsafe_allow_html=True)
             
-            # Monthly trends
-            monthly_ratings = filtered_df.groupby(filtered_df["Date"].dt.to_period("M"))["Rating"].mean().reset_index()
-            monthly_ratings["Month"] = monthly_ratings["Date"].astype(str)
+            # Monthly trends across all parks, weighted by review count
+            monthly = rollups.groupby("Month", as_index=False)[review_store.ROLLUP_SUMS].sum()
+            monthly = review_store.finalize_rollups(monthly)
             
             fig = px.line(
-                monthly_ratings,
+                monthly,
                 x="Month",
-                y="Rating",
+                y="Average Rating",
                 markers=True,
                 title="Average Rating Trend Over Time"
             )
             fig.update_layout(xaxis_title="Month", yaxis_title="Average Rating")
             st.plotly_chart(fig, use_container_width=True)
+            
+            fig = px.line(
+                monthly,
+                x="Month",
+                y="Average Sentiment",
+                markers=True,
+                title="Average Sentiment Trend Over Time"
+            )
+            fig.update_layout(xaxis_title="Month", yaxis_title="Average Sentiment")
+            st.plotly_chart(fig, use_container_width=True)
+            
+            # Per-park trends for the parks selected above
+            if selected_parks:
+                park_monthly = review_store.finalize_rollups(
+                    rollups[rollups["Park Name"].isin(selected_parks)]
+                )
+                fig = px.line(
+                    park_monthly,
+                    x="Month",
+                    y="Average Rating",
+                    color="Park Name",
+                    markers=True,
+                    title="Average Rating Trend by Park"
+                )
+                fig.update_layout(xaxis_title="Month", yaxis_title="Average Rating")
+                st.plotly_chart(fig, use_container_width=True)
 
     # Footer with information
     st.markdown("""
@@ -1,13 +1,9 @@
+import os
 import streamlit as st
 import pandas as pd
-import numpy as np
-import matplotlib.pyplot as plt
-import seaborn as sns
 import plotly.express as px
-import plotly.graph_objects as go
-from wordcloud import WordCloud
-from collections import Counter
-import re
+import analytics
+import topic_model
 
 def main():
     # Set page config
@@ -49,49 +45,72 @@ def main():
     st.title("📊 Park Survey Data Analysis Dashboard")
     st.markdown("This dashboard analyzes responses from park visitors to improve park services and amenities.")
 
-    # Function to clean dataframe
-    @st.cache_data
-    def load_and_clean_data():
-        data = pd.read_csv("form_responses.csv")
+    # Responses are read from the database when SURVEY_FORM_URL names a stored
+    # form (python manage.py import_responses loads existing CSV files)
+    survey_form_url = os.getenv("SURVEY_FORM_URL")
+
+    # Function to clean dataframe. Only database responses are loaded into
+    # memory; responses files are queried in place by analytics, which
+    # applies the same cleaning in SQL.
+    @st.cache_data(ttl=60)
+    def load_and_clean_data(start=None, end=None):
+        import db
+        data = db.load_responses(survey_form_url, start=start, end=end)
+        if data is None:
+            return None
         
         # Clean text fields (remove newlines)
-        text_columns = ['neighborhood', 'accessibility', 'improvements', 'event_experience', 'concerns', 'comments']
-        for col in text_columns:
+        for col in analytics.SURVEY_TEXT_COLUMNS:
             data[col] = data[col].str.strip()
         
         # Convert ratings to numeric if needed
-        numeric_cols = ['cleanliness_rating', 'safety_rating']
-        for col in numeric_cols:
+        for col in analytics.SURVEY_NUMERIC_COLUMNS:
             data[col] = pd.to_numeric(data[col], errors='coerce')
         
         return data
 
-    # Load data
-    df = load_and_clean_data()
+    # Topic model fitted offline by `python topic_model.py surveys`
+    @st.cache_resource
+    def load_topic_labels():
+        model = topic_model.load_topic_model("surveys")
+        return topic_model.topic_labels(model) if model is not None else None
+
+    @st.cache_data
+    def load_topics(data):
+        return topic_model.attach_topics(data, "surveys")
 
     # Sidebar filters
     st.sidebar.header("Filters")
 
+    # Submission date filter, applied in the database query
+    start = end = None
+    if survey_form_url:
+        dates = st.sidebar.date_input("Submitted between", value=())
+        if len(dates) == 2:
+            start = pd.Timestamp(dates[0], tz="UTC")
+            end = pd.Timestamp(dates[1], tz="UTC") + pd.Timedelta(days=1)
+
+    # Load data
+    survey = analytics.survey_table(load_and_clean_data(start, end) if survey_form_url else None)
+
     # Age group filter
-    age_groups = ["All"] + sorted(df['age_group'].unique().tolist())
+    age_groups = ["All"] + analytics.distinct(survey, 'age_group')
     selected_age = st.sidebar.selectbox("Age Group", age_groups)
 
     # Gender filter
-    genders = ["All"] + sorted(df['gender'].unique().tolist())
+    genders = ["All"] + analytics.distinct(survey, 'gender')
     selected_gender = st.sidebar.selectbox("Gender", genders)
 
     # Visit frequency filter
-    frequencies = ["All"] + sorted(df['visit_frequency'].unique().tolist())
+    frequencies = ["All"] + analytics.distinct(survey, 'visit_frequency')
     selected_frequency = st.sidebar.selectbox("Visit Frequency", frequencies)
 
-    # Apply filters
-    filtered_df = df.copy()
-    if selected_age != "All":
-        filtered_df = filtered_df[filtered_df['age_group'] == selected_age]
-    if selected_gender != "All":
-        filtered_df = filtered_df[filtered_df['gender'] == selected_gender]
-    if selected_frequency != "All":
-        filtered_df = filtered_df[filtered_df['visit_frequency'] == selected_frequency]
+    # Filters are applied inside every query
+    filters = {
+        'age_group': None if selected_age == "All" else selected_age,
+        'gender': None if selected_gender == "All" else selected_gender,
+        'visit_frequency': None if selected_frequency == "All" else selected_frequency,
+    }
 
     # Create tabs
     tabs = st.tabs([
@@ -100,7 +119,7 @@ def main():
         "🚶 Usage Patterns", 
         "⭐ Satisfaction", 
         "🔍 Amenities", 
-        # "💬 Text Analysis",
+        "💬 Text Analysis",
         # "📈 Correlation Analysis"
     ])
 
@@ -108,14 +127,15 @@ def main():
     with tabs[0]:
         st.header("Survey Overview")
         
+        averages = analytics.means(survey, ['cleanliness_rating', 'safety_rating'], filters)
         col1, col2, col3 = st.columns(3)
         with col1:
-            st.metric("Total Responses", len(filtered_df))
+            st.metric("Total Responses", analytics.count(survey, filters))
         with col2:
-            avg_cleanliness = round(filtered_df['cleanliness_rating'].mean(), 2)
+            avg_cleanliness = round(averages['cleanliness_rating'], 2)
             st.metric("Avg. Cleanliness", avg_cleanliness)
         with col3:
-            avg_safety = round(filtered_df['safety_rating'].mean(), 2)
+            avg_safety = round(averages['safety_rating'], 2)
             st.metric("Avg. Safety", avg_safety)
         
         # Summary statistics
@@ -124,7 +144,7 @@ def main():
         
         with col1:
             # Visit frequency distribution
-            freq_counts = filtered_df['visit_frequency'].value_counts().reset_index()
+            freq_counts = analytics.value_counts(survey, 'visit_frequency', filters)
             freq_counts.columns = ['Visit Frequency', 'Count']
             
             fig = px.bar(
@@ -145,7 +165,7 @@ def main():
         
         with col2:
             # Parks visited distribution
-            parks_counts = filtered_df['parks_visited'].value_counts().reset_index()
+            parks_counts = analytics.value_counts(survey, 'parks_visited', filters)
             parks_counts.columns = ['Park', 'Count']
             
             fig = px.pie(
@@ -168,7 +188,7 @@ def main():
         
         with col1:
             # Age group distribution
-            age_counts = filtered_df['age_group'].value_counts().reset_index()
+            age_counts = analytics.value_counts(survey, 'age_group', filters)
             age_counts.columns = ['Age Group', 'Count']
             
             # Define the correct order for age groups
@@ -200,7 +220,7 @@ def main():
         
         with col2:
             # Gender distribution
-            gender_counts = filtered_df['gender'].value_counts().reset_index()
+            gender_counts = analytics.value_counts(survey, 'gender', filters)
             gender_counts.columns = ['Gender', 'Count']
             
             fig = px.pie(
@@ -216,7 +236,7 @@ def main():
         
         # Neighborhood map or chart
         st.subheader("Neighborhood Distribution")
-        neighborhood_counts = filtered_df['neighborhood'].value_counts().reset_index()
+        neighborhood_counts = analytics.value_counts(survey, 'neighborhood', filters)
         neighborhood_counts.columns = ['Neighborhood', 'Count']
         
         fig = px.bar(
@@ -242,7 +262,7 @@ def main():
         
         with col1:
             # Purpose of visit
-            purpose_counts = filtered_df['purpose'].value_counts().reset_index()
+            purpose_counts = analytics.value_counts(survey, 'purpose', filters)
             purpose_counts.columns = ['Purpose', 'Count']
             
             fig = px.bar(
@@ -263,7 +283,7 @@ def main():
         
         with col2:
             # Travel method
-            travel_counts = filtered_df['travel_method'].value_counts().reset_index()
+            travel_counts = analytics.value_counts(survey, 'travel_method', filters)
             travel_counts.columns = ['Travel Method', 'Count']
             
             fig = px.pie(
@@ -281,17 +301,14 @@ def main():
         st.subheader("Age Group vs. Visit Frequency")
         
         # Create cross tabulation
-        cross_tab = pd.crosstab(
-            filtered_df['age_group'], 
-            filtered_df['visit_frequency']
-        )
+        cross_tab = analytics.crosstab(survey, 'age_group', 'visit_frequency', filters)
         
         # Sort index by age group order
         cross_tab = cross_tab.reindex(age_order)
         
         # Visit frequency order
         freq_order = ["Daily", "Weekly", "Monthly", "A few times a year", "Rarely/Never"]
-        cross_tab = cross_tab[freq_order]
+        cross_tab = cross_tab.reindex(columns=freq_order)
         
         # Create heatmap
         fig = px.imshow(
@@ -314,7 +331,7 @@ def main():
         
         with col1:
             # Cleanliness rating distribution
-            cleanliness_counts = filtered_df['cleanliness_rating'].value_counts().reset_index()
+            cleanliness_counts = analytics.value_counts(survey, 'cleanliness_rating', filters)
             cleanliness_counts.columns = ['Rating', 'Count']
             cleanliness_counts = cleanliness_counts.sort_values('Rating')
             
@@ -336,7 +353,7 @@ def main():
             
             # Average cleanliness by park
             st.subheader("Average Cleanliness by Park")
-            clean_by_park = filtered_df.groupby('parks_visited')['cleanliness_rating'].mean().reset_index()
+            clean_by_park = analytics.group_mean(survey, 'parks_visited', 'cleanliness_rating', filters)
             clean_by_park.columns = ['Park', 'Average Cleanliness']
             
             fig = px.bar(
@@ -356,7 +373,7 @@ def main():
         
         with col2:
             # Safety rating distribution
-            safety_counts = filtered_df['safety_rating'].value_counts().reset_index()
+            safety_counts = analytics.value_counts(survey, 'safety_rating', filters)
             safety_counts.columns = ['Rating', 'Count']
             safety_counts = safety_counts.sort_values('Rating')
             
@@ -378,7 +395,7 @@ def main():
             
             # Average safety by park
             st.subheader("Average Safety by Park")
-            safety_by_park = filtered_df.groupby('parks_visited')['safety_rating'].mean().reset_index()
+            safety_by_park = analytics.group_mean(survey, 'parks_visited', 'safety_rating', filters)
             safety_by_park.columns = ['Park', 'Average Safety']
             
             fig = px.bar(
@@ -399,7 +416,7 @@ def main():
         # Accessibility analysis
         st.subheader("Accessibility Analysis")
         
-        accessibility_counts = filtered_df['accessibility'].value_counts().reset_index()
+        accessibility_counts = analytics.value_counts(survey, 'accessibility', filters)
         accessibility_counts.columns = ['Accessibility', 'Count']
         
         fig = px.pie(
@@ -417,7 +434,7 @@ def main():
         st.header("Amenities Analysis")
         
         # Amenities used
-        amenities_counts = filtered_df['amenities_used'].value_counts().reset_index()
+        amenities_counts = analytics.value_counts(survey, 'amenities_used', filters)
         amenities_counts.columns = ['Amenity', 'Count']
         
         fig = px.bar(
@@ -440,10 +457,7 @@ def main():
         st.subheader("Amenities Used by Age Group")
         
         # Create cross tabulation of amenities by age group
-        amenities_age = pd.crosstab(
-            filtered_df['age_group'], 
-            filtered_df['amenities_used']
-        )
+        amenities_age = analytics.crosstab(survey, 'age_group', 'amenities_used', filters)
         
         # Sort index by age group order
         amenities_age = amenities_age.reindex(age_order)
@@ -468,7 +482,7 @@ def main():
         
         with col1:
             # Event participation
-            event_counts = filtered_df['events_participated'].value_counts().reset_index()
+            event_counts = analytics.value_counts(survey, 'events_participated', filters)
             event_counts.columns = ['Participated', 'Count']
             
             fig = px.pie(
@@ -483,7 +497,7 @@ def main():
         
         with col2:
             # Event experience
-            experience_counts = filtered_df['event_experience'].value_counts().reset_index()
+            experience_counts = analytics.value_counts(survey, 'event_experience', filters)
             experience_counts.columns = ['Experience', 'Count']
             
             fig = px.pie(
@@ -496,5 +510,61 @@ def main():
             fig.update_traces(textposition='inside', textinfo='percent+label')
             st.plotly_chart(fig, use_container_width=True)
 
+    # Tab 6: Text Analysis
+    with tabs[5]:
+        st.header("Feedback Topics")
+        st.markdown("Topics found in the improvements, concerns and comments responses.")
+        
+        labels = load_topic_labels()
+        if labels is None:
+            st.info("No topic model found. Run `python topic_model.py surveys` to fit one.")
+        else:
+            # Only the columns topics are matched and grouped on are loaded
+            config = topic_model.CORPORA["surveys"]
+            topics_df = load_topics(
+                analytics.select(survey, config["text_columns"] + config["group_columns"], filters)
+            )
+            
+            # Overall topic shares
+            topic_counts = topics_df['Topic'].dropna().astype(int).map(labels).value_counts().reset_index()
+            topic_counts.columns = ['Topic', 'Count']
+            
+            fig = px.bar(
+                topic_counts, 
+                x='Count', 
+                y='Topic',
+                orientation='h',
+                color='Count',
+                color_continuous_scale='Teal',
+                text='Count'
+            )
+            fig.update_layout(
+                title='Most Common Feedback Topics',
+                xaxis_title='Number of Respondents',
+                yaxis_title='',
+                height=400
+            )
+            st.plotly_chart(fig, use_container_width=True)
+            
+            # Topic distribution per park or demographic group
+            group_names = {'Park': 'parks_visited', 'Age Group': 'age_group', 'Gender': 'gender'}
+            group_label = st.selectbox("Break topics down by", list(group_names.keys()))
+            
+            dist = topic_model.topic_distribution(topics_df, group_names[group_label], labels)
+            if group_label == 'Age Group':
+                dist = dist.reindex([age for age in age_order if age in dist.index])
+            
+            fig = px.imshow(
+                dist * 100,
+                labels=dict(x="Topic", y=group_label, color="% of Responses"),
+                x=dist.columns,
+                y=dist.index,
+                color_continuous_scale='YlGnBu',
+                aspect="auto",
+                text_auto='.0f'
+            )
+            fig.update_layout(height=500)
+            st.plotly_chart(fig, use_container_width=True)
+
 if __name__ == '__main__':
     main()
\ No newline at end of file
@@ -0,0 +1,34 @@
+import os
+import sys
+
+# The Streamlit pages share the Django project's database
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def setup():
+    """Configure Django so the logic scripts can use my_app's models (safe to call repeatedly)."""
+    from django.apps import apps
+    if apps.ready:
+        return
+    if ROOT_DIR not in sys.path:
+        sys.path.append(ROOT_DIR)
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "public_engagement.settings")
+    import django
+    django.setup()
+
+
+def load_responses(survey_url, start=None, end=None, source=None):
+    """
+    Responses to a form from the database, filtered on the indexed submission time.
+
+    Returns:
+        pd.DataFrame: One row per submission (see my_app.submissions.responses_frame),
+        or None if nothing is stored for the form
+    """
+    setup()
+    from my_app import submissions
+    from my_app.models import Form
+    try:
+        return submissions.responses_frame(survey_url, start=start, end=end, source=source)
+    except Form.DoesNotExist:
+        return None
@@ -0,0 +1,139 @@
+import argparse
+import hashlib
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+
+
+class FakeFirecrawlHandler(BaseHTTPRequestHandler):
+    """
+    Answers POST /v1/scrape like the Firecrawl API, with canned page content.
+
+    The server's ``latency``, ``failure_rate`` and ``rate_limit_rate``
+    attributes add delay and random 500 / 429 responses so retries and
+    concurrency limits can be exercised without network access or API credits.
+    ``rate_limit_first`` answers that many scrapes with 429 before any other,
+    and the peak number of scrapes in flight (overall and per scraped host)
+    is kept in ``max_in_flight`` and ``max_in_flight_per_host``.
+    """
+
+    def do_POST(self):
+        server = self.server
+        with server.lock:
+            server.requests += 1
+        if self.path != "/v1/scrape":
+            self.reply(404, {"success": False, "error": "Not found"})
+            return
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        url = body.get("url")
+        if not url:
+            self.reply(400, {"success": False, "error": "url is required"})
+            return
+
+        host = urlsplit(url).hostname or ""
+        with server.lock:
+            server.in_flight[host] = server.in_flight.get(host, 0) + 1
+            server.max_in_flight = max(server.max_in_flight, sum(server.in_flight.values()))
+            server.max_in_flight_per_host = max(server.max_in_flight_per_host, server.in_flight[host])
+            rate_limited = server.rate_limit_first > 0
+            server.rate_limit_first -= rate_limited
+        time.sleep(server.latency)
+        status, payload, headers = self.scrape_reply(url, body.get("formats", ["markdown"]), rate_limited)
+        # Counted out before replying, so the client's next request never overlaps this one
+        with server.lock:
+            server.in_flight[host] -= 1
+            server.log.append((url, status))
+        self.reply(status, payload, headers)
+
+    def scrape_reply(self, url, formats, rate_limited):
+        server = self.server
+        roll = random.random()
+        if rate_limited or roll < server.rate_limit_rate:
+            return 429, {"success": False, "error": "Rate limit exceeded"}, {"Retry-After": str(server.retry_after)}
+        if roll < server.rate_limit_rate + server.failure_rate:
+            return 500, {"success": False, "error": "Internal server error"}, None
+
+        data = {"metadata": {"sourceURL": url, "title": f"Page {url}", "statusCode": 200}}
+        if "markdown" in formats:
+            data["markdown"] = f"# Page {url}\n\nWhat should the city improve in its parks?"
+        for html_format in ("html", "rawHtml"):
+            if html_format in formats:
+                data[html_format] = f"<html><body><h1>Page {url}</h1><p>What should the city improve in its parks?</p></body></html>"
+        return 200, {"success": True, "data": data}, None
+
+    def do_HEAD(self):
+        # Lets the same server stand in for the scraped sites in redirect
+        # checks and conditional requests (pages never change here)
+        etag = '"' + hashlib.sha1(self.path.encode("utf-8")).hexdigest()[:16] + '"'
+        self.send_response(304 if self.headers.get("If-None-Match") == etag else 200)
+        self.send_header("ETag", etag)
+        self.end_headers()
+
+    def reply(self, status, payload, headers=None):
+        content = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(content)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(content)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_server(port=0, latency=0.0, failure_rate=0.0, rate_limit_rate=0.0, rate_limit_first=0, retry_after=1):
+    """
+    Run a fake Firecrawl server in a background thread.
+
+    Args:
+        port (int): Port to listen on; 0 picks a free one
+        latency (float): Seconds each scrape takes
+        failure_rate (float): Share of scrapes answered with HTTP 500
+        rate_limit_rate (float): Share of scrapes answered with HTTP 429
+        rate_limit_first (int): Number of scrapes answered with HTTP 429 before any other
+        retry_after (int): Retry-After seconds sent with HTTP 429
+
+    Returns:
+        ThreadingHTTPServer: The server; its base URL is ``f"http://127.0.0.1:{server.server_port}"``
+    """
+    server = ThreadingHTTPServer(("127.0.0.1", port), FakeFirecrawlHandler)
+    server.daemon_threads = True
+    server.latency = latency
+    server.failure_rate = failure_rate
+    server.rate_limit_rate = rate_limit_rate
+    server.rate_limit_first = rate_limit_first
+    server.retry_after = retry_after
+    server.requests = 0
+    # Scrapes being answered per scraped host, and (url, status) of each answer
+    server.in_flight = {}
+    server.max_in_flight = 0
+    server.max_in_flight_per_host = 0
+    server.log = []
+    server.lock = threading.Lock()
+    threading.Thread(target=server.serve_forever, name="fake-firecrawl", daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local stand-in for the Firecrawl scrape API")
+    parser.add_argument("--port", type=int, default=3002)
+    parser.add_argument("--latency", type=float, default=0.2)
+    parser.add_argument("--failure-rate", type=float, default=0.0)
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0)
+    args = parser.parse_args()
+    server = start_server(args.port, args.latency, args.failure_rate, args.rate_limit_rate)
+    print(f"Fake Firecrawl listening on http://127.0.0.1:{server.server_port} "
+          f"(set FIRECRAWL_API_URL to this address)")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
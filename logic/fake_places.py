@@ -0,0 +1,144 @@
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+PAGE_SIZE = 20
+REVIEWS_PER_PLACE = 5
+
+
+class FakePlacesHandler(BaseHTTPRequestHandler):
+    """
+    Answers textsearch/json and details/json like the legacy Places API.
+
+    Text Search returns the server's ``places`` in pages of PAGE_SIZE linked by
+    next_page_token. Details returns the newest REVIEWS_PER_PLACE reviews of a
+    place; calling ``add_reviews`` on the server publishes new ones, so
+    incremental ingestion can be checked. ``latency`` and
+    ``over_limit_rate`` add delay and random OVER_QUERY_LIMIT answers.
+    """
+
+    def do_GET(self):
+        server = self.server
+        parts = urlsplit(self.path)
+        params = {key: values[0] for key, values in parse_qs(parts.query).items()}
+        with server.lock:
+            server.requests += 1
+        time.sleep(server.latency)
+        if random.random() < server.over_limit_rate:
+            self.reply({"status": "OVER_QUERY_LIMIT"})
+            return
+        if parts.path.endswith("/textsearch/json"):
+            self.text_search(params)
+        elif parts.path.endswith("/details/json"):
+            self.details(params)
+        else:
+            self.send_error(404)
+
+    def text_search(self, params):
+        start = int(params.get("pagetoken") or 0)
+        page = self.server.places[start:start + PAGE_SIZE]
+        body = {"status": "OK" if page else "ZERO_RESULTS",
+                "results": [{"place_id": place_id, "name": name} for place_id, name in page]}
+        if start + PAGE_SIZE < len(self.server.places):
+            body["next_page_token"] = str(start + PAGE_SIZE)
+        self.reply(body)
+
+    def details(self, params):
+        names = dict(self.server.places)
+        place_id = params.get("place_id")
+        if place_id not in names:
+            self.reply({"status": "NOT_FOUND"})
+            return
+        with self.server.lock:
+            reviews = list(self.server.reviews.get(place_id, []))
+        newest = sorted(reviews, key=lambda review: review["time"], reverse=True)[:REVIEWS_PER_PLACE]
+        self.reply({"status": "OK", "result": {"name": names[place_id], "reviews": newest}})
+
+    def reply(self, payload):
+        content = json.dumps(payload).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def fake_review(place_index, n, timestamp):
+    rating = 1 + (place_index + n) % 5
+    return {
+        "author_name": f"Visitor {place_index}-{n}",
+        "rating": rating,
+        "text": "Lovely park, clean and well kept." if rating >= 3 else "Dirty washrooms and broken benches.",
+        "time": timestamp,
+    }
+
+
+def add_reviews(server, count=1):
+    """Publish ``count`` new reviews for every place (newer than all existing ones)."""
+    with server.lock:
+        server.clock += 3600
+        for index, (place_id, _) in enumerate(server.places):
+            reviews = server.reviews.setdefault(place_id, [])
+            for _ in range(count):
+                reviews.append(fake_review(index, len(reviews), server.clock))
+
+
+def start_server(port=0, n_places=60, latency=0.0, over_limit_rate=0.0):
+    """
+    Run a fake Places server in a background thread.
+
+    Args:
+        port (int): Port to listen on; 0 picks a free one
+        n_places (int): Number of parks, each starting with REVIEWS_PER_PLACE reviews
+        latency (float): Seconds each request takes
+        over_limit_rate (float): Share of requests answered with OVER_QUERY_LIMIT
+
+    Returns:
+        ThreadingHTTPServer: The server; point PLACES_API_URL at ``f"http://127.0.0.1:{server.server_port}"``
+    """
+    server = ThreadingHTTPServer(("127.0.0.1", port), FakePlacesHandler)
+    server.daemon_threads = True
+    server.latency = latency
+    server.over_limit_rate = over_limit_rate
+    server.places = [(f"place-{i:04d}", f"Park {i}") for i in range(n_places)]
+    server.reviews = {}
+    server.clock = 1700000000
+    server.requests = 0
+    server.lock = threading.Lock()
+    add_reviews(server, REVIEWS_PER_PLACE)
+    threading.Thread(target=server.serve_forever, name="fake-places", daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local stand-in for the Google Places API")
+    parser.add_argument("--port", type=int, default=3003)
+    parser.add_argument("--places", type=int, default=60)
+    parser.add_argument("--latency", type=float, default=0.1)
+    parser.add_argument("--over-limit-rate", type=float, default=0.0)
+    parser.add_argument("--new-reviews-every", type=float, default=0,
+                        help="publish one new review per place every N seconds")
+    args = parser.parse_args()
+    server = start_server(args.port, args.places, args.latency, args.over_limit_rate)
+    print(f"Fake Places API listening on http://127.0.0.1:{server.server_port} "
+          f"(set PLACES_API_URL to this address)")
+    try:
+        while True:
+            if args.new_reviews_every:
+                time.sleep(args.new_reviews_every)
+                add_reviews(server)
+            else:
+                threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,28 @@
+# Valid options for fields based on the form HTML. Kept apart from
+# auto_fill_form.py, which sets up Gemini on import, so synthetic_data.py
+# can use them without it.
+AGE_GROUP_OPTIONS = ["Under 18", "18–24", "25–34", "35–44", "45–54", "55–64", "65+"]
+GENDER_OPTIONS = ["Male", "Female", "Non-binary/Other", "Prefer not to say"]
+VISIT_FREQUENCY_OPTIONS = ["Daily", "Weekly", "Monthly", "A few times a year", "Rarely/Never"]
+PARKS_VISITED_OPTIONS = ["Nose Hill Park", "Fish Creek Provincial Park", "Confederation Park", "Other"]
+PURPOSE_OPTIONS = [
+    "Exercise/Walking/Running",
+    "Picnicking/Relaxing",
+    "Social gatherings/Events",
+    "Dog walking",
+    "Sports and recreational activities",
+    "Enjoying nature/Scenery",
+    "Other"
+]
+TRAVEL_METHOD_OPTIONS = ["Walking", "Cycling", "Driving", "Public transit", "Other"]
+AMENITIES_USED_OPTIONS = [
+    "Walking/Running trails",
+    "Playgrounds",
+    "Sports fields/courts",
+    "Picnic areas",
+    "Restrooms",
+    "Water fountains",
+    "Dog parks",
+    "Community event spaces",
+    "Other"
+]
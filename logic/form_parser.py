@@ -0,0 +1,246 @@
+import json
+import re
+import sys
+from html.parser import HTMLParser
+
+# Google Forms embeds the whole form definition in its page as
+#   var FB_PUBLIC_LOAD_DATA_ = [...];
+# data[1][1] lists the items, each [item_id, title, description, type_code, entries, ...]
+LOAD_DATA_RE = re.compile(r"FB_PUBLIC_LOAD_DATA_\s*=\s*(\[.*?\])\s*;\s*</script>", re.DOTALL)
+
+# Item type codes, named as in prompts/question_extraction.txt
+QUESTION_TYPES = {
+    0: "Short Answer",
+    1: "Paragraph",
+    2: "Multiple Choice",
+    3: "Dropdown",
+    4: "Checkboxes",
+    5: "Linear Scale",
+    7: "Multiple Choice Grid",
+    9: "Date",
+    10: "Time",
+    13: "File Upload",
+}
+GRID_TYPE = 7
+SCALE_TYPE = 5
+# Section headers, text blocks, images and videos carry no answer
+NON_QUESTION_TYPES = {6, 8, 11, 12}
+
+# Tags whose content is never shown to respondents
+HIDDEN_TAGS = {"script", "style", "noscript", "svg", "head", "template"}
+
+# Reduced pages longer than this are cut before going to the LLM
+MAX_CONTEXT_CHARS = 20000
+
+
+def find_load_data(html):
+    """The parsed FB_PUBLIC_LOAD_DATA_ array of a Google Forms page, or None."""
+    if not html:
+        return None
+    match = LOAD_DATA_RE.search(html)
+    if not match:
+        return None
+    try:
+        return json.loads(match.group(1))
+    except json.JSONDecodeError:
+        return None
+
+
+def form_title(load_data):
+    info = load_data[1] if len(load_data) > 1 and isinstance(load_data[1], list) else []
+    if len(info) > 8 and info[8]:
+        return info[8]
+    return load_data[3] if len(load_data) > 3 and isinstance(load_data[3], str) else ""
+
+
+def clean_text(text):
+    return re.sub(r"\s+", " ", text or "").strip()
+
+
+def option_labels(options):
+    """Labels of a choice entry's options; the free-text choice becomes "Other:"."""
+    labels = []
+    for option in options or []:
+        if len(option) > 4 and option[4] == 1:
+            labels.append("Other:")
+        elif option and option[0] is not None:
+            labels.append(clean_text(str(option[0])))
+    return labels
+
+
+def skeleton_from_load_data(load_data):
+    """
+    Compact description of every question in a Google Form.
+
+    Args:
+        load_data (list): Parsed FB_PUBLIC_LOAD_DATA_
+
+    Returns:
+        list: Dicts with "title", "type" (a QUESTION_TYPES name, "Checkbox Grid",
+        or "type <code>" for unknown codes) and "options"; grids add "rows",
+        linear scales add "labels"
+    """
+    items = load_data[1][1] or []
+    skeleton = []
+    for item in items:
+        if len(item) < 4 or item[3] in NON_QUESTION_TYPES:
+            continue
+        type_code = item[3]
+        entries = item[4] if len(item) > 4 and item[4] else []
+        question = {
+            "title": clean_text(item[1]),
+            "type": QUESTION_TYPES.get(type_code, f"type {type_code}"),
+            "options": option_labels(entries[0][1]) if entries and len(entries[0]) > 1 else [],
+        }
+        if type_code == GRID_TYPE:
+            question["rows"] = [clean_text(entry[3][0]) for entry in entries if len(entry) > 3 and entry[3]]
+            # Checkbox grids differ from multiple choice grids only by a per-row flag
+            if any(len(entry) > 11 and entry[11] and entry[11][0] == 1 for entry in entries):
+                question["type"] = "Checkbox Grid"
+        elif type_code == SCALE_TYPE and entries and len(entries[0]) > 3 and entries[0][3]:
+            question["labels"] = [clean_text(label) for label in entries[0][3]]
+        skeleton.append(question)
+    return skeleton
+
+
+def parse_questions(load_data):
+    """
+    Questions of a Google Form in the format the chat page and form_utils use.
+
+    Args:
+        load_data (list): Parsed FB_PUBLIC_LOAD_DATA_
+
+    Returns:
+        list: Dicts with "question", "question type" and "answer" (the answer
+        choices, empty for free-text questions); grids add "rows"
+
+    Raises:
+        ValueError: If the form uses an item type this parser does not know
+    """
+    questions = []
+    for item in skeleton_from_load_data(load_data):
+        if item["type"].startswith("type "):
+            raise ValueError(f"Unknown Google Forms item {item['type']} ({item['title']!r})")
+        question = {"question": item["title"], "question type": item["type"], "answer": item["options"]}
+        if "rows" in item:
+            question["rows"] = item["rows"]
+        questions.append(question)
+    return questions
+
+
+def questions_from_page(scrape_result):
+    """
+    Questions of a scraped Google Form, read from its page data without an LLM.
+
+    Returns:
+        list: Questions as from parse_questions, or None if the page has no
+        form data or it could not be parsed
+    """
+    if not isinstance(scrape_result, dict):
+        return None
+    load_data = find_load_data(scrape_result.get("rawHtml") or scrape_result.get("html") or "")
+    if load_data is None:
+        return None
+    try:
+        return parse_questions(load_data) or None
+    except (IndexError, TypeError, ValueError) as e:
+        print(f"Could not parse Google Form data: {e}")
+        return None
+
+
+class VisibleTextParser(HTMLParser):
+    """Collects the text of an HTML page that a reader would see, one block per line."""
+
+    BLOCK_TAGS = {"p", "div", "li", "br", "h1", "h2", "h3", "h4", "h5", "h6", "tr", "label", "option", "title"}
+
+    def __init__(self):
+        super().__init__()
+        self.hidden_depth = 0
+        self.lines = [""]
+
+    def handle_starttag(self, tag, attrs):
+        if tag in HIDDEN_TAGS:
+            self.hidden_depth += 1
+        elif tag in self.BLOCK_TAGS:
+            self.lines.append("")
+
+    def handle_endtag(self, tag):
+        if tag in HIDDEN_TAGS and self.hidden_depth:
+            self.hidden_depth -= 1
+        elif tag in self.BLOCK_TAGS:
+            self.lines.append("")
+
+    def handle_data(self, data):
+        if not self.hidden_depth:
+            self.lines[-1] += data
+
+    def text(self):
+        lines = []
+        for line in self.lines:
+            line = clean_text(line)
+            # Consecutive duplicates come from labels repeated in nested elements
+            if line and (not lines or lines[-1] != line):
+                lines.append(line)
+        return "\n".join(lines)
+
+
+def visible_text(html):
+    parser = VisibleTextParser()
+    parser.feed(html)
+    parser.close()
+    return parser.text()
+
+
+def reduce_page(scrape_result, max_chars=MAX_CONTEXT_CHARS):
+    """
+    Shrink a Firecrawl result to what an LLM needs to read the page.
+
+    Google Forms are reduced to a JSON question skeleton taken from
+    FB_PUBLIC_LOAD_DATA_; other pages to their markdown, or the visible text
+    of their HTML when there is no markdown. Scripts, styles and the raw
+    HTML never reach the prompt.
+
+    Args:
+        scrape_result (dict): Firecrawl page data ("markdown", "html", "metadata")
+        max_chars (int): Length the reduced text is cut to
+
+    Returns:
+        str: Compact page content for the prompt
+    """
+    if not isinstance(scrape_result, dict):
+        return str(scrape_result)[:max_chars]
+    html = scrape_result.get("rawHtml") or scrape_result.get("html") or ""
+    load_data = find_load_data(html)
+    if load_data is not None:
+        try:
+            questions = skeleton_from_load_data(load_data)
+        except (IndexError, TypeError):
+            questions = None
+        if questions:
+            lines = [f"Google Form: {clean_text(form_title(load_data))}"]
+            lines += [json.dumps(question, ensure_ascii=False) for question in questions]
+            return "\n".join(lines)[:max_chars]
+    text = scrape_result.get("markdown") or (visible_text(html) if html else "")
+    title = (scrape_result.get("metadata") or {}).get("title")
+    if title:
+        text = f"{title}\n{text}"
+    return re.sub(r"\n{3,}", "\n\n", text).strip()[:max_chars]
+
+
+def main():
+    """
+    Show how much a saved page shrinks: python form_parser.py page.html
+    """
+    if len(sys.argv) < 2:
+        print("Usage: python form_parser.py page.html")
+        sys.exit(1)
+    with open(sys.argv[1], encoding="utf-8") as f:
+        html = f.read()
+    page = {"html": html}
+    reduced = reduce_page(page)
+    print(reduced)
+    print(f"\n{len(json.dumps(page))} -> {len(reduced)} characters")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,5 +1,4 @@
 import os
-import csv
 import pandas as pd
 import time
 from selenium import webdriver
@@ -11,53 +10,25 @@ from webdriver_manager.chrome import ChromeDriverManager
 from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.chrome.options import Options
 
-def save_responses_to_csv(survey_url, responses, questions):
+def save_responses(survey_url, responses, questions, source="chat"):
     """
-    Save user responses to a CSV file named after the form.
+    Save user responses to the project database.
     
     Args:
         survey_url (str): URL of the Google Form
         responses (dict): Dictionary of responses with question index as key
         questions (list): List of question dictionaries
+        source (str): Where the responses come from
     
     Returns:
-        str: Path to the saved CSV file
+        int: Id of the stored submission; export files with
+        `python manage.py export_responses <url> responses.csv`
     """
-    # Extract a sanitized form name from the URL
-    form_name = survey_url.split('/')[-2] if '/' in survey_url else "survey"
-    csv_filename = f"{form_name}.csv"
-    
-    # Prepare data for CSV
-    row_data = {}
-    
-    # Add all questions and responses
-    for idx, question in enumerate(questions):
-        q_text = question["question"]
-        response = responses.get(idx, "")
-        
-        # Handle different response types
-        if isinstance(response, list):
-            # Join multiple selections with a semicolon
-            response = "; ".join(str(item) for item in response)
-        
-        row_data[q_text] = response
-    
-    # Check if the CSV file exists already
-    file_exists = os.path.isfile(csv_filename)
-    
-    # Create or append to the CSV file
-    mode = 'a' if file_exists else 'w'
-    with open(csv_filename, mode, newline='', encoding='utf-8') as csvfile:
-        writer = csv.DictWriter(csvfile, fieldnames=row_data.keys())
-        
-        # Write header if creating new file
-        if not file_exists:
-            writer.writeheader()
-        
-        # Write the response row
-        writer.writerow(row_data)
-    
-    return csv_filename
+    import db
+    db.setup()
+    # Written by the shared writer thread, batched with other sessions' submissions
+    from my_app import write_queue
+    return write_queue.save_submission(survey_url, questions, responses, source=source).id
 
 def submit_google_form(survey_url, responses, questions):
     """
@@ -1,11 +1,21 @@
 import os
 # secrets
 from dotenv import load_dotenv
-# gemini
-from google import genai
-from google.genai import types
 
-def ask(context, question, gemini_api_key=None):
+def ask_stream(context, question, gemini_api_key=None, response_schema=None):
+    """
+    Yield Gemini's answer in chunks as they are generated.
+
+    Args:
+        context (str): Page content or other context for the question
+        question (str): Question or instruction
+        gemini_api_key (str): Defaults to GEMINI_API_KEY
+        response_schema (dict): If given, JSON mode is used and the answer
+            follows this schema (see structured_output.py)
+    """
+    # gemini SDK is imported on first use; it is slow to import
+    from google import genai
+    from google.genai import types
     load_dotenv()
     if gemini_api_key is None:
         gemini_api_key = os.getenv("GEMINI_API_KEY")
@@ -25,19 +35,29 @@ def ask(context, question, gemini_api_key=None):
             ],
         ),
     ]
-    generate_content_config = types.GenerateContentConfig(
-        temperature=1,
-        top_p=0.95,
-        top_k=40,
-        max_output_tokens=8192,
-        response_mime_type="text/plain",
-    )
-    buffer_data = ""
+    if response_schema is None:
+        generate_content_config = types.GenerateContentConfig(
+            temperature=1,
+            top_p=0.95,
+            top_k=40,
+            max_output_tokens=8192,
+            response_mime_type="text/plain",
+        )
+    else:
+        # Extraction: deterministic sampling and schema-constrained JSON
+        generate_content_config = types.GenerateContentConfig(
+            temperature=0,
+            max_output_tokens=8192,
+            response_mime_type="application/json",
+            response_schema=response_schema,
+        )
     for chunk in client.models.generate_content_stream(
         model=model,
         contents=contents,
         config=generate_content_config,
     ):
-        # print(chunk.text, end="")
-        buffer_data += chunk.text
-    return buffer_data
+        if chunk.text:
+            yield chunk.text
+
+def ask(context, question, gemini_api_key=None):
+    return "".join(ask_stream(context, question, gemini_api_key))
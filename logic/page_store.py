@@ -0,0 +1,233 @@
+import asyncio
+import gzip
+import hashlib
+import json
+import os
+import re
+import time
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+import scrape_client
+
+# Scraped pages are kept under <store_dir>/<url key>/: meta.json with the
+# page's validators (ETag / Last-Modified), its version history and cached
+# LLM results, plus one gzipped Firecrawl result per distinct content hash.
+STORE_DIR = "page_snapshots"
+META_FILE = "meta.json"
+
+# A snapshot younger than this is used without any request (Streamlit reruns
+# the page script on every interaction)
+MAX_AGE = 15 * 60
+
+# Query parameters that do not change the page and are dropped from keys
+IGNORED_PARAMS = {"usp", "fbclid", "gclid", "ref"}
+
+
+def normalize_url(url):
+    """
+    Canonical form of a URL, so links to the same page share one snapshot.
+
+    The scheme and host are lower-cased, default ports, fragments, tracking
+    parameters (utm_*, usp, fbclid...) and trailing slashes are dropped, and
+    the remaining query parameters are sorted.
+    """
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower() or "https"
+    host = (parts.hostname or "").lower()
+    if parts.port and (scheme, parts.port) not in (("http", 80), ("https", 443)):
+        host = f"{host}:{parts.port}"
+    path = parts.path.rstrip("/") or "/"
+    query = sorted(
+        (key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if key not in IGNORED_PARAMS and not key.startswith("utm_")
+    )
+    return urlunsplit((scheme, host, path, urlencode(query), ""))
+
+
+def url_key(url):
+    return hashlib.sha256(normalize_url(url).encode("utf-8")).hexdigest()[:32]
+
+
+def content_hash(data):
+    """Hash of a page's text (markdown, else html) with whitespace collapsed."""
+    text = data.get("markdown") or data.get("html") or ""
+    return hashlib.sha256(re.sub(r"\s+", " ", text).strip().encode("utf-8")).hexdigest()
+
+
+def page_dir(url, store_dir=STORE_DIR):
+    return os.path.join(store_dir, url_key(url))
+
+
+def load_meta(url, store_dir=STORE_DIR):
+    path = os.path.join(page_dir(url, store_dir), META_FILE)
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_meta(meta, store_dir=STORE_DIR):
+    directory = page_dir(meta["url"], store_dir)
+    os.makedirs(directory, exist_ok=True)
+    # Write then rename, so concurrent sessions never read a partial file
+    tmp_path = os.path.join(directory, META_FILE + ".tmp")
+    with open(tmp_path, "w") as f:
+        json.dump(meta, f)
+    os.replace(tmp_path, os.path.join(directory, META_FILE))
+
+
+def load_snapshot(url, digest, store_dir=STORE_DIR):
+    """Firecrawl data of the version of ``url`` with content hash ``digest``, or None if it is missing."""
+    try:
+        with gzip.open(os.path.join(page_dir(url, store_dir), f"{digest}.json.gz"), "rt", encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def save_snapshot(url, digest, data, store_dir=STORE_DIR):
+    directory = page_dir(url, store_dir)
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f"{digest}.json.gz")
+    if not os.path.exists(path):
+        tmp_path = path + ".tmp"
+        with gzip.open(tmp_path, "wt", encoding="utf-8") as f:
+            json.dump(data, f)
+        os.replace(tmp_path, path)
+
+
+def validators(response):
+    headers = response.headers if response is not None else {}
+    return headers.get("ETag"), headers.get("Last-Modified")
+
+
+def is_not_modified(response, meta):
+    """Whether a conditional HEAD shows the page unchanged since ``meta`` was stored."""
+    if response is None:
+        return False
+    if response.status_code == 304:
+        return True
+    if response.status_code != 200:
+        return False
+    etag, last_modified = validators(response)
+    # Servers that ignore conditional headers still report their validators
+    if etag and etag == meta.get("etag"):
+        return True
+    return bool(last_modified) and last_modified == meta.get("last_modified")
+
+
+async def afetch_page(client, url, store_dir=STORE_DIR, max_age=MAX_AGE):
+    """
+    Latest content of a page, scraping it through Firecrawl only when it changed.
+
+    A stored snapshot younger than ``max_age`` seconds is returned directly.
+    Otherwise a conditional HEAD request (If-None-Match / If-Modified-Since)
+    is sent to the page itself; only when that cannot show the page unchanged
+    is it scraped again, and a new version is stored only if its content
+    hash differs from the last one.
+
+    Args:
+        client (scrape_client.FirecrawlClient): Client used for HEAD requests and scraping
+        url (str): Page to fetch
+        store_dir (str): Snapshot store directory
+        max_age (float): Seconds a snapshot is trusted without checking the page
+
+    Returns:
+        dict: url, data (Firecrawl result), content_hash and changed (True if
+        the content differs from the previously stored version)
+    """
+    meta = load_meta(url, store_dir)
+    now = time.time()
+    # A snapshot deleted from the store is a cache miss: the page is scraped again
+    cached = load_snapshot(url, meta["content_hash"], store_dir) if meta and "content_hash" in meta else None
+    if cached is not None and now - meta["checked_at"] < max_age:
+        return {"url": url, "data": cached, "content_hash": meta["content_hash"], "changed": False}
+
+    headers = {}
+    if cached is not None and meta.get("etag"):
+        headers["If-None-Match"] = meta["etag"]
+    if cached is not None and meta.get("last_modified"):
+        headers["If-Modified-Since"] = meta["last_modified"]
+    try:
+        response = await client.head(url, headers=headers)
+    except scrape_client.ScrapeError:
+        response = None
+
+    if cached is not None and is_not_modified(response, meta):
+        meta["checked_at"] = now
+        save_meta(meta, store_dir)
+        return {"url": url, "data": cached, "content_hash": meta["content_hash"], "changed": False}
+
+    data = await client.scrape(url)
+    digest = content_hash(data)
+    changed = meta is None or digest != meta.get("content_hash")
+    if meta is None:
+        meta = {"url": normalize_url(url), "versions": [], "extractions": {}}
+    # Also restores a missing snapshot of an unchanged page (a no-op otherwise)
+    save_snapshot(url, digest, data, store_dir)
+    if changed:
+        meta["versions"].append({"content_hash": digest, "fetched_at": now})
+        meta["content_hash"] = digest
+    if response is not None and response.status_code == 200:
+        meta["etag"], meta["last_modified"] = validators(response)
+    meta["checked_at"] = now
+    save_meta(meta, store_dir)
+    return {"url": url, "data": data, "content_hash": digest, "changed": changed}
+
+
+async def afetch_pages(client, urls, store_dir=STORE_DIR, max_age=MAX_AGE):
+    """
+    ``afetch_page`` for many pages concurrently.
+
+    Returns:
+        dict: url -> page dict, or the ScrapeError for pages that failed
+    """
+    urls = list(dict.fromkeys(urls))
+
+    async def fetch_one(url):
+        try:
+            return await afetch_page(client, url, store_dir, max_age)
+        except scrape_client.ScrapeError as e:
+            return e
+
+    results = await asyncio.gather(*(fetch_one(url) for url in urls))
+    return dict(zip(urls, results))
+
+
+def fetch_page(url, api_key=None, store_dir=STORE_DIR, max_age=MAX_AGE):
+    return scrape_client.run(afetch_page(scrape_client.get_client(api_key), url, store_dir, max_age))
+
+
+def fetch_pages(urls, api_key=None, store_dir=STORE_DIR, max_age=MAX_AGE):
+    return scrape_client.run(afetch_pages(scrape_client.get_client(api_key), urls, store_dir, max_age))
+
+
+def cached_extraction(page, task, extract, store_dir=STORE_DIR, validate=None):
+    """
+    Result of ``extract(page["data"])``, reused while the page content is unchanged.
+
+    Args:
+        page (dict): Page returned by fetch_page
+        task (str): Name of the extraction, including anything that changes its
+            output (e.g. a hash of the prompt)
+        extract (callable): Runs the extraction (usually an LLM call); its
+            result must be JSON-serializable. Exceptions are not cached.
+        store_dir (str): Snapshot store directory
+        validate (callable): If given, a result is only cached when
+            ``validate(result)`` is true; other results are returned but the
+            extraction runs again next time
+
+    Returns:
+        The cached or freshly computed result
+    """
+    meta = load_meta(page["url"], store_dir)
+    cached = meta["extractions"].get(task)
+    if cached and cached["content_hash"] == page["content_hash"]:
+        return cached["result"]
+    result = extract(page["data"])
+    if validate is not None and not validate(result):
+        return result
+    # Re-read: other sessions may have stored results meanwhile
+    meta = load_meta(page["url"], store_dir)
+    meta["extractions"][task] = {"content_hash": page["content_hash"], "result": result}
+    save_meta(meta, store_dir)
+    return result
@@ -0,0 +1,300 @@
+import argparse
+import asyncio
+import json
+import os
+import random
+import time
+import httpx
+import pandas as pd
+from dotenv import load_dotenv
+import review_store
+
+# Google Places (legacy) web service; point PLACES_API_URL at fake_places.py to test offline
+PLACES_API_URL = "https://maps.googleapis.com/maps/api/place"
+
+# Per-place ingestion state: places found by searches and when each was last
+# fetched (reviews already stored are skipped by the review store itself)
+CHECKPOINT_FILE = "places_checkpoint.json"
+
+# Request budget: Places allows bursts, but sustained traffic is throttled
+REQUESTS_PER_SECOND = 10
+CONCURRENCY = 8
+
+MAX_RETRIES = 4
+BACKOFF_BASE = 0.5
+# A next_page_token only becomes valid a couple of seconds after it is issued
+PAGE_TOKEN_DELAY = 2
+RETRY_STATUSES = {"OVER_QUERY_LIMIT", "UNKNOWN_ERROR"}
+
+
+class PlacesError(Exception):
+    """The Places API refused a request or kept failing after retries."""
+
+
+class RateLimiter:
+    """Token bucket shared by every request of a run (``rate`` per second, bursts up to ``burst``)."""
+
+    def __init__(self, rate=REQUESTS_PER_SECOND, burst=None):
+        self.rate = rate
+        self.capacity = burst or rate
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self.lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+class PlacesClient:
+    """Async Places client on one pooled HTTP session, rate limited and retrying transient errors."""
+
+    def __init__(self, api_key, base_url=None, rate=REQUESTS_PER_SECOND, concurrency=CONCURRENCY,
+                 max_retries=MAX_RETRIES, backoff_base=BACKOFF_BASE, page_token_delay=PAGE_TOKEN_DELAY):
+        self.api_key = api_key
+        self.base_url = (base_url or os.getenv("PLACES_API_URL") or PLACES_API_URL).rstrip("/")
+        self.limiter = RateLimiter(rate)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.page_token_delay = page_token_delay
+        self.session = httpx.AsyncClient(
+            timeout=30,
+            limits=httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency),
+        )
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.session.aclose()
+
+    async def get(self, endpoint, params, retry_statuses=RETRY_STATUSES):
+        """
+        Call a Places endpoint and return its JSON body.
+
+        Args:
+            endpoint (str): e.g. "details/json"
+            params (dict): Query parameters (the API key is added)
+            retry_statuses (set): API statuses retried with backoff
+
+        Returns:
+            dict: Response body with status "OK" or "ZERO_RESULTS"
+        """
+        params = dict(params, key=self.api_key)
+        for attempt in range(self.max_retries + 1):
+            await self.limiter.acquire()
+            status = None
+            try:
+                response = await self.session.get(f"{self.base_url}/{endpoint}", params=params)
+                if response.status_code == 200:
+                    data = response.json()
+                    status = data.get("status")
+                    if status in ("OK", "ZERO_RESULTS"):
+                        return data
+                    if status not in retry_statuses:
+                        raise PlacesError(f"{endpoint}: {status} {data.get('error_message', '')}".strip())
+                elif response.status_code < 500 and response.status_code != 429:
+                    raise PlacesError(f"{endpoint}: HTTP {response.status_code}")
+            except httpx.TransportError as e:
+                status = str(e)
+            if attempt == self.max_retries:
+                raise PlacesError(f"{endpoint}: still failing after {attempt + 1} attempts ({status})")
+            delay = self.backoff_base * 2 ** attempt
+            await asyncio.sleep(delay + random.uniform(0, delay / 2))
+
+    async def text_search(self, query):
+        """
+        place_ids of every result of a Text Search, following next_page_token.
+
+        Returns:
+            list: (place_id, name) tuples
+        """
+        places = []
+        params = {"query": query}
+        while True:
+            # A fresh page token answers INVALID_REQUEST until it becomes active
+            retry = RETRY_STATUSES | {"INVALID_REQUEST"} if "pagetoken" in params else RETRY_STATUSES
+            data = await self.get("textsearch/json", params, retry)
+            places.extend((result["place_id"], result.get("name", "")) for result in data.get("results", []))
+            token = data.get("next_page_token")
+            if not token:
+                return places
+            await asyncio.sleep(self.page_token_delay)
+            params = {"pagetoken": token}
+
+    async def place_reviews(self, place_id):
+        """
+        Name and reviews of a place, newest first.
+
+        Returns:
+            tuple: (name, list of review dicts)
+        """
+        data = await self.get("details/json", {
+            "place_id": place_id,
+            "fields": "name,reviews",
+            "reviews_sort": "newest",
+        })
+        result = data.get("result", {})
+        return result.get("name", "Unknown Park"), result.get("reviews", [])
+
+
+def load_checkpoint(path):
+    if not os.path.exists(path):
+        return {"places": {}}
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_checkpoint(checkpoint, path):
+    # Write then rename, so an interrupted run never leaves a corrupt checkpoint
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(checkpoint, f)
+    os.replace(tmp_path, path)
+
+
+def place_state(checkpoint, place_id, name=""):
+    return checkpoint["places"].setdefault(place_id, {"name": name, "fetched_at": None})
+
+
+def review_rows(place_id, name, reviews):
+    """
+    Reviews of a place as rows in the review store's schema.
+
+    Args:
+        place_id (str): Place the reviews belong to; with the review's author
+            and time it identifies the review in the store
+        name (str): Place name, stored as "Park Name"
+        reviews (list): Review dicts from Place Details
+
+    Returns:
+        pd.DataFrame: Rows with review_store.REVIEW_COLUMNS and SOURCE_COLUMNS
+    """
+    rows = []
+    for review in reviews:
+        timestamp = review.get("time")
+        rows.append({
+            "Park Name": name,
+            "Author": review.get("author_name", "Anonymous"),
+            "Rating": review.get("rating"),
+            "Text": review.get("text", ""),
+            # Reviews without a time are stored as undated
+            "Date": pd.NaT if timestamp is None else pd.Timestamp(timestamp, unit="s", tz="UTC"),
+            "Place ID": place_id,
+            "Review Time": timestamp,
+        })
+    return pd.DataFrame(rows, columns=review_store.REVIEW_COLUMNS + review_store.SOURCE_COLUMNS)
+
+
+async def search_places(client, queries, checkpoint):
+    """Add the places found by Text Search queries to the checkpoint; returns how many are new."""
+    found = await asyncio.gather(*(client.text_search(query) for query in queries))
+    added = 0
+    for places in found:
+        for place_id, name in places:
+            if place_id not in checkpoint["places"]:
+                added += 1
+            place_state(checkpoint, place_id, name)
+    return added
+
+
+async def ingest_places(client, place_ids, checkpoint, checkpoint_path, store_dir=review_store.STORE_DIR,
+                        min_interval=0):
+    """
+    Fetch the reviews of many places concurrently and append the new ones to the review store.
+
+    Details requests run concurrently (bounded by the client's pool and rate
+    limiter). Each place's reviews are appended and the checkpoint saved as
+    soon as it finishes, so an interrupted run resumes where it stopped when
+    re-run with ``min_interval``. The review store skips reviews it already
+    holds, so a place fetched again (even one whose checkpoint was not saved
+    before an interruption) adds only its new reviews.
+
+    Sentiment scoring and the store writes are blocking, so they run in a
+    thread, one place at a time, while other places' requests continue.
+
+    Args:
+        client (PlacesClient): Places client
+        place_ids (list): Places to ingest
+        checkpoint (dict): State from load_checkpoint; updated in place
+        checkpoint_path (str): Where the checkpoint is saved
+        store_dir (str): Review store directory
+        min_interval (float): Skip places fetched less than this many seconds ago
+
+    Returns:
+        dict: place_id -> number of new reviews, or the PlacesError for failed places
+    """
+    now = time.time()
+    due = [
+        place_id for place_id in dict.fromkeys(place_ids)
+        if (place_state(checkpoint, place_id)["fetched_at"] or 0) <= now - min_interval
+    ]
+
+    # Appends and checkpoint writes never interleave
+    store_lock = asyncio.Lock()
+
+    def store(place_id, name, reviews):
+        added = review_store.append_reviews(review_rows(place_id, name, reviews), store_dir)
+        place_state(checkpoint, place_id).update(name=name, fetched_at=time.time())
+        save_checkpoint(checkpoint, checkpoint_path)
+        return added
+
+    async def ingest_one(place_id):
+        try:
+            name, reviews = await client.place_reviews(place_id)
+        except PlacesError as e:
+            return place_id, e
+        async with store_lock:
+            return place_id, await asyncio.to_thread(store, place_id, name, reviews)
+
+    return dict(await asyncio.gather(*(ingest_one(place_id) for place_id in due)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Ingest Google Places reviews into the review store")
+    parser.add_argument("--store-dir", default=review_store.STORE_DIR)
+    parser.add_argument("--checkpoint", default=None, help=f"defaults to <store-dir>/{CHECKPOINT_FILE}")
+    parser.add_argument("--rate", type=float, default=REQUESTS_PER_SECOND, help="requests per second")
+    parser.add_argument("--concurrency", type=int, default=CONCURRENCY)
+    commands = parser.add_subparsers(dest="command", required=True)
+    search = commands.add_parser("search", help="find places with Text Search queries")
+    search.add_argument("queries", nargs="+", help='e.g. "parks in Calgary"')
+    ingest = commands.add_parser("ingest", help="fetch new reviews of known (or given) places")
+    ingest.add_argument("place_ids", nargs="*", help="defaults to every place in the checkpoint")
+    ingest.add_argument("--min-interval", type=float, default=0,
+                        help="skip places fetched less than this many seconds ago (resume a run)")
+    args = parser.parse_args()
+
+    load_dotenv()
+    os.makedirs(args.store_dir, exist_ok=True)
+    checkpoint_path = args.checkpoint or os.path.join(args.store_dir, CHECKPOINT_FILE)
+    checkpoint = load_checkpoint(checkpoint_path)
+
+    async def run():
+        async with PlacesClient(os.getenv("PLACES_API_KEY"), rate=args.rate, concurrency=args.concurrency) as client:
+            if args.command == "search":
+                added = await search_places(client, args.queries, checkpoint)
+                save_checkpoint(checkpoint, checkpoint_path)
+                print(f"Found {added} new places ({len(checkpoint['places'])} known)")
+                return
+            place_ids = args.place_ids or list(checkpoint["places"])
+            results = await ingest_places(client, place_ids, checkpoint, checkpoint_path,
+                                          args.store_dir, args.min_interval)
+            failed = {place_id: e for place_id, e in results.items() if isinstance(e, PlacesError)}
+            for place_id, e in failed.items():
+                print(f"Failed {place_id}: {e}")
+            added = sum(n for n in results.values() if not isinstance(n, PlacesError))
+            print(f"Added {added} new reviews from {len(results) - len(failed)} places")
+
+    asyncio.run(run())
+
+
+if __name__ == '__main__':
+    main()
@@ -1,6 +1,5 @@
 import streamlit as st
 import pandas as pd
-import google.generativeai as genai
 import os
 from typing import List, Dict, Any
 import tempfile
@@ -23,16 +22,6 @@ CSV_FILE_2_PATH = os.path.join(current_dir, "park_reviews.csv")
 CSV_FILE_1_NAME = "dataset1"  # Name to identify the first dataset
 CSV_FILE_2_NAME = "dataset2"  # Name to identify the second dataset
 
-# Set up session state for chat history
-if "messages" not in st.session_state:
-    st.session_state.messages = []
-
-# Set up session state for conversation memory
-if "conversation_history" not in st.session_state:
-    st.session_state.conversation_history = [
-        {"role": "system", "content": "answer any question without showing code and in a concise manner"}
-    ]
-
 # Function to check file paths
 def check_file_path(filepath):
     """Debug helper to check if a file exists and return detailed info"""
@@ -52,23 +41,38 @@ def check_file_path(filepath):
     
     return result
 
-# Set up session state for the dataframes
-if "dataframes" not in st.session_state:
-    st.session_state.dataframes = {}
-    # Try to load dataframes on startup
+# The CSVs are read once per process (not per session, and not at import time)
+# and shared by every session's chat.
+@st.cache_data
+def load_dataframes() -> Dict[str, pd.DataFrame]:
+    """Load the datasets the assistant answers questions about"""
+    dataframes = {}
     try:
-        if os.path.exists(CSV_FILE_1_PATH):
-            st.session_state.dataframes[CSV_FILE_1_NAME] = pd.read_csv(CSV_FILE_1_PATH)
-            print("File found")
-        else:
-            print("File not found")
-        if os.path.exists(CSV_FILE_2_PATH):
-            st.session_state.dataframes[CSV_FILE_2_NAME] = pd.read_csv(CSV_FILE_2_PATH)
-            print("File found")
-        else:
-            print("File not found")
+        for name, path in [(CSV_FILE_1_NAME, CSV_FILE_1_PATH), (CSV_FILE_2_NAME, CSV_FILE_2_PATH)]:
+            if os.path.exists(path):
+                dataframes[name] = pd.read_csv(path)
+                print("File found")
+            else:
+                print("File not found")
     except Exception as e:
         print(f"Error loading CSV files: {str(e)}")
+    return dataframes
+
+def init_session_state():
+    """Set up the chat history and conversation memory of this session"""
+    # Set up session state for chat history
+    if "messages" not in st.session_state:
+        st.session_state.messages = []
+
+    # Set up session state for conversation memory
+    if "conversation_history" not in st.session_state:
+        st.session_state.conversation_history = [
+            {"role": "system", "content": "answer any question without showing code and in a concise manner"}
+        ]
+
+    # Set up session state for the dataframes
+    if "dataframes" not in st.session_state:
+        st.session_state.dataframes = load_dataframes()
 
 def get_dataframe_info(df: pd.DataFrame, df_name: str) -> str:
     """Generate information about the dataframe structure"""
@@ -121,6 +125,7 @@ def generate_gemini_response(prompt: str, dataframes: Dict[str, pd.DataFrame], c
     full_prompt = context + conversation_context + "Current user question: " + prompt
     
     try:
+        import google.generativeai as genai
         response = genai.GenerativeModel('gemini-2.0-flash-thinking-exp-01-21').generate_content(full_prompt)
         return response.text
     except Exception as e:
@@ -139,25 +144,12 @@ def main():
     # st.title("CSV Chat Assistant with Gemini")
     st.title("Ask from public Data")
     
-    if not st.session_state.dataframes:
-        current_dir = os.path.dirname(os.path.abspath(__file__))
-        if current_dir == '':  # In some environments, __file__ might not work as expected
-            current_dir = os.getcwd()
-
-        # File paths configuration with absolute paths
-        CSV_FILE_1_PATH = os.path.join(current_dir, "form_responses.csv")
-        CSV_FILE_2_PATH = os.path.join(current_dir, "park_reviews.csv")
-        CSV_FILE_1_NAME = "dataset1"  # Name to identify the first dataset
-        CSV_FILE_2_NAME = "dataset2"  # Name to identify the second dataset
-        st.session_state.dataframes[CSV_FILE_1_NAME] = pd.read_csv(CSV_FILE_1_PATH)
-        st.session_state.dataframes[CSV_FILE_2_NAME] = pd.read_csv(CSV_FILE_2_PATH)
-        print("No datasets loaded. Check file paths at the top of the code.")
-    else:
-        pass
+    init_session_state()
 
     api_key = API_KEY
     if api_key:
         try:
+            import google.generativeai as genai
             genai.configure(api_key=api_key)
             print("API key configured successfully!")
         except Exception as e:
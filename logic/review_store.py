@@ -0,0 +1,293 @@
+import os
+import sys
+import pandas as pd
+
+# Reviews are stored as one CSV per calendar month under
+# <store_dir>/reviews/month=YYYY-MM/reviews.csv, next to a small rollup
+# table holding per-park monthly rating and sentiment aggregates. Reviews
+# without a date go to month=undated and are left out of the rollups.
+STORE_DIR = "review_data"
+PARTITIONS_DIR = "reviews"
+PARTITION_FILE = "reviews.csv"
+ROLLUP_FILE = "monthly_rollups.csv"
+UNDATED = "undated"
+
+REVIEW_COLUMNS = ["Park Name", "Author", "Rating", "Text", "Date"]
+# Set for reviews from the Places API (places_ingest.py): the place and the
+# review's Unix time. Flat CSV imports leave them empty.
+SOURCE_COLUMNS = ["Place ID", "Review Time"]
+STORED_COLUMNS = REVIEW_COLUMNS + SOURCE_COLUMNS + ["Sentiment", "Sentiment Category"]
+# A review already in its partition with the same key is not appended again.
+# Places reviews are keyed on their place and time (park names are not unique
+# and texts get edited); reviews without a place on their park, author and text.
+PLACE_KEY_COLUMNS = ["Place ID", "Author", "Review Time"]
+TEXT_KEY_COLUMNS = ["Park Name", "Author", "Text"]
+KEY_COLUMNS = TEXT_KEY_COLUMNS + SOURCE_COLUMNS
+ROLLUP_KEYS = ["Park Name", "Month"]
+ROLLUP_SUMS = ["Reviews", "Rating Sum", "Sentiment Sum", "Positive", "Neutral", "Negative"]
+
+# Large files are imported and re-aggregated this many rows at a time
+CHUNK_SIZE = 100_000
+
+
+def sentiment_category(polarity):
+    """Bucket a TextBlob polarity score into Positive / Neutral / Negative."""
+    if polarity > 0.1:
+        return "Positive"
+    if polarity < -0.1:
+        return "Negative"
+    return "Neutral"
+
+
+def add_sentiment(df):
+    """
+    Add "Sentiment" and "Sentiment Category" columns to a review frame.
+
+    Args:
+        df (pd.DataFrame): Reviews with a "Text" column
+
+    Returns:
+        pd.DataFrame: The same frame with the sentiment columns filled in
+    """
+    # TextBlob is only needed when scoring new reviews, not when reading the store
+    from textblob import TextBlob
+    df["Sentiment"] = df["Text"].apply(lambda text: TextBlob(str(text)).sentiment.polarity)
+    df["Sentiment Category"] = df["Sentiment"].apply(sentiment_category)
+    return df
+
+
+def partition_path(month, store_dir=STORE_DIR):
+    """Path of the partition file holding reviews for a "YYYY-MM" month."""
+    return os.path.join(store_dir, PARTITIONS_DIR, f"month={month}", PARTITION_FILE)
+
+
+def list_months(store_dir=STORE_DIR):
+    """Sorted list of "YYYY-MM" months that have a partition on disk, then UNDATED if it has one."""
+    root = os.path.join(store_dir, PARTITIONS_DIR)
+    if not os.path.isdir(root):
+        return []
+    return sorted(
+        name.split("=", 1)[1]
+        for name in os.listdir(root)
+        if name.startswith("month=") and os.path.isfile(os.path.join(root, name, PARTITION_FILE))
+    )
+
+
+def compute_rollups(df):
+    """
+    Aggregate reviews into per-park monthly sums.
+
+    Sums (not means) are stored so that rollups from separate batches can be
+    merged by simple addition.
+
+    Args:
+        df (pd.DataFrame): Reviews with "Date", "Rating" and sentiment columns
+
+    Returns:
+        pd.DataFrame: One row per (Park Name, Month); undated reviews are left out
+    """
+    dates = pd.to_datetime(df["Date"], utc=True, errors="coerce")
+    df, dates = df[dates.notna()], dates[dates.notna()]
+    if df.empty:
+        return pd.DataFrame(columns=ROLLUP_KEYS + ROLLUP_SUMS)
+
+    category = df["Sentiment Category"]
+    parts = pd.DataFrame({
+        "Park Name": df["Park Name"],
+        "Month": dates.dt.strftime("%Y-%m"),
+        "Reviews": 1,
+        "Rating Sum": pd.to_numeric(df["Rating"], errors="coerce").fillna(0),
+        "Sentiment Sum": df["Sentiment"],
+        "Positive": (category == "Positive").astype(int),
+        "Neutral": (category == "Neutral").astype(int),
+        "Negative": (category == "Negative").astype(int),
+    })
+    return parts.groupby(ROLLUP_KEYS, as_index=False)[ROLLUP_SUMS].sum()
+
+
+def merge_rollups(existing, delta):
+    """Add a rollup delta onto an existing rollup table."""
+    if existing.empty:
+        return delta.sort_values(ROLLUP_KEYS).reset_index(drop=True)
+    merged = pd.concat([existing, delta], ignore_index=True)
+    merged = merged.groupby(ROLLUP_KEYS, as_index=False)[ROLLUP_SUMS].sum()
+    return merged.sort_values(ROLLUP_KEYS).reset_index(drop=True)
+
+
+def read_rollups(store_dir=STORE_DIR):
+    """Read the raw rollup sums table (empty frame if it does not exist yet)."""
+    path = os.path.join(store_dir, ROLLUP_FILE)
+    if not os.path.exists(path):
+        return pd.DataFrame(columns=ROLLUP_KEYS + ROLLUP_SUMS)
+    return pd.read_csv(path, dtype={"Month": str})
+
+
+def store_mtime(store_dir=STORE_DIR):
+    """
+    Modification time of the store in nanoseconds, or None if it is empty.
+
+    The rollup table is rewritten by every append, so this changes whenever
+    reviews are added; caches of store queries can be keyed on it.
+    """
+    path = os.path.join(store_dir, ROLLUP_FILE)
+    return os.stat(path).st_mtime_ns if os.path.exists(path) else None
+
+
+def write_rollups(rollups, store_dir=STORE_DIR):
+    os.makedirs(store_dir, exist_ok=True)
+    path = os.path.join(store_dir, ROLLUP_FILE)
+    tmp_path = path + ".tmp"
+    rollups.to_csv(tmp_path, index=False)
+    os.replace(tmp_path, path)
+
+
+def review_keys(df):
+    """Identity of each review (see PLACE_KEY_COLUMNS), as an Index of strings."""
+    df = df.reindex(columns=KEY_COLUMNS)
+    # Unix times read back from CSV may be floats
+    df["Review Time"] = pd.to_numeric(df["Review Time"], errors="coerce").astype("Int64")
+    from_place = df["Place ID"].notna()
+
+    def joined(prefix, columns):
+        key = pd.Series(prefix, index=df.index, dtype="string")
+        for column in columns:
+            key = key + "\x1f" + df[column].astype("string").fillna("")
+        return key
+
+    return pd.Index(joined("place", PLACE_KEY_COLUMNS).where(from_place, joined("text", TEXT_KEY_COLUMNS)))
+
+
+def stored_keys(path, chunksize=CHUNK_SIZE):
+    """Keys of the reviews already in a partition file."""
+    parts = pd.read_csv(path, usecols=lambda column: column in KEY_COLUMNS, chunksize=chunksize)
+    keys = [review_keys(part) for part in parts]
+    return keys[0].append(keys[1:]) if keys else pd.Index([])
+
+
+def append_reviews(df, store_dir=STORE_DIR):
+    """
+    Append new reviews to their month partitions and update the rollups.
+
+    Only the partitions touched by the batch are read and written, and the
+    rollup table is updated from the batch alone, so the cost does not grow
+    with the rest of the store. Reviews already stored (same key, see
+    PLACE_KEY_COLUMNS, in the same partition) are skipped, so re-running an
+    import adds nothing.
+    If an append is interrupted between the partitions and the rollups,
+    ``rebuild_rollups`` makes them consistent again.
+
+    Args:
+        df (pd.DataFrame): Reviews with at least REVIEW_COLUMNS, and SOURCE_COLUMNS
+            for reviews from the Places API
+        store_dir (str): Root directory of the review store
+
+    Returns:
+        int: Number of reviews appended
+    """
+    if df.empty:
+        return 0
+
+    missing = [col for col in REVIEW_COLUMNS if col not in df.columns]
+    if missing:
+        raise ValueError(f"Reviews are missing required columns: {missing}")
+
+    df = df[~review_keys(df).duplicated()].reset_index(drop=True)
+    df["Date"] = pd.to_datetime(df["Date"], utc=True, errors="coerce")
+    partitions = df["Date"].dt.strftime("%Y-%m").fillna(UNDATED)
+    new = []
+    for month, part in df.groupby(partitions):
+        path = partition_path(month, store_dir)
+        if os.path.exists(path):
+            part = part[~review_keys(part).isin(stored_keys(path))]
+        if not part.empty:
+            new.append((path, part))
+    if not new:
+        return 0
+
+    # Only reviews that are actually new are scored
+    df = pd.concat([part for _, part in new])
+    if "Sentiment" not in df.columns:
+        df = add_sentiment(df)
+    elif "Sentiment Category" not in df.columns:
+        df["Sentiment Category"] = df["Sentiment"].apply(sentiment_category)
+
+    df = df.reindex(columns=STORED_COLUMNS)
+    df["Review Time"] = pd.to_numeric(df["Review Time"], errors="coerce").astype("Int64")
+    for path, part in new:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        file_exists = os.path.exists(path)
+        df.loc[part.index].to_csv(path, mode="a", header=not file_exists, index=False)
+
+    write_rollups(merge_rollups(read_rollups(store_dir), compute_rollups(df)), store_dir)
+    return len(df)
+
+
+def load_reviews(store_dir=STORE_DIR, start=None, end=None):
+    """
+    Load reviews from the store, reading only the partitions in range.
+
+    Args:
+        store_dir (str): Root directory of the review store
+        start (str, optional): First month to include, "YYYY-MM"
+        end (str, optional): Last month to include, "YYYY-MM"
+
+    Returns:
+        pd.DataFrame: Reviews with a parsed "Date" column; undated reviews
+        (Date NaT) are included only when no range is given
+    """
+    months = [
+        month for month in list_months(store_dir)
+        if (month == UNDATED and start is None and end is None)
+        or (month != UNDATED and (start is None or month >= start) and (end is None or month <= end))
+    ]
+    if not months:
+        return pd.DataFrame(columns=STORED_COLUMNS)
+
+    df = pd.concat([pd.read_csv(partition_path(month, store_dir)) for month in months], ignore_index=True)
+    df["Date"] = pd.to_datetime(df["Date"], utc=True, errors="coerce")
+    return df
+
+
+def finalize_rollups(rollups):
+    """Turn rollup sums into averages, e.g. after re-grouping by Month only."""
+    rollups = rollups.copy()
+    rollups["Average Rating"] = rollups["Rating Sum"] / rollups["Reviews"]
+    rollups["Average Sentiment"] = rollups["Sentiment Sum"] / rollups["Reviews"]
+    return rollups.drop(columns=["Rating Sum", "Sentiment Sum"])
+
+
+def rebuild_rollups(store_dir=STORE_DIR, chunksize=CHUNK_SIZE):
+    """Recompute the rollup table from the partitions, one chunk of a month at a time."""
+    rollups = pd.DataFrame(columns=ROLLUP_KEYS + ROLLUP_SUMS)
+    for month in list_months(store_dir):
+        for part in pd.read_csv(partition_path(month, store_dir), chunksize=chunksize):
+            rollups = merge_rollups(rollups, compute_rollups(part))
+    write_rollups(rollups, store_dir)
+    return rollups
+
+
+def import_csv(csv_path, store_dir=STORE_DIR, chunksize=CHUNK_SIZE):
+    """
+    Import a flat review CSV (such as park_reviews.csv) into the store.
+
+    The file is read, scored and appended ``chunksize`` rows at a time, so
+    files larger than memory can be imported. The original scrape did not
+    record review timestamps; rows without a "Date" are stored as undated.
+    Importing the same file again only adds reviews not stored yet.
+    """
+    count = 0
+    for df in pd.read_csv(csv_path, chunksize=chunksize):
+        if "Date" not in df.columns:
+            df["Date"] = pd.NaT
+        count += append_reviews(df, store_dir)
+    return count
+
+
+def main():
+    csv_path = sys.argv[1] if len(sys.argv) > 1 else "park_reviews.csv"
+    count = import_csv(csv_path)
+    print(f"Imported {count} reviews from {csv_path} into {STORE_DIR}")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,36 +1,61 @@
 import os
-import requests
-import json
+import httpx
 # secrets
 from dotenv import load_dotenv
-# scraper
-from firecrawl import FirecrawlApp
-# gemini
-import base64
-from google import genai
-from google.genai import types
+import hashlib
+import form_parser
 import my_gemini
+import page_store
+import scrape_client
+import structured_output
 import utils
 
 def scrape_data(website_url, api_key):
-    app = FirecrawlApp(api_key=api_key)
-    scrape_result = app.scrape_url(website_url, params={'formats': ['markdown', 'html']})
-    return scrape_result
+    # Served from the page snapshot store; Firecrawl is only called when the
+    # page changed (see page_store.py)
+    return page_store.fetch_page(website_url, api_key)["data"]
+
+def is_answer(text):
+    return bool(text and text.strip())
+
+def ask_about_page(website_url, question, api_key=None, page=None, validate=is_answer):
+    """
+    Ask Gemini about a page, reusing the last answer while the page is unchanged.
+
+    Args:
+        website_url (str): Page to ask about
+        question (str): Question or extraction prompt
+        api_key (str): Firecrawl API key (defaults to SCRAPE_API_KEY)
+        page (dict): Page already fetched with page_store.fetch_page, if any
+        validate (callable): Answers it rejects are not cached (e.g. a JSON
+            check for extraction prompts); by default empty answers
+
+    Returns:
+        str: Gemini's answer
+    """
+    page = page or page_store.fetch_page(website_url, api_key)
+    task = "ask:" + hashlib.sha256(question.encode("utf-8")).hexdigest()[:16]
+    # Only a compact form of the page (question skeleton for Google Forms,
+    # markdown otherwise) goes into the prompt, not the raw HTML
+    return page_store.cached_extraction(
+        page, task, lambda data: my_gemini.ask(form_parser.reduce_page(data), question), validate=validate
+    )
 
 def is_google_form(url):
     try:
-        # Use HEAD request to follow redirects and get the final URL
-        response = requests.head(url, allow_redirects=True, timeout=5)
-        final_url = response.url
+        # HEAD request on the shared session, following redirects to the final URL
+        final_url = scrape_client.resolve_url(url)
         # Check if the final URL contains the common Google Forms path
         if "docs.google.com/forms" in final_url:
             return True
         return False
-    except requests.RequestException as e:
+    except (httpx.HTTPError, scrape_client.ScrapeError) as e:
         print("Error:", e)
         return False
 
 def extract_data(scraped_result, api_key):
+    from google import genai
+    from google.genai import types
     client = genai.Client(
         api_key=api_key,
     )
@@ -64,18 +89,37 @@ def extract_data(scraped_result, api_key):
         buffer_data += chunk.text
     return buffer_data
 
-def get_list_of_questions(website_url):
+def get_list_of_questions(website_url, on_question=None):
+    """
+    Questions of a survey page, as {"question", "question type", "answer"} dicts.
+
+    Args:
+        website_url (str): Survey page
+        on_question (callable): Called with each question as soon as Gemini
+            has produced it, which is not always form order (not called for
+            natively parsed Google Forms)
+
+    Returns:
+        list: The questions
+    """
     load_dotenv()
     api_key=os.getenv("SCRAPE_API_KEY")
-    scrape_result = scrape_data(website_url, api_key)
-    result = my_gemini.ask(scrape_result, utils.read_prompt_file("prompts/question_extraction.txt"))
-    result = result.replace("```json", "").replace("```", "").strip()
+    page = page_store.fetch_page(website_url, api_key)
+    # Google Forms carry their questions in the page data; Gemini is only
+    # needed for other surveys or when that data cannot be parsed
+    questions = form_parser.questions_from_page(page["data"])
+    if questions:
+        return questions
+    prompt = utils.read_prompt_file("prompts/question_extraction.txt")
+    task = "questions:" + hashlib.sha256(prompt.encode("utf-8")).hexdigest()[:16]
     try:
-        result_processed = json.loads(result)
-        # print(result_processed)
-    except Exception as e:
-        print("--------------------- not able to convert to list:", e)
-    return result_processed
+        # Only a complete, non-empty list is cached
+        return page_store.cached_extraction(page, task, lambda data: structured_output.extract_list(
+            form_parser.reduce_page(data), prompt, structured_output.QUESTION_SCHEMA, on_item=on_question, strict=True
+        ), validate=bool)
+    except structured_output.IncompleteExtraction as e:
+        print(f"Partial question list, not cached: {e}")
+        return e.items
 
 
 def main():
@@ -84,14 +128,10 @@ def main():
     # website_url = "https://www.canada.ca/en/environment-climate-change/corporate/transparency/consultations/export-control-list-amendments.html"
     website_url = "https://docs.google.com/forms/d/e/1FAIpQLSevpX3IMNw07QMPJgj7-Q6EZTBXLMR4E50RiyyXp9h65edJOA/viewform"
     is_google = is_google_form(website_url)
-    scrape_result = scrape_data(website_url, api_key)
     if is_google:
-        result = my_gemini.ask(scrape_result, utils.read_prompt_file("prompts/question_extraction.txt"))
-        result = result.replace("```json", "").replace("```", "").strip()
         try:
-            result_processed = json.loads(result)
-            print(result_processed)
-        except Exception as e:
+            print(get_list_of_questions(website_url))
+        except structured_output.StructuredOutputError as e:
             print("--------------------- not able to convert to list:", e)
     else:
         print("not google form")
@@ -100,4 +140,5 @@ def main():
     # extracted_data = extract_data(scrape_result, gemini_api_key)
     # print(extracted_data)
 
-main()
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,252 @@
+import asyncio
+import json
+import os
+import random
+import sys
+import threading
+from urllib.parse import urlsplit
+import httpx
+from dotenv import load_dotenv
+
+# Firecrawl REST API; point FIRECRAWL_API_URL at fake_firecrawl.py to test offline
+FIRECRAWL_API_URL = "https://api.firecrawl.dev"
+# rawHtml keeps the <script> data Google Forms embeds its questions in
+DEFAULT_FORMATS = ("markdown", "rawHtml")
+
+# Requests in flight overall and per scraped site (municipal sites are small
+# and Firecrawl fetches them on our behalf, so each host gets only a few)
+MAX_CONCURRENCY = 16
+PER_HOST_LIMIT = 4
+
+# Retries on rate limiting, server errors and network failures, waiting
+# BACKOFF_BASE * 2**attempt seconds (plus jitter) between attempts
+MAX_RETRIES = 4
+BACKOFF_BASE = 0.5
+BACKOFF_MAX = 30
+RETRY_STATUSES = {408, 429, 500, 502, 503, 504}
+
+REQUEST_TIMEOUT = 60
+# Redirect checks (is this link a Google Form?) should not hold up the page
+RESOLVE_TIMEOUT = 5
+RESOLVE_RETRIES = 1
+
+
+class ScrapeError(Exception):
+    """A page could not be scraped, after retries where they made sense."""
+
+    def __init__(self, url, message, status=None):
+        super().__init__(f"{url}: {message}")
+        self.url = url
+        self.status = status
+
+
+class FirecrawlClient:
+    """
+    Async Firecrawl client sharing one HTTP connection pool for all requests.
+
+    Use it as an async context manager, or call ``close`` when done:
+
+        async with FirecrawlClient(api_key) as client:
+            pages = await client.scrape_many(urls)
+    """
+
+    def __init__(self, api_key=None, base_url=None, max_concurrency=MAX_CONCURRENCY,
+                 per_host_limit=PER_HOST_LIMIT, max_retries=MAX_RETRIES, backoff_base=BACKOFF_BASE,
+                 timeout=REQUEST_TIMEOUT):
+        self.api_key = api_key
+        self.base_url = (base_url or os.getenv("FIRECRAWL_API_URL") or FIRECRAWL_API_URL).rstrip("/")
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.per_host_limit = per_host_limit
+        # Only sent to Firecrawl; the session also talks to the scraped sites
+        self.auth_headers = {"Authorization": f"Bearer {api_key}"} if api_key else {}
+        self.session = httpx.AsyncClient(
+            timeout=timeout,
+            follow_redirects=True,
+            limits=httpx.Limits(max_connections=max_concurrency, max_keepalive_connections=max_concurrency),
+        )
+        self.semaphore = asyncio.Semaphore(max_concurrency)
+        self.host_semaphores = {}
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    async def close(self):
+        await self.session.aclose()
+
+    def host_semaphore(self, url):
+        host = urlsplit(url).hostname or ""
+        if host not in self.host_semaphores:
+            self.host_semaphores[host] = asyncio.Semaphore(self.per_host_limit)
+        return self.host_semaphores[host]
+
+    def backoff(self, attempt, response=None):
+        """Seconds to wait before retry ``attempt``; honours a numeric Retry-After header."""
+        if response is not None:
+            retry_after = response.headers.get("Retry-After", "")
+            if retry_after.isdigit():
+                return min(BACKOFF_MAX, int(retry_after))
+        delay = min(BACKOFF_MAX, self.backoff_base * 2 ** attempt)
+        return delay + random.uniform(0, delay / 2)
+
+    async def request(self, method, url, target_url, retries=None, **kwargs):
+        """
+        Send a request, retrying transient failures with exponential backoff.
+
+        Args:
+            method (str): HTTP method
+            url (str): URL to request
+            target_url (str): Page the request is about; limits concurrency per host
+            retries (int): Overrides the client's max_retries for this request
+
+        Returns:
+            httpx.Response: The final response
+        """
+        retries = self.max_retries if retries is None else retries
+        for attempt in range(retries + 1):
+            response = None
+            # Slots are held only while a request is in flight, not while
+            # backing off, so other pages keep going during a retry wait
+            async with self.host_semaphore(target_url), self.semaphore:
+                try:
+                    response = await self.session.request(method, url, **kwargs)
+                except httpx.TransportError as e:
+                    if attempt == retries:
+                        raise ScrapeError(target_url, f"request failed: {e}") from e
+                else:
+                    if response.status_code not in RETRY_STATUSES or attempt == retries:
+                        return response
+            await asyncio.sleep(self.backoff(attempt, response))
+
+    async def scrape(self, url, formats=DEFAULT_FORMATS):
+        """
+        Scrape one page through Firecrawl.
+
+        Returns:
+            dict: Firecrawl's page data (``markdown``, ``html``, ``metadata``...)
+        """
+        response = await self.request(
+            "POST", f"{self.base_url}/v1/scrape", url,
+            json={"url": url, "formats": list(formats)},
+            headers=self.auth_headers,
+        )
+        if response.status_code != 200:
+            raise ScrapeError(url, f"Firecrawl returned HTTP {response.status_code}", response.status_code)
+        body = response.json()
+        if not body.get("success"):
+            raise ScrapeError(url, body.get("error", "scrape failed"), response.status_code)
+        return body["data"]
+
+    async def scrape_many(self, urls, formats=DEFAULT_FORMATS):
+        """
+        Scrape many pages concurrently, within the global and per-host limits.
+
+        Returns:
+            dict: url -> page data, or the ScrapeError for pages that failed
+        """
+        urls = list(dict.fromkeys(urls))
+
+        async def scrape_one(url):
+            try:
+                return await self.scrape(url, formats)
+            except ScrapeError as e:
+                return e
+
+        results = await asyncio.gather(*(scrape_one(url) for url in urls))
+        return dict(zip(urls, results))
+
+    async def head(self, url, headers=None):
+        """HEAD request to the page itself (not through Firecrawl), following redirects."""
+        return await self.request("HEAD", url, url, retries=RESOLVE_RETRIES, timeout=RESOLVE_TIMEOUT, headers=headers)
+
+    async def resolve_url(self, url):
+        """Final URL after redirects, from a HEAD request on the shared session."""
+        response = await self.head(url)
+        return str(response.url)
+
+
+# Sync callers (Streamlit pages, scrape.py) share one client per API key,
+# running on a background event loop, so its connection pool survives
+# between calls.
+_loop = None
+_loop_lock = threading.Lock()
+_clients = {}
+_client_lock = threading.Lock()
+
+
+def _background_loop():
+    global _loop
+    with _loop_lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            threading.Thread(target=_loop.run_forever, name="scrape-client", daemon=True).start()
+        return _loop
+
+
+def run(coro):
+    """Run a coroutine on the shared background loop and wait for its result."""
+    return asyncio.run_coroutine_threadsafe(coro, _background_loop()).result()
+
+
+def get_client(api_key=None):
+    """
+    Process-wide client for sync callers using ``api_key``; created on first use.
+
+    Each key keeps its own client, and none is closed while the process runs:
+    other threads may still be scraping with it when a new key shows up.
+    """
+    load_dotenv()
+    api_key = api_key or os.getenv("SCRAPE_API_KEY")
+    with _client_lock:
+        if api_key not in _clients:
+            _clients[api_key] = FirecrawlClient(api_key)
+        return _clients[api_key]
+
+
+def scrape_url(url, api_key=None, formats=DEFAULT_FORMATS):
+    return run(get_client(api_key).scrape(url, formats))
+
+
+def scrape_urls(urls, api_key=None, formats=DEFAULT_FORMATS):
+    return run(get_client(api_key).scrape_many(urls, formats))
+
+
+def resolve_url(url):
+    return run(get_client().resolve_url(url))
+
+
+def main():
+    """
+    Batch-scrape the URLs listed in a file (one per line) to JSON Lines.
+
+    Usage: python scrape_client.py urls.txt [pages.jsonl]
+    """
+    if len(sys.argv) < 2:
+        print("Usage: python scrape_client.py urls.txt [pages.jsonl]")
+        sys.exit(1)
+    load_dotenv()
+    with open(sys.argv[1]) as f:
+        urls = [line.strip() for line in f if line.strip() and not line.startswith("#")]
+    output_path = sys.argv[2] if len(sys.argv) > 2 else "pages.jsonl"
+
+    async def scrape_all():
+        async with FirecrawlClient(os.getenv("SCRAPE_API_KEY")) as client:
+            return await client.scrape_many(urls)
+
+    results = asyncio.run(scrape_all())
+    failed = 0
+    with open(output_path, "w") as f:
+        for url, result in results.items():
+            if isinstance(result, ScrapeError):
+                failed += 1
+                print(f"Failed: {result}")
+                continue
+            f.write(json.dumps({"url": url, "data": result}) + "\n")
+    print(f"Scraped {len(results) - failed} of {len(results)} pages into {output_path}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,318 @@
+import ast
+import json
+import re
+import form_parser
+import my_gemini
+
+# Schemas use the OpenAPI subset Gemini accepts as response_schema; validate()
+# checks parsed output against the same dicts.
+QUESTION_TYPE_NAMES = list(form_parser.QUESTION_TYPES.values()) + ["Checkbox Grid"]
+
+QUESTION_SCHEMA = {
+    "type": "OBJECT",
+    "properties": {
+        "question": {"type": "STRING"},
+        "question type": {"type": "STRING", "enum": QUESTION_TYPE_NAMES},
+        "answer": {"type": "ARRAY", "items": {"type": "STRING"}},
+    },
+    "required": ["question", "question type", "answer"],
+}
+
+PYTHON_TYPES = {
+    "STRING": str,
+    "NUMBER": (int, float),
+    "INTEGER": int,
+    "BOOLEAN": bool,
+    "ARRAY": list,
+    "OBJECT": dict,
+}
+
+FENCE_RE = re.compile(r"^\s*```[a-zA-Z]*\s*|\s*```\s*$")
+TRAILING_COMMA_RE = re.compile(r",\s*([\]}])")
+
+
+class StructuredOutputError(ValueError):
+    """The model's output could not be turned into data matching the schema."""
+
+
+class IncompleteExtraction(StructuredOutputError):
+    """Some items stayed invalid or the array was never finished; ``items`` holds the valid ones."""
+
+    def __init__(self, message, items):
+        super().__init__(message)
+        self.items = items
+
+
+def validate(value, schema, path="$"):
+    """
+    Check a parsed value against a schema (type, enum, required, properties, items).
+
+    Returns:
+        list: Error messages; empty if the value is valid
+    """
+    kind = schema.get("type", "").upper()
+    expected = PYTHON_TYPES.get(kind)
+    if expected and (not isinstance(value, expected) or (kind in ("NUMBER", "INTEGER") and isinstance(value, bool))):
+        return [f"{path}: expected {kind.lower()}, got {type(value).__name__}"]
+    errors = []
+    if "enum" in schema and value not in schema["enum"]:
+        errors.append(f"{path}: {value!r} is not one of {schema['enum']}")
+    if kind == "OBJECT":
+        errors += [f"{path}: missing {key!r}" for key in schema.get("required", []) if key not in value]
+        for key, sub_schema in schema.get("properties", {}).items():
+            if key in value:
+                errors += validate(value[key], sub_schema, f"{path}.{key}")
+    elif kind == "ARRAY" and "items" in schema:
+        for index, item in enumerate(value):
+            errors += validate(item, schema["items"], f"{path}[{index}]")
+    return errors
+
+
+def coerce(value, schema):
+    """
+    Fix harmless deviations before validating: enum values in the wrong case,
+    surrounding whitespace, null or a bare string where an array is expected.
+    """
+    kind = schema.get("type", "").upper()
+    if kind == "STRING" and isinstance(value, str):
+        value = value.strip()
+        for option in schema.get("enum", []):
+            if value.lower() == option.lower():
+                return option
+        return value
+    if kind == "ARRAY":
+        if value is None:
+            return []
+        if isinstance(value, str):
+            value = [value]
+        if isinstance(value, list) and "items" in schema:
+            return [coerce(item, schema["items"]) for item in value]
+        return value
+    if kind == "OBJECT" and isinstance(value, dict):
+        properties = schema.get("properties", {})
+        return {key: coerce(item, properties[key]) if key in properties else item for key, item in value.items()}
+    return value
+
+
+def loads_lenient(text):
+    """
+    Parse JSON as LLMs tend to write it: inside code fences, with trailing
+    commas, or as a Python literal with single quotes.
+
+    Raises:
+        ValueError: If the text cannot be parsed either way
+    """
+    text = FENCE_RE.sub("", text).strip()
+    try:
+        return json.loads(text)
+    except json.JSONDecodeError:
+        pass
+    try:
+        return json.loads(TRAILING_COMMA_RE.sub(r"\1", text))
+    except json.JSONDecodeError:
+        pass
+    try:
+        return ast.literal_eval(text)
+    except (ValueError, SyntaxError) as e:
+        raise ValueError(f"not valid JSON: {text[:80]!r}") from e
+
+
+def parse_item(raw, schema):
+    """
+    Parse and validate one array element.
+
+    Returns:
+        tuple: (value, errors); value is None when the element is unusable
+    """
+    try:
+        value = coerce(loads_lenient(raw), schema)
+    except ValueError as e:
+        return None, [str(e)]
+    errors = validate(value, schema)
+    return (None if errors else value), errors
+
+
+class ArrayItemParser:
+    """
+    Incremental parser for a JSON array that arrives in chunks.
+
+    ``feed`` returns the raw text of every top-level element completed by the
+    chunk, so elements can be used while the rest is still being generated.
+    Text before the opening bracket (prose, code fences) is skipped.
+    """
+
+    def __init__(self):
+        self.started = False
+        self.done = False
+        self.depth = 0
+        self.in_string = False
+        self.escaped = False
+        self.current = []
+
+    def feed(self, text):
+        completed = []
+        for char in text:
+            if self.done:
+                break
+            if not self.started:
+                if char == "[":
+                    self.started = True
+                    self.depth = 1
+                continue
+            if self.in_string:
+                self.current.append(char)
+                if self.escaped:
+                    self.escaped = False
+                elif char == "\\":
+                    self.escaped = True
+                elif char == '"':
+                    self.in_string = False
+                continue
+            if char == '"':
+                self.in_string = True
+            elif char in "[{":
+                self.depth += 1
+            elif char in "]}":
+                self.depth -= 1
+                if self.depth == 0:
+                    self.done = True
+                    self.finish_element(completed)
+                    continue
+                if self.depth == 1:
+                    self.current.append(char)
+                    self.finish_element(completed)
+                    continue
+            elif char == "," and self.depth == 1:
+                self.finish_element(completed)
+                continue
+            self.current.append(char)
+        return completed
+
+    def finish_element(self, completed):
+        raw = "".join(self.current).strip()
+        self.current = []
+        if raw:
+            completed.append(raw)
+
+    def pending(self):
+        """Text of an element that was started but not finished."""
+        return "".join(self.current).strip()
+
+
+def stream_items(chunks, schema, on_item=None):
+    """
+    Parse a streamed JSON array element by element.
+
+    Returns:
+        tuple: (items, failed, complete) where items holds each valid element
+        or None in the place of an invalid one, failed maps those indices to
+        (raw text, errors), and complete is False if the array never closed
+    """
+    parser = ArrayItemParser()
+    items, failed = [], {}
+    for chunk in chunks:
+        for raw in parser.feed(chunk):
+            value, errors = parse_item(raw, schema)
+            if errors:
+                failed[len(items)] = (raw, errors)
+                items.append(None)
+            else:
+                items.append(value)
+                if on_item:
+                    on_item(value)
+    if not parser.started:
+        raise StructuredOutputError("the model did not return a JSON array")
+    return items, failed, parser.done
+
+
+def repair_schema(item_schema):
+    """Schema of a corrected item, sent back with the index it was given."""
+    return {
+        "type": "OBJECT",
+        "properties": {"index": {"type": "INTEGER"}, "item": item_schema},
+        "required": ["index", "item"],
+    }
+
+
+def extract_list(context, instruction, item_schema, on_item=None, max_repair_rounds=1, ask_stream=None,
+                 strict=False):
+    """
+    Extract a list of schema-conforming items from ``context`` with Gemini.
+
+    The model is asked for a JSON array in JSON mode with the schema, and the
+    streamed answer is parsed incrementally, so ``on_item`` sees each valid
+    item as soon as it is generated. Invalid items are sent back to the model
+    on their own, numbered, to be corrected (the corrections echo the number,
+    so a skipped item cannot shift the others), and a truncated answer is
+    continued from the last complete item instead of being generated again
+    from scratch.
+
+    Args:
+        context (str): Content to extract from
+        instruction (str): What to extract
+        item_schema (dict): Schema of one item
+        on_item (callable): Called with each valid item as it becomes available;
+            repaired items come after the items streamed past them, so calls are
+            not necessarily in list order (the returned list is)
+        max_repair_rounds (int): Rounds of repair / continuation requests
+        ask_stream (callable): Streaming model call, defaults to my_gemini.ask_stream
+        strict (bool): Raise IncompleteExtraction instead of returning a partial
+            list when items stayed invalid or the array was never finished
+
+    Returns:
+        list: Valid items in order; items that stayed invalid are left out
+
+    Raises:
+        IncompleteExtraction: With ``strict``, if the list is not complete
+    """
+    ask_stream = ask_stream or my_gemini.ask_stream
+    schema = {"type": "ARRAY", "items": item_schema}
+    items, failed, complete = stream_items(ask_stream(context, instruction, response_schema=schema), item_schema, on_item)
+
+    for _ in range(max_repair_rounds):
+        if failed:
+            broken = "\n".join(
+                f"Item {index}: {raw}\nProblems: {'; '.join(errors)}" for index, (raw, errors) in failed.items()
+            )
+            fix_schema = repair_schema(item_schema)
+            repaired, _, _ = stream_items(
+                ask_stream(
+                    json.dumps(item_schema),
+                    "The items below do not match this JSON schema. Return them corrected, as a JSON "
+                    'array of {"index": <the item\'s number>, "item": <the corrected item>} objects.\n'
+                    f"{broken}",
+                    response_schema={"type": "ARRAY", "items": fix_schema},
+                ),
+                fix_schema,
+            )
+            for value in repaired:
+                if value is not None and value["index"] in failed:
+                    del failed[value["index"]]
+                    items[value["index"]] = value["item"]
+                    if on_item:
+                        on_item(value["item"])
+        if not complete:
+            done = [item for item in items if item is not None]
+            more, more_failed, complete = stream_items(
+                ask_stream(
+                    context,
+                    f"{instruction}\nThe first {len(done)} items were already extracted, ending with: "
+                    f"{json.dumps(done[-2:])}. Return only the items after those, as a JSON array.",
+                    response_schema=schema,
+                ),
+                item_schema,
+                on_item,
+            )
+            offset = len(items)
+            items += more
+            failed.update({offset + index: entry for index, entry in more_failed.items()})
+        if not failed and complete:
+            break
+
+    result = [item for item in items if item is not None]
+    if failed or not complete:
+        message = f"{len(failed)} items did not match the schema" + ("" if complete else " and the list was cut off")
+        if strict:
+            raise IncompleteExtraction(message, result)
+        print(f"{message}: {list(failed.values())[:3]}")
+    return result
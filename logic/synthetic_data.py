@@ -0,0 +1,303 @@
+import argparse
+import os
+import time
+import numpy as np
+import pandas as pd
+import form_options
+
+# Synthetic survey responses and park reviews for load tests, without any
+# LLM calls. Choice columns use the option lists of form_options; free
+# text comes from word-level Markov chains trained on the bundled
+# form_responses.csv and park_reviews.csv. Each chain writes a pool of
+# texts once, and rows pick from the pools with NumPy, so columns stay
+# pandas Categoricals and millions of rows are written per minute:
+#   python synthetic_data.py surveys 2000000 surveys.parquet
+DATA_DIR = os.path.dirname(os.path.abspath(__file__))
+SURVEY_SOURCE = os.path.join(DATA_DIR, "form_responses.csv")
+REVIEW_SOURCE = os.path.join(DATA_DIR, "park_reviews.csv")
+
+SURVEY_TEXT_COLUMNS = ["accessibility", "improvements", "event_experience", "concerns", "comments"]
+SURVEY_CHOICES = {
+    "age_group": form_options.AGE_GROUP_OPTIONS,
+    "gender": form_options.GENDER_OPTIONS,
+    "visit_frequency": form_options.VISIT_FREQUENCY_OPTIONS,
+    "parks_visited": form_options.PARKS_VISITED_OPTIONS,
+    "purpose": form_options.PURPOSE_OPTIONS,
+    "travel_method": form_options.TRAVEL_METHOD_OPTIONS,
+    "amenities_used": form_options.AMENITIES_USED_OPTIONS,
+    "events_participated": ["Yes", "No"],
+}
+SURVEY_COLUMNS = [
+    "age_group", "gender", "neighborhood", "visit_frequency", "parks_visited", "purpose", "travel_method",
+    "cleanliness_rating", "safety_rating", "accessibility", "amenities_used", "improvements",
+    "events_participated", "event_experience", "concerns", "comments",
+]
+REVIEW_COLUMNS = ["Park Name", "Author", "Rating", "Text"]
+
+# Probability of the k-th most common value is proportional to 1 / k**skew;
+# 0 gives uniform columns
+SKEW = 1.0
+# Distinct generated texts per free-text column
+POOL_SIZE = 5_000
+MAX_WORDS = 80
+CHUNK_SIZE = 500_000
+
+
+class MarkovText:
+    """
+    A word-level Markov chain that generates many texts at once.
+
+    Transitions are stored sorted by word, with each word's cumulative
+    probabilities shifted by its id, so the next word of every text is one
+    ``np.searchsorted`` over all texts.
+
+    Args:
+        texts (iterable): Training texts
+    """
+
+    def __init__(self, texts):
+        sentences = [text.split() for text in texts if isinstance(text, str) and text.strip()]
+        if not sentences:
+            raise ValueError("MarkovText needs at least one non-empty text")
+        # Word 0 starts every text and word 1 ends it
+        self.words = np.array(["", ""] + sorted({word for sentence in sentences for word in sentence}), dtype=object)
+        ids = {word: i for i, word in enumerate(self.words) if i > 1}
+        previous, following = [], []
+        for sentence in sentences:
+            chain = [0] + [ids[word] for word in sentence] + [1]
+            previous += chain[:-1]
+            following += chain[1:]
+        pairs, counts = np.unique(np.array(previous) * len(self.words) + np.array(following), return_counts=True)
+        self.previous, self.following = np.divmod(pairs, len(self.words))
+        totals = np.bincount(self.previous, weights=counts)
+        cumulative = np.cumsum(counts) - np.repeat(np.cumsum(totals) - totals, np.bincount(self.previous))
+        self.keys = self.previous + cumulative / totals[self.previous]
+        # Exactly 1.0 at the end of each word's block, whatever the rounding
+        last = np.r_[self.previous[1:] != self.previous[:-1], True]
+        self.keys[last] = self.previous[last] + 1.0
+
+    def generate(self, n, rng, max_words=MAX_WORDS):
+        """
+        Generate ``n`` texts of up to ``max_words`` words.
+
+        Returns:
+            list: The texts
+        """
+        state = np.zeros(n, dtype=np.int64)
+        generated = np.ones((n, max_words), dtype=np.int64)
+        running = np.arange(n)
+        for step in range(max_words):
+            position = np.searchsorted(self.keys, state[running] + rng.random(len(running)), side="right")
+            state[running] = self.following[position]
+            generated[running, step] = state[running]
+            running = running[state[running] != 1]
+            if not len(running):
+                break
+        return [" ".join(self.words[row[row > 1]]) for row in generated]
+
+
+def skewed_weights(k, skew=SKEW, rng=None):
+    """
+    Sampling probabilities for ``k`` values, 1 / rank**skew.
+
+    Args:
+        rng (np.random.Generator, optional): Shuffle which value gets which rank
+
+    Returns:
+        np.ndarray: Probabilities summing to 1
+    """
+    weights = 1.0 / np.arange(1, k + 1) ** skew
+    if rng is not None:
+        weights = rng.permutation(weights)
+    return weights / weights.sum()
+
+
+def choice_column(values, n, rng, weights):
+    """``n`` samples of the distinct ``values``, as a Categorical."""
+    return pd.Categorical.from_codes(rng.choice(len(values), size=n, p=weights), categories=values, validate=False)
+
+
+def text_pool(texts, size, rng, max_sentences=1):
+    """
+    Distinct texts generated by a Markov chain trained on ``texts``.
+
+    Args:
+        max_sentences (int): Join up to this many generated texts into one,
+            for short, repetitive training answers
+
+    Returns:
+        list: Up to ``size`` texts
+    """
+    sentences = MarkovText(texts).generate(size * max_sentences, rng)
+    if max_sentences == 1:
+        return list(dict.fromkeys(sentences))
+    lengths = rng.integers(1, max_sentences + 1, size)
+    parts = [sentences[i * max_sentences:i * max_sentences + length] for i, length in enumerate(lengths)]
+    return list(dict.fromkeys(" ".join(dict.fromkeys(part)) for part in parts))
+
+
+class SurveyGenerator:
+    """
+    Survey responses with the columns of form_responses.csv.
+
+    Args:
+        seed (int, optional): Seed for reproducible output
+        skew (float): See SKEW
+        pool_size (int): See POOL_SIZE
+        source (str): Responses to train the text chains on and take neighborhoods from
+    """
+
+    def __init__(self, seed=None, skew=SKEW, pool_size=POOL_SIZE, source=SURVEY_SOURCE):
+        self.rng = np.random.default_rng(seed)
+        reference = pd.read_csv(source)
+        self.values = dict(SURVEY_CHOICES)
+        self.values["cleanliness_rating"] = self.values["safety_rating"] = [1, 2, 3, 4, 5]
+        # Neighborhoods are names, not sentences: keep the real ones
+        self.values["neighborhood"] = sorted(reference["neighborhood"].dropna().str.strip().unique())
+        for column in SURVEY_TEXT_COLUMNS:
+            self.values[column] = text_pool(reference[column].dropna().str.strip(), pool_size, self.rng, 2)
+        self.weights = {column: skewed_weights(len(values), skew, self.rng) for column, values in self.values.items()}
+
+    def sample(self, n):
+        """
+        Generate ``n`` responses.
+
+        Returns:
+            pd.DataFrame: Categorical columns, in the order of form_responses.csv
+        """
+        data = {column: choice_column(self.values[column], n, self.rng, self.weights[column]) for column in SURVEY_COLUMNS}
+        # No experience to describe without taking part
+        data["event_experience"][np.asarray(data["events_participated"] == "No")] = np.nan
+        data["cleanliness_rating"] = np.asarray(data["cleanliness_rating"], dtype=np.int64)
+        data["safety_rating"] = np.asarray(data["safety_rating"], dtype=np.int64)
+        return pd.DataFrame(data)
+
+
+class ReviewGenerator:
+    """
+    Park reviews with the columns Park Name, Author, Rating and Text.
+
+    Reviews rated 4 or 5 and reviews rated 1 to 3 get text from separate
+    chains, so their sentiment follows the rating.
+
+    Args:
+        seed (int, optional): Seed for reproducible output
+        skew (float): See SKEW; ratings are skewed towards 5, like real reviews
+        pool_size (int): See POOL_SIZE; also the number of distinct authors
+        source (str): Reviews to train the text chains on and take park names from
+    """
+
+    def __init__(self, seed=None, skew=SKEW, pool_size=POOL_SIZE, source=REVIEW_SOURCE):
+        self.rng = np.random.default_rng(seed)
+        reference = pd.read_csv(source)
+        self.parks = sorted(reference["Park Name"].dropna().unique())
+        self.park_weights = skewed_weights(len(self.parks), skew, self.rng)
+        self.ratings = np.array([5, 4, 3, 2, 1])
+        self.rating_weights = skewed_weights(len(self.ratings), skew)
+        first_names = reference["Author"].dropna().str.split().str[0].unique()
+        initials = np.array(list("ABCDEFGHIJKLMNOPRSTW"), dtype=object)
+        authors = self.rng.choice(first_names, pool_size) + " " + self.rng.choice(initials, pool_size)
+        self.authors = list(dict.fromkeys(authors))
+        self.author_weights = skewed_weights(len(self.authors), skew, self.rng)
+        positive = reference["Rating"] >= 4
+        self.positive = text_pool(reference.loc[positive, "Text"], pool_size, self.rng)
+        # Few real reviews are negative; fall back to all of them if there are none
+        negative = reference.loc[~positive, "Text"] if (~positive).any() else reference["Text"]
+        self.negative = text_pool(negative, pool_size, self.rng)
+
+    def sample(self, n):
+        """
+        Generate ``n`` reviews.
+
+        Returns:
+            pd.DataFrame: Park Name, Author, Rating and Text
+        """
+        ratings = self.ratings[self.rng.choice(len(self.ratings), size=n, p=self.rating_weights)]
+        texts = np.where(
+            ratings >= 4,
+            self.rng.integers(0, len(self.positive), n),
+            len(self.positive) + self.rng.integers(0, len(self.negative), n),
+        )
+        return pd.DataFrame({
+            "Park Name": choice_column(self.parks, n, self.rng, self.park_weights),
+            "Author": choice_column(self.authors, n, self.rng, self.author_weights),
+            "Rating": ratings,
+            "Text": pd.Categorical.from_codes(texts, categories=self.positive + self.negative, validate=False),
+        })
+
+
+def generator(kind, **kwargs):
+    """A SurveyGenerator ("surveys") or ReviewGenerator ("reviews")."""
+    if kind == "surveys":
+        return SurveyGenerator(**kwargs)
+    if kind == "reviews":
+        return ReviewGenerator(**kwargs)
+    raise ValueError(f"Unknown kind '{kind}', expected 'surveys' or 'reviews'")
+
+
+def write_file(source, rows, path, chunksize=CHUNK_SIZE):
+    """
+    Write ``rows`` generated rows to a .csv or .parquet file, a chunk at a time.
+
+    Args:
+        source (SurveyGenerator or ReviewGenerator): Generator to sample from
+        rows (int): Number of rows
+        path (str): Output file; the extension picks the format
+
+    Returns:
+        int: Number of rows written
+    """
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+    import pyarrow.parquet as pq
+    if not path.endswith((".csv", ".parquet")):
+        raise ValueError(f"Unsupported file type: {path} (expected .csv or .parquet)")
+    writer = schema = None
+    tmp_path = path + ".tmp"
+    written = 0
+    try:
+        while written < rows:
+            table = pa.Table.from_pandas(source.sample(min(chunksize, rows - written)), preserve_index=False)
+            if writer is None:
+                schema = table.schema
+                if path.endswith(".csv"):
+                    # CSV has no dictionaries: write the plain values
+                    schema = pa.schema([
+                        field.with_type(field.type.value_type) if pa.types.is_dictionary(field.type) else field
+                        for field in schema
+                    ])
+                    writer = pa_csv.CSVWriter(tmp_path, schema)
+                else:
+                    writer = pq.ParquetWriter(tmp_path, schema)
+            # Each chunk's dictionaries differ; the file keeps one schema
+            table = table.cast(schema)
+            writer.write_table(table)
+            written += table.num_rows
+    finally:
+        if writer is not None:
+            writer.close()
+    if writer is not None:
+        os.replace(tmp_path, path)
+    return written
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate synthetic survey responses or park reviews")
+    parser.add_argument("kind", choices=["surveys", "reviews"])
+    parser.add_argument("rows", type=int)
+    parser.add_argument("path", help=".csv or .parquet file to write")
+    parser.add_argument("--seed", type=int)
+    parser.add_argument("--skew", type=float, default=SKEW, help="0 for uniform columns")
+    parser.add_argument("--pool-size", type=int, default=POOL_SIZE, help="distinct texts per free-text column")
+    parser.add_argument("--chunksize", type=int, default=CHUNK_SIZE)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    source = generator(args.kind, seed=args.seed, skew=args.skew, pool_size=args.pool_size)
+    rows = write_file(source, args.rows, args.path, args.chunksize)
+    seconds = time.perf_counter() - start
+    print(f"Wrote {rows} {args.kind} to {args.path} in {seconds:.1f} s ({rows / seconds * 60:,.0f} rows/minute)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,647 @@
+"""
+Tests of the logic/ modules, imported top-level as when run from this directory.
+
+    python -m unittest discover -s logic
+"""
+import json
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import types
+import unittest
+from unittest import mock
+
+import numpy as np
+import pandas as pd
+
+import analytics
+import chunked
+import fake_firecrawl
+import fake_places
+import form_parser
+import page_store
+import places_ingest
+import review_store
+import scrape
+import scrape_client
+import structured_output
+import synthetic_data
+import topic_model
+import tts
+
+
+def temp_dir(test):
+    """A directory removed when ``test`` ends."""
+    path = tempfile.mkdtemp()
+    test.addCleanup(shutil.rmtree, path, ignore_errors=True)
+    return path
+
+
+def serve(test, server):
+    """Shut ``server`` down when ``test`` ends; returns its base URL."""
+    test.addCleanup(server.server_close)
+    test.addCleanup(server.shutdown)
+    return f"http://127.0.0.1:{server.server_port}"
+
+
+def is_json(text):
+    try:
+        json.loads(text)
+    except ValueError:
+        return False
+    return True
+
+
+class FakeEngine:
+    def __init__(self):
+        self.saves = []
+
+    def setProperty(self, name, value):
+        pass
+
+    def save_to_file(self, text, path):
+        self.saves.append((text, path))
+
+    def runAndWait(self):
+        for text, path in self.saves:
+            with open(path, "wb") as f:
+                f.write(text.encode())
+        self.saves = []
+
+
+class FailingEngine(FakeEngine):
+    def runAndWait(self):
+        self.saves = []
+        raise RuntimeError("no voice")
+
+
+class TTSServiceTests(unittest.TestCase):
+    def service(self, init):
+        fake = types.SimpleNamespace(init=init)
+        with mock.patch.dict(sys.modules, {"pyttsx3": fake}):
+            service = tts.TTSService(cache_dir=temp_dir(self))
+            service.started.wait(5)
+        return service
+
+    def test_synthesize_returns_the_audio(self):
+        service = self.service(FakeEngine)
+        self.assertEqual(service.synthesize("hello"), b"hello")
+
+    def test_engine_failure_is_reported_without_waiting(self):
+        def init():
+            raise OSError("libespeak.so.1: cannot open shared object file")
+
+        service = self.service(init)
+        start = time.monotonic()
+        with self.assertRaises(tts.TTSUnavailable):
+            service.synthesize("hello")
+        with self.assertRaises(tts.TTSUnavailable):
+            service.say("hello")
+        with self.assertRaises(tts.TTSUnavailable):
+            service.prefetch(["hello"])
+        self.assertLess(time.monotonic() - start, 1)
+
+    def test_synthesis_failure_is_not_a_timeout(self):
+        service = self.service(FailingEngine)
+        with self.assertRaisesRegex(tts.TTSFailed, "no voice"):
+            service.synthesize("hello", timeout=5)
+
+    def test_timeout_returns_none(self):
+        release = threading.Event()
+        self.addCleanup(release.set)
+
+        class SlowEngine(FakeEngine):
+            def runAndWait(self):
+                release.wait(5)
+                super().runAndWait()
+
+        self.assertIsNone(self.service(SlowEngine).synthesize("hello", timeout=0.1))
+
+    def test_mime_type_follows_the_audio(self):
+        self.assertEqual(tts.mime_type(b"RIFF\x00\x00\x00\x00WAVE"), "audio/wav")
+        self.assertEqual(tts.mime_type(b"FORM\x00\x00\x00\x00AIFF"), "audio/aiff")
+
+
+class FirecrawlClientTests(unittest.IsolatedAsyncioTestCase):
+    def start_server(self, **options):
+        server = fake_firecrawl.start_server(**options)
+        return serve(self, server), server
+
+    async def test_backoff_does_not_hold_a_concurrency_slot(self):
+        base_url, server = self.start_server(rate_limit_first=1, retry_after=1)
+        urls = ["https://www.calgary.ca/parks.html", "https://www.calgary.ca/pathways.html"]
+        async with scrape_client.FirecrawlClient(base_url=base_url, max_concurrency=1) as client:
+            pages = await client.scrape_many(urls)
+        self.assertTrue(all(isinstance(page, dict) for page in pages.values()))
+        # The other page is scraped while the rate-limited one waits out Retry-After
+        (limited, status), *rest = server.log
+        self.assertEqual(status, 429)
+        self.assertEqual([status for _, status in rest], [200, 200])
+        self.assertEqual(rest[-1][0], limited)
+
+    async def test_concurrency_stays_within_the_limits(self):
+        base_url, server = self.start_server(latency=0.05)
+        urls = [f"https://{host}/page{n}" for host in ("www.calgary.ca", "engage.calgary.ca") for n in range(6)]
+        async with scrape_client.FirecrawlClient(base_url=base_url, max_concurrency=3, per_host_limit=2) as client:
+            pages = await client.scrape_many(urls)
+        self.assertEqual(len(pages), 12)
+        self.assertEqual(server.max_in_flight, 3)
+        self.assertEqual(server.max_in_flight_per_host, 2)
+
+    async def test_rate_limited_page_is_retried_until_it_succeeds(self):
+        base_url, server = self.start_server(rate_limit_first=2, retry_after=0)
+        async with scrape_client.FirecrawlClient(base_url=base_url) as client:
+            page = await client.scrape("https://www.calgary.ca/parks.html")
+        self.assertIn("markdown", page)
+        self.assertEqual([status for _, status in server.log], [429, 429, 200])
+
+
+class SharedClientTests(unittest.TestCase):
+    def setUp(self):
+        patcher = mock.patch.dict(scrape_client._clients, clear=True)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def clients(self, *api_keys):
+        clients = [scrape_client.get_client(api_key) for api_key in api_keys]
+        for client in set(clients):
+            self.addCleanup(scrape_client.run, client.close())
+        return clients
+
+    def test_each_key_keeps_its_client(self):
+        first, second, again = self.clients("key-a", "key-b", "key-a")
+        self.assertIsNot(first, second)
+        self.assertIs(first, again)
+        # A client another thread may be using is not closed by the new key
+        self.assertFalse(first.session.is_closed)
+
+
+class PageStoreTests(unittest.IsolatedAsyncioTestCase):
+    async def test_missing_snapshot_is_scraped_again(self):
+        server = fake_firecrawl.start_server()
+        base_url = serve(self, server)
+        store_dir = temp_dir(self)
+        url = f"{base_url}/parks.html"
+        async with scrape_client.FirecrawlClient(base_url=base_url) as client:
+            first = await page_store.afetch_page(client, url, store_dir)
+            os.remove(os.path.join(page_store.page_dir(url, store_dir), f"{first['content_hash']}.json.gz"))
+            again = await page_store.afetch_page(client, url, store_dir)
+        self.assertEqual(server.requests, 2)
+        self.assertEqual(again["data"], first["data"])
+        self.assertFalse(again["changed"])
+        # The snapshot is back, so the next fetch is served from the store
+        self.assertEqual(page_store.load_snapshot(url, first["content_hash"], store_dir), first["data"])
+
+
+class CachedExtractionTests(unittest.TestCase):
+    def setUp(self):
+        self.store_dir = temp_dir(self)
+        url = "https://www.calgary.ca/parks.html"
+        page_store.save_meta({"url": page_store.normalize_url(url), "versions": [], "extractions": {}}, self.store_dir)
+        self.page = {"url": url, "data": {"markdown": "# Parks"}, "content_hash": "abc"}
+
+    def extract(self, answers):
+        calls = []
+
+        def extract(data):
+            calls.append(data)
+            return answers[len(calls) - 1]
+        return extract, calls
+
+    def test_result_is_reused_while_the_page_is_unchanged(self):
+        extract, calls = self.extract(['["Parks"]'])
+        for _ in range(2):
+            self.assertEqual(page_store.cached_extraction(self.page, "ask", extract, self.store_dir), '["Parks"]')
+        self.assertEqual(len(calls), 1)
+
+    def test_rejected_result_is_not_cached(self):
+        extract, calls = self.extract(['["Parks"', '["Parks"]', "unused"])
+        for expected in ('["Parks"', '["Parks"]', '["Parks"]'):
+            result = page_store.cached_extraction(self.page, "ask", extract, self.store_dir, validate=is_json)
+            self.assertEqual(result, expected)
+        self.assertEqual(len(calls), 2)
+
+
+class PlacesIngestTests(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.server = fake_places.start_server(n_places=3)
+        self.base_url = serve(self, self.server)
+        self.store_dir = temp_dir(self)
+        self.place_ids = [place_id for place_id, _ in self.server.places]
+
+    async def ingest(self, checkpoint_path):
+        async with places_ingest.PlacesClient("key", base_url=self.base_url, rate=100) as client:
+            return await places_ingest.ingest_places(
+                client, self.place_ids, places_ingest.load_checkpoint(checkpoint_path), checkpoint_path, self.store_dir
+            )
+
+    async def test_only_new_reviews_are_added(self):
+        checkpoint_path = os.path.join(self.store_dir, "checkpoint.json")
+        self.assertEqual(await self.ingest(checkpoint_path), dict.fromkeys(self.place_ids, 5))
+        fake_places.add_reviews(self.server, 2)
+        self.assertEqual(await self.ingest(checkpoint_path), dict.fromkeys(self.place_ids, 2))
+        self.assertEqual(len(review_store.load_reviews(self.store_dir)), 21)
+
+    async def test_rerun_without_a_checkpoint_does_not_duplicate_reviews(self):
+        # As after a crash between the store append and the checkpoint save
+        await self.ingest(os.path.join(self.store_dir, "checkpoint.json"))
+        self.assertEqual(await self.ingest(os.path.join(self.store_dir, "lost.json")), dict.fromkeys(self.place_ids, 0))
+        self.assertEqual(len(review_store.load_reviews(self.store_dir)), 15)
+        self.assertEqual(review_store.read_rollups(self.store_dir)["Reviews"].sum(), 15)
+
+    def test_reviews_are_keyed_on_place_author_and_time(self):
+        review = {"author_name": "Sam", "rating": 5, "text": "Lovely park", "time": 1700000000}
+        rows = places_ingest.review_rows("place-a", "Central Park", [review])
+        self.assertEqual(review_store.append_reviews(rows, self.store_dir), 1)
+        # Another place with the same name, and the same review edited later on
+        same_name = places_ingest.review_rows("place-b", "Central Park", [review])
+        edited = places_ingest.review_rows("place-a", "Central Park", [dict(review, text="Lovely park!")])
+        self.assertEqual(review_store.append_reviews(same_name, self.store_dir), 1)
+        self.assertEqual(review_store.append_reviews(edited, self.store_dir), 0)
+        stored = review_store.load_reviews(self.store_dir)
+        self.assertEqual(sorted(stored["Place ID"]), ["place-a", "place-b"])
+        self.assertEqual(list(stored["Review Time"]), [1700000000] * 2)
+
+    def test_review_without_a_time_is_undated(self):
+        rows = places_ingest.review_rows("place-a", "Central Park", [{"author_name": "Sam", "rating": 4, "text": "Nice"}])
+        self.assertEqual(review_store.append_reviews(rows, self.store_dir), 1)
+        self.assertEqual(review_store.list_months(self.store_dir), [review_store.UNDATED])
+        self.assertEqual(review_store.append_reviews(rows, self.store_dir), 0)
+
+
+def reviews(*rows):
+    """Scored reviews from (park, author, text, date) tuples, rated 4 with sentiment 0.5."""
+    df = pd.DataFrame(rows, columns=["Park Name", "Author", "Text", "Date"])
+    return df.assign(Rating=4, Sentiment=0.5, **{"Sentiment Category": "Positive"})
+
+
+class ReviewStoreTests(unittest.TestCase):
+    def setUp(self):
+        self.store_dir = temp_dir(self)
+
+    def test_reviews_are_partitioned_by_month(self):
+        added = review_store.append_reviews(reviews(
+            ("Nose Hill", "Sam", "Windy", "2024-01-31T23:00Z"),
+            ("Nose Hill", "Ana", "Great views", "2024-02-01T08:00Z"),
+            ("Bowness", "Sam", "Busy", None),
+        ), self.store_dir)
+        self.assertEqual(added, 3)
+        self.assertEqual(review_store.list_months(self.store_dir), ["2024-01", "2024-02", review_store.UNDATED])
+        self.assertEqual(list(review_store.load_reviews(self.store_dir, start="2024-02")["Author"]), ["Ana"])
+        self.assertEqual(len(review_store.load_reviews(self.store_dir)), 3)
+
+    def test_undated_reviews_are_left_out_of_the_rollups(self):
+        review_store.append_reviews(reviews(
+            ("Bowness", "Sam", "Busy", None), ("Bowness", "Ana", "Quiet", "2024-03-05"),
+        ), self.store_dir)
+        undated = pd.read_csv(review_store.partition_path(review_store.UNDATED, self.store_dir))
+        self.assertEqual(list(undated["Author"]), ["Sam"])
+        rollups = review_store.read_rollups(self.store_dir)
+        self.assertEqual(rollups[["Park Name", "Month", "Reviews"]].values.tolist(), [["Bowness", "2024-03", 1]])
+
+    def test_store_mtime_changes_with_every_append(self):
+        self.assertIsNone(review_store.store_mtime(self.store_dir))
+        review_store.append_reviews(reviews(("Bowness", "Sam", "Busy", "2024-02-11")), self.store_dir)
+        first = review_store.store_mtime(self.store_dir)
+        time.sleep(0.05)
+        review_store.append_reviews(reviews(("Bowness", "Ana", "Quiet", "2024-02-12")), self.store_dir)
+        self.assertGreater(review_store.store_mtime(self.store_dir), first)
+
+    def test_repeated_imports_keep_the_rollups_consistent(self):
+        csv_path = os.path.join(self.store_dir, "reviews.csv")
+        reviews(
+            ("Nose Hill", "Sam", "Windy", "2024-01-02"), ("Nose Hill", "Ana", "Great views", "2024-01-20"),
+            ("Bowness", "Sam", "Busy", "2024-02-11"), ("Bowness", "Lee", "Busy", None),
+            ("Bowness", "Sam", "Busy", "2024-02-11"),
+        ).to_csv(csv_path, index=False)
+        self.assertEqual(review_store.import_csv(csv_path, self.store_dir, chunksize=2), 4)
+        self.assertEqual(review_store.import_csv(csv_path, self.store_dir, chunksize=3), 0)
+        rollups = review_store.read_rollups(self.store_dir)
+        self.assertEqual(rollups["Reviews"].tolist(), [1, 2])
+        self.assertEqual(rollups["Rating Sum"].tolist(), [4, 8])
+        pd.testing.assert_frame_equal(rollups, review_store.rebuild_rollups(self.store_dir), check_dtype=False)
+
+
+NAME_SCHEMA = {"type": "OBJECT", "properties": {"name": {"type": "STRING"}}, "required": ["name"]}
+
+
+def fake_ask_stream(answers):
+    """Streaming model call answering with ``answers`` in turn, in chunks of 7 characters."""
+    answers = iter(answers)
+
+    def ask_stream(context, instruction, response_schema=None):
+        answer = next(answers)
+        return [answer[i:i + 7] for i in range(0, len(answer), 7)]
+    return ask_stream
+
+
+class ExtractListTests(unittest.TestCase):
+    def extract(self, answers, **options):
+        return structured_output.extract_list("page", "names", NAME_SCHEMA, ask_stream=fake_ask_stream(answers), **options)
+
+    def test_repairs_are_matched_by_index(self):
+        answers = [
+            '[{"name": "a"}, {"nom": "b"}, {"name": "c"}, {"nom": "d"}]',
+            # The model fixes only the last item
+            '[{"index": 3, "item": {"name": "d"}}]',
+        ]
+        self.assertEqual(self.extract(answers), [{"name": "a"}, {"name": "c"}, {"name": "d"}])
+
+    def test_repaired_items_are_reported_after_the_streamed_ones(self):
+        answers = ['[{"name": "a"}, {"nom": "b"}, {"name": "c"}]', '[{"index": 1, "item": {"name": "b"}}]']
+        seen = []
+        self.assertEqual(self.extract(answers, on_item=seen.append), [{"name": "a"}, {"name": "b"}, {"name": "c"}])
+        self.assertEqual(seen, [{"name": "a"}, {"name": "c"}, {"name": "b"}])
+
+    def test_cut_off_list_is_continued(self):
+        answers = ['[{"name": "a"}, {"name": "b"}, {"na', '[{"name": "c"}]']
+        self.assertEqual([item["name"] for item in self.extract(answers, strict=True)], ["a", "b", "c"])
+
+    def test_strict_extraction_raises_with_the_partial_list(self):
+        answers = ['[{"name": "a"}, {"nom": "b"}]', '[]']
+        with self.assertRaises(structured_output.IncompleteExtraction) as raised:
+            self.extract(answers, strict=True)
+        self.assertEqual(raised.exception.items, [{"name": "a"}])
+
+
+class AnalyticsTests(unittest.TestCase):
+    """The SQL aggregations against the same computation in pandas."""
+
+    def setUp(self):
+        ages, genders, frequencies = ["18-24", "25-34", "35-44"], ["Female", "Male"], ["Daily", "Weekly", "Monthly"]
+        rows = [
+            {
+                "age_group": ages[i % 3], "gender": genders[i % 2], "visit_frequency": frequencies[i % 5 % 3],
+                "parks_visited": f"{i % 4}", "neighborhood": ["Bowness\n", " Varsity", ""][i % 3],
+                "accessibility": "Good\n", "improvements": "More trees\n", "event_experience": "Fun\n" if i % 4 else "",
+                "concerns": " Litter" if i % 6 else "", "comments": f"Comment {i % 2}\n",
+                "cleanliness_rating": "" if i % 7 == 0 else i % 5 + 1, "safety_rating": "n/a" if i % 11 == 0 else i % 3 + 3,
+            }
+            for i in range(60)
+        ]
+        path = os.path.join(temp_dir(self), "form_responses.csv")
+        pd.DataFrame(rows).to_csv(path, index=False)
+        self.table = analytics.survey_table(path)
+        # dashboard_surveys' cleaning, in pandas
+        df = pd.read_csv(path)
+        for col in analytics.SURVEY_TEXT_COLUMNS:
+            df[col] = df[col].str.strip()
+        for col in analytics.SURVEY_NUMERIC_COLUMNS:
+            df[col] = pd.to_numeric(df[col], errors="coerce")
+        self.df = df
+        self.filters = {"gender": "Female", "age_group": ["18-24", "35-44"]}
+        self.filtered = df[(df["gender"] == "Female") & df["age_group"].isin(["18-24", "35-44"])]
+
+    def test_counts_match_pandas(self):
+        self.assertEqual(analytics.count(self.table), len(self.df))
+        self.assertEqual(analytics.count(self.table, self.filters), len(self.filtered))
+        parks = analytics.nunique(self.table, "parks_visited", self.filters)
+        self.assertEqual(parks, self.filtered["parks_visited"].nunique())
+        neighborhoods = analytics.distinct(self.table, "neighborhood")
+        self.assertEqual(neighborhoods, sorted(self.df["neighborhood"].dropna().unique()))
+        counts = analytics.value_counts(self.table, "visit_frequency", self.filters)
+        expected = self.filtered["visit_frequency"].value_counts()
+        self.assertEqual(dict(zip(counts["visit_frequency"], counts["count"])), expected.to_dict())
+        self.assertEqual(analytics.count(self.table, {"gender": []}), 0)
+
+    def test_means_match_pandas(self):
+        means = analytics.means(self.table, analytics.SURVEY_NUMERIC_COLUMNS, self.filters)
+        for col in analytics.SURVEY_NUMERIC_COLUMNS:
+            self.assertAlmostEqual(means[col], self.filtered[col].mean())
+        by_age = analytics.group_mean(self.table, "age_group", "cleanliness_rating")
+        expected = self.df.groupby("age_group")["cleanliness_rating"].mean()
+        pd.testing.assert_series_equal(
+            by_age.set_index("age_group")["cleanliness_rating"], expected, check_names=False, check_index_type=False
+        )
+
+    def test_crosstabs_match_pandas(self):
+        for normalize in (False, True):
+            table = analytics.crosstab(self.table, "age_group", "visit_frequency", self.filters, normalize=normalize)
+            expected = pd.crosstab(
+                self.filtered["age_group"], self.filtered["visit_frequency"], normalize="index" if normalize else False
+            )
+            pd.testing.assert_frame_equal(table, expected, check_dtype=False, check_index_type=False,
+                                          check_column_type=False)
+
+    def test_review_months_are_a_column(self):
+        store_dir = temp_dir(self)
+        review_store.append_reviews(reviews(
+            ("Nose Hill", "Sam", "Windy", "2024-01-02"), ("Bowness", "Ana", "Busy", "2024-02-11"),
+            ("Bowness", "Lee", "Busy", "2024-02-12"), ("Bowness", "Kim", "Quiet", None),
+        ), store_dir)
+        table = analytics.reviews_table(store_dir)
+        counts = analytics.value_counts(table, "month")
+        months = dict(zip(counts["month"], counts["count"]))
+        self.assertEqual(months, {"2024-02": 2, "2024-01": 1, review_store.UNDATED: 1})
+        self.assertEqual(analytics.count(table, {"month": "2024-02", "Park Name": "Bowness"}), 2)
+        self.assertIsNone(analytics.reviews_table(temp_dir(self)))
+
+
+class TopicModelTests(unittest.TestCase):
+    def setUp(self):
+        self.model_dir = temp_dir(self)
+        dogs = ["Dogs run off leash here", "Great off leash area for dogs", "Keep dogs on leash please",
+                "Dogs love the leash free field"]
+        kids = ["Kids love the playground swings", "Playground slides for kids", "Swings and slides at the playground",
+                "Kids playground is busy"]
+        self.df = pd.DataFrame({"Park Name": ["Nose Hill"] * 4 + ["Bowness"] * 4, "Text": dogs + kids})
+        self.model = topic_model.fit_topic_model(self.df["Text"], n_topics=2)
+
+    def test_row_keys_ignore_surrounding_whitespace_and_the_index(self):
+        keys = topic_model.row_keys(self.df, ["Text"])
+        self.assertEqual(keys.nunique(), 8)
+        padded = self.df.assign(Text=" " + self.df["Text"] + "\n").set_axis(range(10, 18))
+        self.assertEqual(list(topic_model.row_keys(padded, ["Text"])), list(keys))
+
+    def test_rows_are_assigned_by_theme(self):
+        self.assertEqual(topic_model.assign_new_rows(self.df, "reviews", self.model, self.model_dir), 8)
+        topics = topic_model.attach_topics(self.df, "reviews", self.model_dir)["Topic"]
+        self.assertEqual(topics[:4].nunique(), 1)
+        self.assertEqual(topics[4:].nunique(), 1)
+        self.assertNotEqual(topics[0], topics[4])
+
+    def test_only_new_rows_are_assigned(self):
+        self.assertEqual(topic_model.assign_new_rows(self.df[:6], "reviews", self.model, self.model_dir), 6)
+        self.assertTrue(topic_model.attach_topics(self.df, "reviews", self.model_dir)["Topic"][6:].isna().all())
+        # The repeated row and the rows assigned before are not predicted again
+        grown = pd.concat([self.df, self.df[:1]], ignore_index=True)
+        self.assertEqual(topic_model.assign_new_rows(grown, "reviews", self.model, self.model_dir), 2)
+        self.assertEqual(len(topic_model.load_assignments("reviews", self.model_dir)), 8)
+        self.assertTrue(topic_model.attach_topics(grown, "reviews", self.model_dir)["Topic"].notna().all())
+
+
+def choice(label, other=False):
+    return [label, None, None, None, 1 if other else 0]
+
+
+# FB_PUBLIC_LOAD_DATA_ items: [item_id, title, description, type_code, entries]
+FORM_ITEMS = [
+    [1, "Your name", None, 0, [[11, None, 0]]],
+    [2, "Comments", None, 1, [[12, None, 0]]],
+    [3, "Favourite park", None, 2, [[13, [choice("Nose Hill"), choice("", other=True)], 1]]],
+    [4, "Neighbourhood", None, 3, [[14, [choice("Bowness"), choice("Varsity")], 0]]],
+    [5, "Activities", None, 4, [[15, [choice("Walking"), choice("Cycling")], 0]]],
+    [6, "Overall rating", None, 5, [[16, [choice("1"), choice("2"), choice("3")], 0, ["Poor", "Great"]]]],
+    [7, "About your visit", None, 8, None],
+    [8, "Rate the park", None, 7, [
+        [17, [choice("Good"), choice("Bad")], 0, ["Cleanliness"]],
+        [18, [choice("Good"), choice("Bad")], 0, ["Safety"]],
+    ]],
+    [9, "Amenities used", None, 7, [[19, [choice("Yes")], 0, ["Toilets"], None, None, None, None, None, None, None, [1]]]],
+    [10, "Visit date", None, 9, [[20, None, 0]]],
+    [11, "Visit time", None, 10, [[21, None, 0]]],
+    [12, "Photo", None, 13, [[22, None, 0]]],
+]
+UNKNOWN_ITEM = [13, "Signature", None, 99, [[23, None, 0]]]
+
+
+def form_page(items, title="Park survey"):
+    """Firecrawl page data of a Google Form with these items."""
+    load_data = [None, [None, items, None, None, None, None, None, None, title], "/forms", title]
+    html = (
+        f"<html><head><script>var FB_PUBLIC_LOAD_DATA_ = {json.dumps(load_data)};</script></head>"
+        f"<body><h1>{title}</h1></body></html>"
+    )
+    return {"html": html, "metadata": {"title": title}}
+
+
+class FormParserTests(unittest.TestCase):
+    def test_every_question_type_is_parsed(self):
+        questions = form_parser.questions_from_page(form_page(FORM_ITEMS))
+        self.assertEqual([(question["question"], question["question type"]) for question in questions], [
+            ("Your name", "Short Answer"), ("Comments", "Paragraph"), ("Favourite park", "Multiple Choice"),
+            ("Neighbourhood", "Dropdown"), ("Activities", "Checkboxes"), ("Overall rating", "Linear Scale"),
+            ("Rate the park", "Multiple Choice Grid"), ("Amenities used", "Checkbox Grid"), ("Visit date", "Date"),
+            ("Visit time", "Time"), ("Photo", "File Upload"),
+        ])
+        self.assertEqual(questions[2]["answer"], ["Nose Hill", "Other:"])
+        self.assertEqual(questions[5]["answer"], ["1", "2", "3"])
+        self.assertEqual(questions[6]["answer"], ["Good", "Bad"])
+        self.assertEqual(questions[6]["rows"], ["Cleanliness", "Safety"])
+        self.assertEqual(questions[7]["rows"], ["Toilets"])
+        self.assertEqual(questions[0]["answer"], [])
+
+    def test_unknown_item_type_is_not_parsed(self):
+        with self.assertRaises(ValueError):
+            form_parser.parse_questions(form_parser.find_load_data(form_page([UNKNOWN_ITEM])["html"]))
+        self.assertIsNone(form_parser.questions_from_page(form_page(FORM_ITEMS + [UNKNOWN_ITEM])))
+
+    def test_form_is_reduced_to_its_skeleton(self):
+        reduced = form_parser.reduce_page(form_page(FORM_ITEMS + [UNKNOWN_ITEM]))
+        title, *lines = reduced.split("\n")
+        self.assertEqual(title, "Google Form: Park survey")
+        self.assertNotIn("FB_PUBLIC_LOAD_DATA_", reduced)
+        skeleton = [json.loads(line) for line in lines]
+        self.assertEqual(len(skeleton), 12)
+        self.assertEqual(skeleton[5]["labels"], ["Poor", "Great"])
+        self.assertEqual(skeleton[6]["rows"], ["Cleanliness", "Safety"])
+        self.assertEqual(skeleton[-1], {"title": "Signature", "type": "type 99", "options": []})
+
+    def test_other_pages_are_reduced_to_their_visible_text(self):
+        page = {"html": "<html><head><style>p {}</style></head><body><p>Park survey</p><script>x()</script>"
+                        "<label>Your name</label><label>Your name</label></body></html>"}
+        self.assertEqual(form_parser.reduce_page(page), "Park survey\nYour name")
+
+    def test_unknown_item_type_falls_back_to_gemini(self):
+        data = form_page(FORM_ITEMS[:1] + [UNKNOWN_ITEM])
+        contexts = []
+
+        def ask_stream(context, instruction, response_schema=None):
+            contexts.append(context)
+            return ['[{"question": "Your name", "question type": "Short Answer", "answer": []}, ',
+                    '{"question": "Signature", "question type": "Short Answer", "answer": []}]']
+
+        with mock.patch.object(scrape.page_store, "fetch_page", return_value={"data": data}), \
+                mock.patch.object(scrape.page_store, "cached_extraction",
+                                  lambda page, task, extract, validate=None: extract(page["data"])), \
+                mock.patch.object(scrape.utils, "read_prompt_file", return_value="List the questions"), \
+                mock.patch.object(structured_output.my_gemini, "ask_stream", ask_stream):
+            questions = scrape.get_list_of_questions("https://docs.google.com/forms/d/e/parks/viewform")
+        self.assertEqual([question["question"] for question in questions], ["Your name", "Signature"])
+        # Gemini reads the skeleton, not the page
+        self.assertTrue(contexts[0].startswith("Google Form: Park survey"))
+        self.assertIn('"type": "type 99"', contexts[0])
+
+
+class ChunkedSurveyTests(unittest.TestCase):
+    def setUp(self):
+        # The second chunk of 50 has no neighborhood or comments at all
+        rows = [
+            {
+                "visit_frequency": "Weekly", "parks_visited": "1-2", "age_group": "25-34", "gender": "Female",
+                "neighborhood": "" if 50 <= i < 100 else " Bowness\n", "comments": "" if 50 <= i < 100 else "More trees\n",
+                "cleanliness_rating": i % 5 + 1, "safety_rating": 4,
+            }
+            for i in range(120)
+        ]
+        self.path = os.path.join(temp_dir(self), "form_responses.csv")
+        pd.DataFrame(rows).to_csv(self.path, index=False)
+
+    def test_summary_with_an_all_empty_text_column_in_a_chunk(self):
+        summary = chunked.summarize_surveys(self.path, chunksize=50)
+        self.assertEqual(summary.value_counts("neighborhood").to_dict(), {"Bowness": 70})
+
+    def test_conversion_with_an_all_empty_text_column_in_a_chunk(self):
+        output_path = self.path.replace(".csv", ".parquet")
+        self.assertEqual(chunked.convert_file(self.path, output_path, chunked.clean_survey_chunk, chunksize=50), 120)
+        comments = pd.read_parquet(output_path)["comments"]
+        self.assertEqual(comments.count(), 70)
+        self.assertEqual(set(comments.dropna()), {"More trees"})
+
+
+class ChunkSource:
+    """Stands in for a generator: each chunk's categoricals have their own categories."""
+
+    def __init__(self):
+        self.chunks = 0
+
+    def sample(self, n):
+        self.chunks += 1
+        parks = pd.Categorical([f"Park {self.chunks}"] * n)
+        return pd.DataFrame({"Park Name": parks, "Rating": range(n)})
+
+
+class SyntheticDataTests(unittest.TestCase):
+    def test_markov_text_follows_the_training_transitions(self):
+        chain = synthetic_data.MarkovText(["the park is green", "the park is busy", "", None])
+        texts = chain.generate(200, np.random.default_rng(1))
+        self.assertEqual(set(texts), {"the park is green", "the park is busy"})
+        self.assertEqual(set(chain.generate(5, np.random.default_rng(1), max_words=2)), {"the park"})
+
+    def test_markov_text_loops_until_an_end(self):
+        chain = synthetic_data.MarkovText(["go round go round"])
+        for text in chain.generate(50, np.random.default_rng(2), max_words=9):
+            words = text.split()
+            self.assertEqual(words[::2], ["go"] * len(words[::2]))
+            self.assertEqual(words[1::2], ["round"] * len(words[1::2]))
+
+    def test_markov_text_needs_a_text(self):
+        with self.assertRaises(ValueError):
+            synthetic_data.MarkovText(["", "  ", None])
+
+    def test_chunks_with_different_categories_share_one_file_schema(self):
+        directory = temp_dir(self)
+        for extension in ("parquet", "csv"):
+            path = os.path.join(directory, f"reviews.{extension}")
+            self.assertEqual(synthetic_data.write_file(ChunkSource(), 7, path, chunksize=3), 7)
+            df = pd.read_parquet(path) if extension == "parquet" else pd.read_csv(path)
+            self.assertEqual(list(df["Park Name"].astype(str)), ["Park 1"] * 3 + ["Park 2"] * 3 + ["Park 3"])
+            self.assertEqual(list(df["Rating"]), [0, 1, 2, 0, 1, 2, 0])
+        self.assertFalse(os.path.exists(os.path.join(directory, "reviews.csv.tmp")))
+
+    def test_unsupported_file_type(self):
+        with self.assertRaises(ValueError):
+            synthetic_data.write_file(ChunkSource(), 1, os.path.join(temp_dir(self), "reviews.json"))
+
+    def test_generated_surveys_use_the_form_options(self):
+        sample = synthetic_data.SurveyGenerator(seed=3, pool_size=20).sample(50)
+        self.assertEqual(list(sample.columns), synthetic_data.SURVEY_COLUMNS)
+        for column, options in synthetic_data.SURVEY_CHOICES.items():
+            self.assertTrue(set(sample[column].astype(str)) <= set(options), column)
+
+
+if __name__ == "__main__":
+    unittest.main()
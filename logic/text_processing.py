@@ -0,0 +1,74 @@
+import re
+from collections import Counter
+from itertools import chain
+import pandas as pd
+
+# Lowercase alphabetic runs; punctuation and digits act as separators, so
+# "park," and "park." both count as "park".
+TOKEN_RE = re.compile(r"[a-z]+")
+
+STOPWORDS = frozenset([
+    "the", "a", "and", "is", "in", "to", "of", "for", "with", "on", "at", "from", "by", "an",
+    "this", "that", "are", "was", "were", "be", "been", "being", "have", "has", "had", "do",
+    "does", "did", "i", "you", "he", "she", "it", "we", "they", "me", "him", "her", "us", "them",
+])
+
+MIN_WORD_LENGTH = 4
+
+
+def tokenize(text, stopwords=STOPWORDS, min_length=MIN_WORD_LENGTH):
+    """Split a single text into lowercase word tokens, dropping stopwords and short words."""
+    return [
+        token for token in TOKEN_RE.findall(str(text).lower())
+        if len(token) >= min_length and token not in stopwords
+    ]
+
+
+def tokenize_series(texts, stopwords=STOPWORDS, min_length=MIN_WORD_LENGTH):
+    """
+    Tokenize every text in a series.
+
+    Args:
+        texts (pd.Series): Free-text column
+        stopwords (frozenset): Words to drop
+        min_length (int): Minimum token length to keep
+
+    Returns:
+        pd.Series: A list of tokens per row, aligned with ``texts``
+    """
+    return texts.astype(str).map(lambda text: tokenize(text, stopwords, min_length))
+
+
+def bigrams(tokens):
+    """Adjacent token pairs of one document, joined with a space."""
+    return [f"{first} {second}" for first, second in zip(tokens, tokens[1:])]
+
+
+def word_frequencies(token_lists):
+    """Counter of token frequencies over an iterable of token lists."""
+    return Counter(chain.from_iterable(token_lists))
+
+
+def bigram_frequencies(token_lists):
+    """Counter of bigram frequencies over an iterable of token lists."""
+    return Counter(chain.from_iterable(bigrams(tokens) for tokens in token_lists))
+
+
+def top_words(token_lists, n=10):
+    """
+    Most frequent tokens as a Series indexed by word, highest count first.
+
+    Args:
+        token_lists (iterable): Token lists, e.g. the output of tokenize_series
+        n (int): Number of words to return
+
+    Returns:
+        pd.Series: Counts indexed by word
+    """
+    return pd.Series(dict(word_frequencies(token_lists).most_common(n)), dtype="int64")
+
+
+def top_bigrams(token_lists, n=10):
+    """Most frequent bigrams as a Series indexed by "word1 word2"."""
+    return pd.Series(dict(bigram_frequencies(token_lists).most_common(n)), dtype="int64")
+
@@ -0,0 +1,238 @@
+import os
+import sys
+import joblib
+import pandas as pd
+import review_store
+import text_processing
+
+# Fitted models and per-row topic assignments live here, one pair per corpus.
+MODEL_DIR = "models"
+
+# Free-text columns modelled for each corpus and the columns the dashboards
+# break topic distributions down by. A corpus with a "load" function is read
+# from its store, and from the CSV only while the store is empty.
+CORPORA = {
+    "surveys": {
+        "csv": "form_responses.csv",
+        "text_columns": ["improvements", "concerns", "comments"],
+        "group_columns": ["parks_visited", "age_group", "gender"],
+    },
+    "reviews": {
+        "csv": "park_reviews.csv",
+        "load": review_store.load_reviews,
+        "text_columns": ["Text"],
+        "group_columns": ["Park Name"],
+    },
+}
+
+
+def model_path(corpus, model_dir=MODEL_DIR):
+    return os.path.join(model_dir, f"topics_{corpus}.joblib")
+
+
+def assignments_path(corpus, model_dir=MODEL_DIR):
+    return os.path.join(model_dir, f"topics_{corpus}_assignments.csv")
+
+
+def combine_text(df, text_columns):
+    """Join the free-text columns of each row into a single document."""
+    return df[text_columns].fillna("").astype(str).agg(" ".join, axis=1)
+
+
+def row_keys(df, text_columns):
+    """Stable per-row hash of the text, used to tell already-assigned rows from new ones."""
+    # Strip so raw CSV rows and the dashboards' cleaned rows hash the same.
+    text = df[text_columns].fillna("").astype(str).apply(lambda col: col.str.strip())
+    return pd.util.hash_pandas_object(text, index=False).astype("uint64")
+
+
+def fit_topic_model(texts, n_topics=8, method="nmf", minibatch=False, random_state=42):
+    """
+    Fit a TF-IDF + NMF/KMeans topic model on a series of documents.
+
+    Args:
+        texts (pd.Series): Documents to fit on
+        n_topics (int): Number of topics (NMF components or KMeans clusters)
+        method (str): "nmf" or "kmeans"
+        minibatch (bool): Use MiniBatchKMeans, for large corpora (kmeans only)
+        random_state (int): Seed for reproducible fits
+
+    Returns:
+        dict: Fitted vectorizer, model, method and the top terms of each topic
+    """
+    # scikit-learn is imported here so the dashboards, which only read saved
+    # assignments and labels, do not pay for it at startup.
+    from sklearn.feature_extraction.text import TfidfVectorizer
+    from sklearn.decomposition import NMF
+    from sklearn.cluster import KMeans, MiniBatchKMeans
+
+    # Reuse the shared tokenizer so topics use the same vocabulary as the
+    # word clouds and top-word charts.
+    vectorizer = TfidfVectorizer(analyzer=text_processing.tokenize, min_df=2, max_df=0.9)
+    matrix = vectorizer.fit_transform(texts.astype(str))
+
+    if method == "nmf":
+        model = NMF(n_components=n_topics, init="nndsvda", random_state=random_state, max_iter=400)
+        model.fit(matrix)
+        weights = model.components_
+    elif method == "kmeans":
+        cls = MiniBatchKMeans if minibatch else KMeans
+        model = cls(n_clusters=n_topics, random_state=random_state, n_init=3)
+        model.fit(matrix)
+        weights = model.cluster_centers_
+    else:
+        raise ValueError(f"Unknown topic model method: {method}")
+
+    terms = vectorizer.get_feature_names_out()
+    top_terms = [[terms[i] for i in row.argsort()[::-1][:8]] for row in weights]
+    return {"vectorizer": vectorizer, "model": model, "method": method, "top_terms": top_terms}
+
+
+def predict_topics(topic_model, texts):
+    """Assign each document to its dominant topic without refitting."""
+    matrix = topic_model["vectorizer"].transform(texts.astype(str))
+    if topic_model["method"] == "nmf":
+        return topic_model["model"].transform(matrix).argmax(axis=1)
+    return topic_model["model"].predict(matrix)
+
+
+def topic_labels(topic_model, n_terms=3):
+    """Short human-readable label per topic built from its top terms."""
+    return {i: ", ".join(terms[:n_terms]) for i, terms in enumerate(topic_model["top_terms"])}
+
+
+def save_topic_model(topic_model, corpus, model_dir=MODEL_DIR):
+    os.makedirs(model_dir, exist_ok=True)
+    joblib.dump(topic_model, model_path(corpus, model_dir))
+
+
+def load_topic_model(corpus, model_dir=MODEL_DIR):
+    """Load a persisted topic model, or None if it has not been fitted yet."""
+    path = model_path(corpus, model_dir)
+    if not os.path.exists(path):
+        return None
+    return joblib.load(path)
+
+
+def load_assignments(corpus, model_dir=MODEL_DIR):
+    path = assignments_path(corpus, model_dir)
+    if not os.path.exists(path):
+        return pd.DataFrame({"key": pd.Series(dtype="uint64"), "topic": pd.Series(dtype="int64")})
+    return pd.read_csv(path, dtype={"key": "uint64", "topic": "int64"})
+
+
+def assign_new_rows(df, corpus, topic_model=None, model_dir=MODEL_DIR):
+    """
+    Assign topics to rows that do not have one yet and persist them.
+
+    Rows are identified by a hash of their text, so appending new responses or
+    reviews only runs inference on the new rows.
+
+    Args:
+        df (pd.DataFrame): Full corpus frame
+        corpus (str): Key into CORPORA
+        topic_model (dict, optional): Already loaded model
+        model_dir (str): Directory holding models and assignments
+
+    Returns:
+        int: Number of newly assigned rows
+    """
+    topic_model = topic_model or load_topic_model(corpus, model_dir)
+    if topic_model is None:
+        raise FileNotFoundError(f"No topic model fitted for '{corpus}' in {model_dir}")
+
+    text_columns = CORPORA[corpus]["text_columns"]
+    keys = row_keys(df, text_columns)
+    known = load_assignments(corpus, model_dir)
+    new_mask = ~keys.isin(known["key"]) & ~keys.duplicated()
+    if not new_mask.any():
+        return 0
+
+    new_rows = df[new_mask.values]
+    topics = predict_topics(topic_model, combine_text(new_rows, text_columns))
+    new_assignments = pd.DataFrame({"key": keys[new_mask].values, "topic": topics})
+
+    os.makedirs(model_dir, exist_ok=True)
+    path = assignments_path(corpus, model_dir)
+    new_assignments.to_csv(path, mode="a", header=not os.path.exists(path), index=False)
+    return len(new_assignments)
+
+
+def attach_topics(df, corpus, model_dir=MODEL_DIR):
+    """
+    Add a "Topic" column from the stored assignments (no model inference).
+
+    Rows that have not been assigned yet get a missing topic.
+    """
+    known = load_assignments(corpus, model_dir)
+    lookup = pd.Series(known["topic"].values, index=known["key"].values)
+    lookup = lookup[~lookup.index.duplicated(keep="last")]
+    df = df.copy()
+    df["Topic"] = row_keys(df, CORPORA[corpus]["text_columns"]).map(lookup).values
+    return df
+
+
+def topic_distribution(df, group_column, labels=None):
+    """
+    Share of each topic within each group, e.g. per park or per age group.
+
+    Args:
+        df (pd.DataFrame): Frame with a "Topic" column (see attach_topics)
+        group_column (str): Column to group by
+        labels (dict, optional): Topic id -> label, used for the column names
+
+    Returns:
+        pd.DataFrame: Rows are groups, columns are topics, values are shares
+    """
+    assigned = df.dropna(subset=["Topic"])
+    dist = pd.crosstab(assigned[group_column], assigned["Topic"].astype(int), normalize="index")
+    if labels:
+        dist = dist.rename(columns=labels)
+    return dist
+
+
+def load_corpus(corpus):
+    """Rows of one of the configured corpora."""
+    config = CORPORA[corpus]
+    if "load" in config:
+        df = config["load"]()
+        if not df.empty:
+            return df
+    return pd.read_csv(config["csv"])
+
+
+def fit_corpus(corpus, n_topics=8, method="nmf", minibatch=False, model_dir=MODEL_DIR):
+    """Fit, persist and assign a topic model for one of the configured corpora."""
+    config = CORPORA[corpus]
+    df = load_corpus(corpus)
+    topic_model = fit_topic_model(
+        combine_text(df, config["text_columns"]), n_topics=n_topics, method=method, minibatch=minibatch
+    )
+    save_topic_model(topic_model, corpus, model_dir)
+
+    # A refit changes topic ids, so previous assignments are discarded.
+    path = assignments_path(corpus, model_dir)
+    if os.path.exists(path):
+        os.remove(path)
+    return assign_new_rows(df, corpus, topic_model, model_dir)
+
+
+def main():
+    # Usage: python topic_model.py <surveys|reviews> [fit|assign] [n_topics] [nmf|kmeans|minibatch]
+    corpus = sys.argv[1] if len(sys.argv) > 1 else "surveys"
+    action = sys.argv[2] if len(sys.argv) > 2 else "fit"
+    if action == "fit":
+        n_topics = int(sys.argv[3]) if len(sys.argv) > 3 else 8
+        method = sys.argv[4] if len(sys.argv) > 4 else "nmf"
+        minibatch = method == "minibatch"
+        count = fit_corpus(corpus, n_topics, "kmeans" if minibatch else method, minibatch)
+        print(f"Fitted {corpus} topic model and assigned {count} rows")
+        for topic, label in topic_labels(load_topic_model(corpus), n_terms=8).items():
+            print(f"  Topic {topic}: {label}")
+    else:
+        count = assign_new_rows(load_corpus(corpus), corpus)
+        print(f"Assigned topics to {count} new {corpus} rows")
+
+
+if __name__ == '__main__':
+    main()
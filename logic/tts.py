@@ -0,0 +1,213 @@
+import hashlib
+import itertools
+import os
+import queue
+import threading
+
+# Synthesized speech is cached here as audio files keyed by (text, voice, rate)
+TTS_CACHE_DIR = "tts_cache"
+DEFAULT_RATE = 150
+DEFAULT_VOLUME = 0.8
+
+# Queue priorities: speech someone is waiting for goes ahead of prefetching
+PRIORITY_NOW = 0
+PRIORITY_PREFETCH = 1
+
+# How long a first request waits for the engine thread to start (so a
+# failure to start is reported instead of waiting out the request timeout)
+ENGINE_START_TIMEOUT = 5
+SAY_TIMEOUT = 60
+
+
+class TTSUnavailable(Exception):
+    """The pyttsx3 engine could not be started (e.g. no espeak or audio driver)."""
+
+
+class TTSFailed(Exception):
+    """The engine is running but could not synthesize a text."""
+
+
+def cache_key(text, voice=None, rate=DEFAULT_RATE):
+    return hashlib.sha256(f"{voice or ''}|{rate}|{text}".encode("utf-8")).hexdigest()
+
+
+def mime_type(audio):
+    """MIME type of synthesized audio: pyttsx3 writes AIFF on macOS, whatever the file is called."""
+    return "audio/aiff" if audio[:4] == b"FORM" else "audio/wav"
+
+
+class TTSService:
+    """
+    Text-to-speech with a single dedicated pyttsx3 engine thread.
+
+    pyttsx3 engines are not thread-safe and ``runAndWait`` blocks, so every
+    request is queued to one worker thread that owns the engine. Speech is
+    rendered to audio files cached on disk, which lets the browser play it
+    and makes repeated phrases (e.g. survey questions) instant.
+    """
+
+    def __init__(self, cache_dir=TTS_CACHE_DIR, voice=None, rate=DEFAULT_RATE, volume=DEFAULT_VOLUME):
+        self.cache_dir = cache_dir
+        self.voice = voice
+        self.rate = rate
+        self.volume = volume
+        os.makedirs(cache_dir, exist_ok=True)
+        self.jobs = queue.PriorityQueue()
+        # Tie-breaker keeping FIFO order within a priority
+        self.counter = itertools.count()
+        # Requests already queued, so concurrent callers wait on the same job
+        self.in_flight = {}
+        # Why the last job for a path wrote no audio, for the callers waiting on it
+        self.failures = {}
+        self.lock = threading.Lock()
+        # Set once the engine thread has started the engine or failed to
+        self.started = threading.Event()
+        self.error = None
+        self.thread = threading.Thread(target=self._run, name="tts-engine", daemon=True)
+        self.thread.start()
+
+    def cache_path(self, text):
+        return os.path.join(self.cache_dir, cache_key(text, self.voice, self.rate) + ".wav")
+
+    def check(self):
+        """Raise TTSUnavailable if the engine failed to start."""
+        self.started.wait(ENGINE_START_TIMEOUT)
+        if self.error is not None:
+            raise TTSUnavailable(f"Text-to-speech engine failed to start: {self.error}") from self.error
+
+    def put(self, job):
+        self.jobs.put(job)
+        # The engine may have failed after ``check``; nothing will run the job
+        if self.error is not None:
+            job[-1].set()
+
+    def submit(self, text, priority=PRIORITY_NOW):
+        """
+        Queue synthesis of ``text`` unless it is cached or already queued.
+
+        A text already queued for prefetching is queued again at the higher
+        priority; whichever job runs first writes the file and the other is
+        skipped.
+
+        Returns:
+            threading.Event: Set once the audio file is available
+
+        Raises:
+            TTSUnavailable: The engine could not be started
+        """
+        path = self.cache_path(text)
+        if not os.path.exists(path):
+            self.check()
+        with self.lock:
+            if path in self.in_flight:
+                done, queued_priority = self.in_flight[path]
+                if priority >= queued_priority:
+                    return done
+            else:
+                done = threading.Event()
+                if os.path.exists(path):
+                    done.set()
+                    return done
+                self.failures.pop(path, None)
+            self.in_flight[path] = (done, priority)
+        self.put((priority, next(self.counter), "save", text, path, done))
+        return done
+
+    def prefetch(self, texts):
+        """Queue background synthesis of every text behind on-demand requests."""
+        for text in dict.fromkeys(texts):
+            self.submit(text, PRIORITY_PREFETCH)
+
+    def synthesize(self, text, timeout=30):
+        """
+        Audio bytes for ``text``, synthesizing and caching them on a miss.
+
+        Returns:
+            bytes: The audio (see mime_type), or None if synthesis did not
+            finish in time
+
+        Raises:
+            TTSUnavailable: The engine could not be started
+            TTSFailed: The engine finished without writing the audio
+        """
+        path = self.cache_path(text)
+        if not os.path.exists(path):
+            finished = self.submit(text).wait(timeout)
+            if not os.path.exists(path):
+                if not finished:
+                    return None
+                self.check()
+                raise TTSFailed(f"Text-to-speech failed: {self.failures.get(path, 'no audio was written')}")
+        with open(path, "rb") as f:
+            return f.read()
+
+    def say(self, text, timeout=SAY_TIMEOUT):
+        """
+        Speak through the server's own speakers.
+
+        Returns:
+            bool: False if speaking did not finish within ``timeout`` seconds
+        """
+        self.check()
+        done = threading.Event()
+        self.put((PRIORITY_NOW, next(self.counter), "say", text, None, done))
+        return done.wait(timeout)
+
+    def _run(self):
+        try:
+            import pyttsx3
+
+            engine = pyttsx3.init()
+            engine.setProperty('rate', self.rate)
+            engine.setProperty('volume', self.volume)
+            if self.voice:
+                engine.setProperty('voice', self.voice)
+        except Exception as e:
+            print(f"TTS Error: could not start the engine: {str(e)}")
+            self.error = e
+            self.started.set()
+            # Release anyone waiting on jobs queued before the failure
+            while not self.jobs.empty():
+                self.jobs.get()[-1].set()
+            with self.lock:
+                self.in_flight.clear()
+            return
+        self.started.set()
+
+        while True:
+            _, _, action, text, path, done = self.jobs.get()
+            if action == "save" and os.path.exists(path):
+                # Already written by an earlier job for the same text
+                done.set()
+                continue
+            try:
+                if action == "say":
+                    engine.say(text)
+                    engine.runAndWait()
+                else:
+                    # Write to a temp name so readers never see a partial file
+                    tmp_path = path[:-len(".wav")] + ".part.wav"
+                    engine.save_to_file(text, tmp_path)
+                    engine.runAndWait()
+                    os.replace(tmp_path, path)
+            except Exception as e:
+                print(f"TTS Error: {str(e)}")
+                if path is not None:
+                    self.failures[path] = e
+            finally:
+                with self.lock:
+                    self.in_flight.pop(path, None)
+                done.set()
+
+
+_service = None
+_service_lock = threading.Lock()
+
+
+def get_service():
+    """Process-wide TTS service, started on first use."""
+    global _service
+    with _service_lock:
+        if _service is None:
+            _service = TTSService()
+        return _service
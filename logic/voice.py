@@ -1,25 +1,26 @@
-import pyttsx3
 import speech_recognition as sr
+import tts
 
 
 def speak(text):
-    engine.say(text)
-    engine.runAndWait()
+    # Runs on the TTS service's engine thread, which owns the pyttsx3 engine
+    try:
+        if not tts.get_service().say(text):
+            print("Text-to-speech timed out")
+    except tts.TTSUnavailable as e:
+        print(str(e))
 
 def speech_to_text(audio, recognizer):
     try:
         # Recognize speech using Google Speech Recognition
         text = recognizer.recognize_google(audio)
         print("You said: " + text)
+        return text
     except sr.UnknownValueError:
         print("Google Speech Recognition could not understand the audio")
     except sr.RequestError as e:
         print("Could not request results from Google Speech Recognition service; {0}".format(e))
+    return ""
 
-# Initialize the text to speech engine
-engine = pyttsx3.init()
-# Optionally, adjust properties like rate (speed) and volume
-engine.setProperty('rate', 150)
-engine.setProperty('volume', 0.8)
 # Initialize the speech recognizer
-speech_recognizer = sr.Recognizer()
\ No newline at end of file
+speech_recognizer = sr.Recognizer()
@@ -1,3 +1,28 @@
 from django.contrib import admin
 
-# Register your models here.
+from my_app.models import Answer, Form, Question, Submission
+
+
+@admin.register(Form)
+class FormAdmin(admin.ModelAdmin):
+    list_display = ("__str__", "url", "created_at")
+    search_fields = ("title", "url")
+
+
+@admin.register(Question)
+class QuestionAdmin(admin.ModelAdmin):
+    list_display = ("text", "question_type", "form", "position")
+    list_filter = ("question_type",)
+
+
+class AnswerInline(admin.TabularInline):
+    model = Answer
+    extra = 0
+
+
+@admin.register(Submission)
+class SubmissionAdmin(admin.ModelAdmin):
+    list_display = ("id", "form", "submitted_at", "source")
+    list_filter = ("source", "form")
+    date_hierarchy = "submitted_at"
+    inlines = [AnswerInline]
@@ -1,6 +1,14 @@
 from django.apps import AppConfig
+from django.conf import settings
 
 
 class MyAppConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "my_app"
+
+    def ready(self):
+        from my_app import storage
+        storage.connect_signals()
+        if settings.VOICE_PREWARM:
+            from my_app import voice_stack
+            voice_stack.prewarm()
@@ -0,0 +1,330 @@
+"""
+Speech recognition engines and VAD-segmented streaming transcription.
+
+The WebSocket consumer feeds 16-bit mono PCM frames into a
+``StreamingTranscriber``, which detects speech segments with a simple energy
+VAD, streams the speech into a pluggable recognition engine and returns
+partial / final transcript events as they become available.
+"""
+import io
+import json
+import subprocess
+import wave
+from collections import deque
+from functools import lru_cache
+
+import numpy as np
+import speech_recognition as sr
+from django.conf import settings
+
+SAMPLE_WIDTH = 2  # bytes per sample, 16-bit PCM
+
+
+def decode_to_pcm(audio_bytes, sample_rate=None):
+    """
+    Decode an audio clip (webm/ogg/wav/...) to 16-bit mono PCM entirely in memory.
+
+    PCM WAV that already matches the target format is unpacked directly;
+    anything else is piped through ffmpeg (stdin -> stdout), so no temporary
+    files are written and concurrent sessions cannot clobber each other.
+    """
+    sample_rate = sample_rate or settings.VOICE_SAMPLE_RATE
+    if audio_bytes[:4] == b"RIFF":
+        try:
+            with wave.open(io.BytesIO(audio_bytes)) as wav:
+                if (wav.getnchannels(), wav.getsampwidth(), wav.getframerate()) == (1, SAMPLE_WIDTH, sample_rate):
+                    return wav.readframes(wav.getnframes())
+        except wave.Error:
+            pass
+
+    result = subprocess.run(
+        [
+            settings.VOICE_FFMPEG, "-hide_banner", "-loglevel", "error",
+            "-i", "pipe:0",
+            "-f", "s16le", "-acodec", "pcm_s16le", "-ac", "1", "-ar", str(sample_rate),
+            "pipe:1",
+        ],
+        input=audio_bytes,
+        capture_output=True,
+        check=True,
+    )
+    return result.stdout
+
+
+def transcribe_pcm(pcm, sample_rate=None, engine=None, session=None):
+    """Recognize a complete utterance of 16-bit mono PCM in one pass."""
+    sample_rate = sample_rate or settings.VOICE_SAMPLE_RATE
+    engine = engine or create_engine(sample_rate, session=session)
+    engine.accept(pcm)
+    return engine.final()
+
+
+class VoiceSession:
+    """
+    Recognizer state kept for a whole voice session and shared across turns.
+
+    The energy threshold of the session's ``sr.Recognizer`` is calibrated once
+    from the first VOICE_CALIBRATION_SECONDS of streamed audio and afterwards
+    follows the noise level using the recognizer's own dynamic-threshold
+    parameters, so no turn pays for a separate ambient-noise recording.
+
+    The user may already be speaking during calibration, so the noise floor
+    is taken from the quietest frames (a low percentile, not the median),
+    and the calibrated threshold is capped below normal speech levels.
+    """
+
+    MIN_ENERGY_THRESHOLD = 50
+    MAX_CALIBRATED_THRESHOLD = 1000
+    NOISE_PERCENTILE = 10
+
+    def __init__(self):
+        self.recognizer = sr.Recognizer()
+        self.recognizer.dynamic_energy_threshold = True
+        self.calibrated = False
+        self.noise_energies = []
+
+    def is_speech(self, energy, frame_seconds):
+        recognizer = self.recognizer
+        speech = energy > recognizer.energy_threshold
+        if not self.calibrated:
+            self.noise_energies.append(energy)
+            if len(self.noise_energies) * frame_seconds >= settings.VOICE_CALIBRATION_SECONDS:
+                noise_floor = float(np.percentile(self.noise_energies, self.NOISE_PERCENTILE))
+                recognizer.energy_threshold = min(
+                    self.MAX_CALIBRATED_THRESHOLD,
+                    max(self.MIN_ENERGY_THRESHOLD, noise_floor * recognizer.dynamic_energy_ratio),
+                )
+                self.calibrated = True
+                self.noise_energies = []
+        elif not speech and recognizer.dynamic_energy_threshold:
+            # Same update rule as sr.Recognizer.listen, applied to streamed frames
+            damping = recognizer.dynamic_energy_adjustment_damping ** frame_seconds
+            target = energy * recognizer.dynamic_energy_ratio
+            recognizer.energy_threshold = max(
+                self.MIN_ENERGY_THRESHOLD,
+                recognizer.energy_threshold * damping + target * (1 - damping),
+            )
+        return speech
+
+
+class EnergyVAD:
+    """Frame-level voice activity detection based on RMS energy."""
+
+    def __init__(self, sample_rate, session, frame_ms=30, silence_ms=300, preroll_ms=210):
+        self.frame_bytes = int(sample_rate * frame_ms / 1000) * SAMPLE_WIDTH
+        self.frame_seconds = frame_ms / 1000
+        # Threshold state lives in the session so it carries over between turns
+        self.session = session
+        # Consecutive silent frames that end a speech segment
+        self.hangover_frames = max(1, silence_ms // frame_ms)
+        # Silent frames kept before speech starts so word onsets are not clipped
+        self.preroll_frames = max(0, preroll_ms // frame_ms)
+
+    def energy(self, frame):
+        samples = np.frombuffer(frame, dtype="<i2").astype(np.float32)
+        return float(np.sqrt(np.mean(samples * samples))) if samples.size else 0.0
+
+    def is_speech(self, frame):
+        return self.session.is_speech(self.energy(frame), self.frame_seconds)
+
+
+class GoogleEngine:
+    """Buffers a segment and sends it to Google Web Speech when it ends (no partials)."""
+
+    def __init__(self, sample_rate, session=None):
+        self.sample_rate = sample_rate
+        # Reuse the session's recognizer instead of building one per utterance
+        self.recognizer = session.recognizer if session is not None else sr.Recognizer()
+        self.buffer = bytearray()
+
+    def accept(self, pcm):
+        self.buffer.extend(pcm)
+
+    def partial(self):
+        return ""
+
+    def final(self):
+        audio = sr.AudioData(bytes(self.buffer), self.sample_rate, SAMPLE_WIDTH)
+        self.buffer.clear()
+        try:
+            return self.recognizer.recognize_google(audio)
+        except (sr.UnknownValueError, sr.RequestError):
+            return ""
+
+
+@lru_cache(maxsize=None)
+def get_vosk_model(model_path):
+    """Load a Vosk model once per process; loading takes seconds."""
+    from vosk import Model
+    return Model(model_path)
+
+
+class VoskEngine:
+    """Local streaming recognizer using Vosk (Kaldi) with incremental partial results."""
+
+    def __init__(self, sample_rate, session=None):
+        from vosk import KaldiRecognizer
+        self.recognizer = KaldiRecognizer(get_vosk_model(settings.VOSK_MODEL_PATH), sample_rate)
+        # Text of utterances Vosk endpointed on its own inside the current segment
+        self.committed = []
+
+    def accept(self, pcm):
+        if self.recognizer.AcceptWaveform(pcm):
+            text = json.loads(self.recognizer.Result()).get("text", "")
+            if text:
+                self.committed.append(text)
+
+    def partial(self):
+        text = json.loads(self.recognizer.PartialResult()).get("partial", "")
+        return " ".join(self.committed + ([text] if text else []))
+
+    def final(self):
+        text = json.loads(self.recognizer.FinalResult()).get("text", "")
+        result = " ".join(self.committed + ([text] if text else []))
+        self.committed = []
+        return result
+
+
+class StubEngine:
+    """
+    Deterministic engine for tests and local development.
+
+    Reveals one word of ``settings.VOICE_STUB_TRANSCRIPT`` per 100 ms of
+    speech as partials and returns the whole transcript as the final result.
+    """
+
+    def __init__(self, sample_rate, session=None):
+        self.bytes_per_word = sample_rate * SAMPLE_WIDTH // 10
+        self.words = getattr(settings, "VOICE_STUB_TRANSCRIPT", "hello world").split()
+        self.received = 0
+
+    def accept(self, pcm):
+        self.received += len(pcm)
+
+    def partial(self):
+        return " ".join(self.words[:self.received // self.bytes_per_word])
+
+    def final(self):
+        self.received = 0
+        return " ".join(self.words)
+
+
+class SegmentBuffer:
+    """Engine stand-in that only collects a segment's audio for recognition elsewhere."""
+
+    def __init__(self, sample_rate, session=None):
+        self.buffer = bytearray()
+
+    def accept(self, pcm):
+        self.buffer.extend(pcm)
+
+    def partial(self):
+        return ""
+
+    def final(self):
+        audio = bytes(self.buffer)
+        self.buffer.clear()
+        return audio
+
+
+ENGINES = {
+    "google": GoogleEngine,
+    "vosk": VoskEngine,
+    "stub": StubEngine,
+}
+
+
+def create_engine(sample_rate, name=None, session=None):
+    name = name or settings.VOICE_ASR_ENGINE
+    if name not in ENGINES:
+        raise ValueError(f"Unknown ASR engine '{name}', expected one of {sorted(ENGINES)}")
+    return ENGINES[name](sample_rate, session=session)
+
+
+class StreamingTranscriber:
+    """
+    Turns a stream of PCM frames into partial and final transcript events.
+
+    Events are dicts ``{"type": "partial" | "final", "text": str}``. A final
+    event is produced as soon as the VAD sees ``silence_ms`` of silence after
+    speech, so end-of-speech latency is the hangover plus one engine decode.
+    """
+
+    def __init__(self, sample_rate=None, engine=None, session=None):
+        self.sample_rate = sample_rate or settings.VOICE_SAMPLE_RATE
+        self.session = session or VoiceSession()
+        self.engine = engine or create_engine(self.sample_rate, session=self.session)
+        self.vad = EnergyVAD(self.sample_rate, self.session, silence_ms=settings.VOICE_VAD_SILENCE_MS)
+        self.pending = b""
+        self.preroll = deque(maxlen=self.vad.preroll_frames)
+        self.in_speech = False
+        self.silence_run = 0
+        self.last_partial = ""
+
+    def feed(self, pcm):
+        events = []
+        self.pending += pcm
+        frame_bytes = self.vad.frame_bytes
+        offset = 0
+        while len(self.pending) - offset >= frame_bytes:
+            frame = self.pending[offset:offset + frame_bytes]
+            offset += frame_bytes
+            if self.vad.is_speech(frame):
+                if not self.in_speech:
+                    self.in_speech = True
+                    for buffered in self.preroll:
+                        self.engine.accept(buffered)
+                    self.preroll.clear()
+                self.silence_run = 0
+                self.engine.accept(frame)
+            elif self.in_speech:
+                # Trailing silence is still fed so the engine can endpoint cleanly
+                self.engine.accept(frame)
+                self.silence_run += 1
+                if self.silence_run >= self.vad.hangover_frames:
+                    events.append(self._finish_segment())
+            else:
+                self.preroll.append(frame)
+        self.pending = self.pending[offset:]
+
+        if self.in_speech:
+            partial = self.engine.partial()
+            if partial and partial != self.last_partial:
+                self.last_partial = partial
+                events.append({"type": "partial", "text": partial})
+        return [event for event in events if event.get("text") or event.get("audio")]
+
+    def flush(self):
+        """End the stream, finalizing any segment still in progress."""
+        if self.pending and self.in_speech:
+            self.engine.accept(self.pending)
+        self.pending = b""
+        if not self.in_speech:
+            return []
+        event = self._finish_segment()
+        return [event] if event.get("text") or event.get("audio") else []
+
+    def _finish_segment(self):
+        self.in_speech = False
+        self.silence_run = 0
+        self.last_partial = ""
+        return {"type": "final", "text": self.engine.final()}
+
+
+class SegmentingTranscriber(StreamingTranscriber):
+    """
+    VAD segmentation only, for dispatching recognition to background workers.
+
+    Instead of transcripts it emits ``{"type": "segment", "audio": bytes,
+    "sample_rate": int}`` events, one per finished utterance. No partials.
+    """
+
+    def __init__(self, sample_rate=None, session=None):
+        sample_rate = sample_rate or settings.VOICE_SAMPLE_RATE
+        super().__init__(sample_rate, engine=SegmentBuffer(sample_rate), session=session)
+
+    def _finish_segment(self):
+        self.in_speech = False
+        self.silence_run = 0
+        self.last_partial = ""
+        return {"type": "segment", "audio": self.engine.final(), "sample_rate": self.sample_rate}
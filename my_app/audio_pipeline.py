@@ -0,0 +1,114 @@
+"""
+Off-loop execution of the blocking parts of the voice pipeline.
+
+Decoding and speech recognition are CPU- or network-bound and must not run
+on the ASGI event loop. Every WebSocket connection gets an ``AudioPipeline``:
+an ordered, bounded job queue drained by one task that runs each job on a
+process-wide thread pool, so one worker process can serve many concurrent
+voice sessions while each session still sees its results in order.
+"""
+import asyncio
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+
+SAMPLE_WIDTH = 2  # bytes per sample, 16-bit PCM
+
+_executor = None
+
+
+def get_executor():
+    """Shared, bounded pool for all voice sessions in this process."""
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=settings.VOICE_WORKER_THREADS, thread_name_prefix="voice"
+        )
+    return _executor
+
+
+class AudioPipeline:
+    """
+    Per-connection queue of blocking jobs, executed in order off the event loop.
+
+    Each job returns a list of events, which are passed to ``send_events``.
+    Consecutive PCM frames for the same transcriber are coalesced into a single
+    job, so a session that falls behind catches up with one larger decode
+    instead of many small ones.
+    """
+
+    def __init__(self, send_events):
+        self.send_events = send_events
+        self.jobs = deque()
+        self.wakeup = asyncio.Event()
+        self.pending_bytes = 0
+        self.task = asyncio.create_task(self._run())
+
+    def max_pending_bytes(self, sample_rate):
+        """VOICE_MAX_BACKLOG_SECONDS of audio at the stream's sample rate."""
+        return int(settings.VOICE_MAX_BACKLOG_SECONDS * sample_rate) * SAMPLE_WIDTH
+
+    def feed(self, transcriber, pcm):
+        """
+        Queue PCM audio for a streaming transcriber.
+
+        Returns False (and drops the frame) when the session already has more
+        than VOICE_MAX_BACKLOG_SECONDS of unprocessed audio queued, measured
+        at the transcriber's sample rate.
+        """
+        if self.pending_bytes + len(pcm) > self.max_pending_bytes(transcriber.sample_rate):
+            return False
+        last = self.jobs[-1] if self.jobs else None
+        if last is not None and last[2] and last[0] == transcriber.feed:
+            last[1][0].extend(pcm)
+        else:
+            self.jobs.append((transcriber.feed, (bytearray(pcm),), True))
+        self.pending_bytes += len(pcm)
+        self.wakeup.set()
+        return True
+
+    def submit(self, fn, *args):
+        """Queue a one-off job; returns False if the session's queue is full."""
+        if len(self.jobs) >= settings.VOICE_MAX_QUEUED_JOBS:
+            return False
+        self.jobs.append((fn, args, False))
+        self.wakeup.set()
+        return True
+
+    async def close(self):
+        """Cancel pending work when the connection goes away."""
+        self.jobs.clear()
+        self.pending_bytes = 0
+        self.task.cancel()
+        try:
+            await self.task
+        except asyncio.CancelledError:
+            pass
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            if not self.jobs:
+                self.wakeup.clear()
+                await self.wakeup.wait()
+                continue
+            fn, args, is_audio = self.jobs.popleft()
+            if is_audio:
+                self.pending_bytes -= len(args[0])
+            try:
+                events = await loop.run_in_executor(get_executor(), fn, *args)
+            except Exception as e:
+                print(f"⚠ Error processing audio: {e}")
+                continue
+            if events:
+                # A failed send (e.g. a full channel layer) must not end the
+                # session's task, or later audio would only pile up
+                try:
+                    await self.send_events(events)
+                except Exception as e:
+                    print(f"⚠ Error sending voice events: {e}")
+                    try:
+                        await self.send_events([{"type": "error", "error": "send failed"}])
+                    except Exception:
+                        pass
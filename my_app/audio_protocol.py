@@ -0,0 +1,56 @@
+"""
+Binary audio frame format for the ws/audio/ WebSocket.
+
+Audio travels as binary WebSocket messages; JSON text messages are only used
+for control ({"type": "start"}, {"type": "stop"}, "STOP"). Every binary
+message starts with a 12-byte big-endian header followed by the payload:
+
+    version      uint8   FRAME_VERSION
+    codec        uint8   one of the CODEC_* ids
+    flags        uint16  FLAG_END marks the last frame of a compressed clip
+    seq          uint32  per-connection sequence number, starting at 0
+    sample_rate  uint32  Hz for raw PCM, 0 for containerised codecs
+
+Raw PCM frames are streamed straight into the recognizer. Frames of the
+containerised codecs (webm/ogg/wav) are concatenated until FLAG_END and then
+decoded as one clip.
+"""
+import struct
+from collections import namedtuple
+
+HEADER = struct.Struct("!BBHII")
+FRAME_VERSION = 1
+
+CODEC_PCM_S16LE = 0
+CODEC_WEBM = 1
+CODEC_OGG = 2
+CODEC_WAV = 3
+CODEC_NAMES = {
+    CODEC_PCM_S16LE: "pcm_s16le",
+    CODEC_WEBM: "webm",
+    CODEC_OGG: "ogg",
+    CODEC_WAV: "wav",
+}
+
+FLAG_END = 0x1
+
+AudioFrame = namedtuple("AudioFrame", ["codec", "flags", "seq", "sample_rate", "payload"])
+
+
+def parse_frame(data):
+    """Split a binary message into its header fields and payload; raises ValueError if malformed."""
+    if len(data) < HEADER.size:
+        raise ValueError(f"Audio frame shorter than the {HEADER.size}-byte header")
+    version, codec, flags, seq, sample_rate = HEADER.unpack_from(data)
+    if version != FRAME_VERSION:
+        raise ValueError(f"Unsupported audio frame version {version}")
+    if codec not in CODEC_NAMES:
+        raise ValueError(f"Unknown audio codec id {codec}")
+    if codec == CODEC_PCM_S16LE and not sample_rate:
+        raise ValueError("PCM audio frames must carry a sample rate")
+    return AudioFrame(codec, flags, seq, sample_rate, memoryview(data)[HEADER.size:])
+
+
+def pack_frame(payload, seq, codec=CODEC_PCM_S16LE, sample_rate=0, flags=0):
+    """Build a binary audio message (used by Python clients and benchmarks)."""
+    return HEADER.pack(FRAME_VERSION, codec, flags, seq, sample_rate) + bytes(payload)
@@ -1,61 +1,246 @@
+import asyncio
 import base64
 import json
-import os
-import speech_recognition as sr
-from pydub import AudioSegment
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from channels.consumer import SyncConsumer
 from channels.generic.websocket import AsyncWebsocketConsumer
-import asyncio
+from my_app import voice_stack
+from my_app.audio_pipeline import AudioPipeline
+from my_app.audio_protocol import CODEC_NAMES, CODEC_PCM_S16LE, FLAG_END, parse_frame
 
 class AudioConsumer(AsyncWebsocketConsumer):
     async def connect(self):
+        # my_app.asr is imported by the first connection, not at startup. Load it
+        # before accepting, so a failed load rejects the connection
+        try:
+            self.asr = await voice_stack.aload()
+        except Exception as e:
+            print(f"Could not load the voice stack: {str(e)}")
+            await self.close()
+            return
+        # Recognizer and calibrated noise threshold shared by every turn of this connection
+        self.session = self.asr.VoiceSession()
+        # Created by a {"type": "start"} control message (or the first binary frame)
+        self.transcriber = None
+        # Blocking decode/recognition runs here, off the event loop
+        self.pipeline = AudioPipeline(self.send_events)
+        self.backlogged = False
+        # Sequence number expected on the next binary frame
+        self.next_seq = 0
+        # Payload of a compressed clip being uploaded in several frames
+        self.clip = bytearray()
+        # Worker dispatch: utterances sent to the ASR pool and results re-ordered
+        self.dispatch_seq = 0
+        self.next_result = 0
+        self.pending_results = {}
+        # seq -> task that gives up on the result after VOICE_RESULT_TIMEOUT
+        self.result_timeouts = {}
         await self.accept()
-        self.recognizer = sr.Recognizer()
         print("WebSocket Connected")
 
     async def disconnect(self, close_code):
+        # Nothing was set up if the connection was rejected
+        pipeline = getattr(self, "pipeline", None)
+        if pipeline is None:
+            return
+        for task in self.result_timeouts.values():
+            task.cancel()
+        await pipeline.close()
+        self.transcriber = None
         print("WebSocket Disconnected")
 
-    async def receive(self, text_data):
+    async def receive(self, text_data=None, bytes_data=None):
+        # Audio arrives as binary frames (see my_app/audio_protocol.py)
+        if bytes_data:
+            try:
+                await self.receive_frame(bytes_data)
+            except Exception as e:
+                print(f"⚠ Error processing audio: {e}")
+                await self.send(json.dumps({"type": "error", "error": "frame failed"}))
+            return
+
         if not text_data:
             print("⚠ Received empty message, ignoring...")
             return
 
+        if text_data == "STOP":
+            print("Recording Stopped")
+            await self.stop_stream()
+            return
+
         try:
             data = json.loads(text_data)
-            if "audio" in data:
+            if data.get("type") == "start":
+                self.transcriber = self.new_transcriber(data.get("sample_rate"))
+                self.next_seq = 0
+                self.clip.clear()
+
+            elif data.get("type") == "stop":
+                await self.stop_stream()
+
+            elif "audio" in data:
+                # Legacy clients: a whole base64-encoded clip inside JSON
                 audio_bytes = base64.b64decode(data["audio"])
-                file_path = "temp_audio.webm"  # Save as WebM first
+                await self.transcribe_clip(audio_bytes, "auto")
 
-                with open(file_path, "wb") as f:
-                    f.write(audio_bytes)
+        except json.JSONDecodeError:
+            print("⚠ Invalid JSON received, ignoring...")
+            return
+        except Exception as e:
+            print(f"⚠ Error processing audio: {e}")
 
-                # Convert to WAV using pydub
-                wav_path = "temp_audio.wav"
-                AudioSegment.from_file(file_path).export(wav_path, format="wav")
+    async def receive_frame(self, data):
+        try:
+            frame = parse_frame(data)
+        except ValueError as e:
+            await self.send_events([{"type": "error", "error": str(e)}])
+            return
 
-                transcript = await self.speech_to_text(wav_path)
-                await self.send(json.dumps({"text": transcript}))
+        # Duplicates are dropped; a gap means the client lost audio
+        if frame.seq < self.next_seq:
+            return
+        if frame.seq > self.next_seq:
+            await self.send_events([{"type": "error", "error": "gap", "expected": self.next_seq, "got": frame.seq}])
+        self.next_seq = frame.seq + 1
 
-                # Cleanup files
-                os.remove(file_path)
-                os.remove(wav_path)
+        if frame.codec == CODEC_PCM_S16LE:
+            if self.transcriber is None or self.transcriber.sample_rate != frame.sample_rate:
+                self.transcriber = self.new_transcriber(frame.sample_rate)
+            await self.queue_audio(frame.payload)
+            return
 
-            elif text_data == "STOP":
-                print("Recording Stopped")
+        # Compressed clip: collect until the final frame, then decode it whole
+        if len(self.clip) + len(frame.payload) > settings.VOICE_MAX_CLIP_BYTES:
+            self.clip.clear()
+            await self.send_events([{"type": "error", "error": "clip too large"}])
+            return
+        self.clip.extend(frame.payload)
+        if frame.flags & FLAG_END:
+            await self.transcribe_clip(bytes(self.clip), CODEC_NAMES[frame.codec])
+            self.clip.clear()
 
-        except json.JSONDecodeError:
-            print("⚠ Invalid JSON received, ignoring...")
+    def new_transcriber(self, sample_rate):
+        # With worker dispatch only VAD segmentation runs in this process
+        if settings.VOICE_DISPATCH == "worker":
+            return self.asr.SegmentingTranscriber(sample_rate=sample_rate, session=self.session)
+        return self.asr.StreamingTranscriber(sample_rate=sample_rate, session=self.session)
+
+    async def transcribe_clip(self, audio_bytes, codec):
+        if settings.VOICE_DISPATCH == "worker":
+            await self.dispatch_utterance(audio_bytes, codec, 0, clip=True)
+        elif not self.pipeline.submit(self.transcribe_blob, audio_bytes):
+            await self.send_events([{"type": "error", "error": "busy"}])
+
+    async def queue_audio(self, pcm):
+        # Shed load instead of buffering without bound when recognition falls
+        # behind; the client is told once per overload episode.
+        if self.pipeline.feed(self.transcriber, pcm):
+            self.backlogged = False
+        elif not self.backlogged:
+            self.backlogged = True
+            await self.send_events([{"type": "error", "error": "backlog"}])
+
+    async def stop_stream(self):
+        if self.transcriber is None:
             return
+        # The last utterance is only transcribed by the flush; tell the client
+        # if the queue is too full to take it
+        if not self.pipeline.submit(self.transcriber.flush):
+            await self.send_events([{"type": "error", "error": "flush dropped"}])
+        self.transcriber = None
+
+    async def send_events(self, events):
+        # Partial transcripts replace each other on the client; finals are appended
+        for event in events:
+            if event.get("type") == "segment":
+                await self.dispatch_utterance(event["audio"], CODEC_NAMES[CODEC_PCM_S16LE], event["sample_rate"])
+            else:
+                await self.send(json.dumps(event))
+
+    async def dispatch_utterance(self, audio, codec, sample_rate, clip=False):
+        """Hand an utterance to the ASR worker pool; the result comes back via asr_result."""
+        seq = self.dispatch_seq
+        self.dispatch_seq += 1
+        self.result_timeouts[seq] = asyncio.create_task(self.result_timeout(seq, clip))
+        try:
+            await self.channel_layer.send(settings.VOICE_WORKER_CHANNEL, {
+                "type": "asr.transcribe",
+                "reply_channel": self.channel_name,
+                "seq": seq,
+                "codec": codec,
+                "sample_rate": sample_rate,
+                "clip": clip,
+                "audio": audio,
+            })
         except Exception as e:
-            print(f"⚠ Error processing audio: {e}")
+            # Full channel or an unreachable layer: report it in utterance
+            # order, and later utterances are still dispatched
+            print(f"⚠ Could not dispatch utterance {seq}: {e}")
+            self.result_timeouts.pop(seq).cancel()
+            await self.asr_result({"seq": seq, "clip": clip, "text": "", "lost": True, "error": "dispatch failed"})
+
+    async def result_timeout(self, seq, clip):
+        """
+        Give up on a result that never came (expired message, full channel,
+        crashed worker), so it does not hold back the results after it.
+        """
+        await asyncio.sleep(settings.VOICE_RESULT_TIMEOUT)
+        self.result_timeouts.pop(seq, None)
+        await self.asr_result({"seq": seq, "clip": clip, "text": "", "lost": True})
+
+    async def asr_result(self, event):
+        # Workers finish out of order; deliver transcripts in utterance order
+        seq = event["seq"]
+        if seq < self.next_result or seq in self.pending_results:
+            # Late reply to a result already given up on
+            return
+        if not event.get("lost"):
+            task = self.result_timeouts.pop(seq, None)
+            if task is not None:
+                task.cancel()
+        self.pending_results[seq] = event
+        while self.next_result in self.pending_results:
+            result = self.pending_results.pop(self.next_result)
+            self.next_result += 1
+            if result.get("lost"):
+                error = result.get("error", "transcript lost")
+                await self.send(json.dumps({"type": "error", "error": error, "seq": result["seq"]}))
+            elif result["clip"]:
+                await self.send(json.dumps({"text": result["text"] or "Could not understand the audio"}))
+            elif result["text"]:
+                await self.send(json.dumps({"type": "final", "text": result["text"]}))
+
+    def transcribe_blob(self, audio_bytes):
+        # Runs on the voice executor; decoding happens in memory, per connection
+        pcm = self.asr.decode_to_pcm(audio_bytes)
+        transcript = self.asr.transcribe_pcm(pcm, session=self.session)
+        return [{"text": transcript or "Could not understand the audio"}]
 
-    async def speech_to_text(self, file_path):
-        recognizer = sr.Recognizer()
-        with sr.AudioFile(file_path) as source:
-            audio = recognizer.record(source)
+
+class ASRWorkerConsumer(SyncConsumer):
+    """
+    Background speech recognizer fed through the channel layer.
+
+    Run a pool with `python manage.py runworker asr` (one process each) and set
+    VOICE_DISPATCH = "worker"; WebSocket consumers then only segment audio and
+    voice capacity grows with the number of worker processes.
+    """
+
+    def asr_transcribe(self, message):
         try:
-            return recognizer.recognize_google(audio)
-        except sr.UnknownValueError:
-            return "Could not understand the audio"
-        except sr.RequestError:
-            return "Error with Speech Recognition API"
+            asr = voice_stack.load()
+            audio = message["audio"]
+            if message["codec"] != CODEC_NAMES[CODEC_PCM_S16LE]:
+                audio = asr.decode_to_pcm(audio)
+            text = asr.transcribe_pcm(audio, message["sample_rate"] or None)
+        except Exception as e:
+            print(f"⚠ Error transcribing audio: {e}")
+            text = ""
+        # Always reply so the consumer's re-ordering never waits on a lost result
+        async_to_sync(self.channel_layer.send)(message["reply_channel"], {
+            "type": "asr.result",
+            "seq": message["seq"],
+            "clip": message["clip"],
+            "text": text,
+        })
@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_datetime
+
+from my_app.models import Form
+from my_app.submissions import export_responses, normalize_form_url
+
+
+class Command(BaseCommand):
+    help = "Export the responses to a form as CSV or Parquet (chosen by the file extension)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("form_url")
+        parser.add_argument("path", help="output file, .csv or .parquet")
+        parser.add_argument("--start", help="only submissions at or after this time (ISO 8601)")
+        parser.add_argument("--end", help="only submissions before this time (ISO 8601)")
+        parser.add_argument("--source", help='only submissions from this source, e.g. "chat"')
+
+    def handle(self, *args, **options):
+        try:
+            form = Form.objects.get(url=normalize_form_url(options["form_url"]))
+        except Form.DoesNotExist:
+            raise CommandError(f"No responses stored for {options['form_url']}")
+        filters = {"source": options["source"]}
+        for name in ("start", "end"):
+            if options[name]:
+                filters[name] = parse_datetime(options[name])
+                if filters[name] is None:
+                    raise CommandError(f"--{name} is not a valid date and time: {options[name]}")
+        try:
+            count = export_responses(form, options["path"], **filters)
+        except ValueError as e:
+            raise CommandError(str(e))
+        self.stdout.write(f"Wrote {count} submissions to {options['path']}")
@@ -0,0 +1,26 @@
+import pandas as pd
+from django.core.management.base import BaseCommand, CommandError
+
+from my_app.submissions import save_submissions
+
+
+class Command(BaseCommand):
+    help = "Import responses from a CSV file (one column per question) into the database"
+
+    def add_arguments(self, parser):
+        parser.add_argument("form_url")
+        parser.add_argument("path", help="CSV file with a header row of question texts")
+        parser.add_argument("--title", default="")
+        parser.add_argument("--source", default="import")
+
+    def handle(self, *args, **options):
+        try:
+            data = pd.read_csv(options["path"], dtype=str, keep_default_na=False)
+        except (OSError, pd.errors.ParserError) as e:
+            raise CommandError(f"Could not read {options['path']}: {e}")
+        questions = [{"question": column, "question type": "", "answer": []} for column in data.columns]
+        rows = [dict(enumerate(values)) for values in data.itertuples(index=False, name=None)]
+        submissions = save_submissions(
+            options["form_url"], questions, rows, source=options["source"], title=options["title"]
+        )
+        self.stdout.write(f"Imported {len(submissions)} submissions")
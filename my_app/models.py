@@ -1,3 +1,69 @@
 from django.db import models
+from django.utils import timezone
 
-# Create your models here.
+
+class Form(models.Model):
+    """A survey, identified by its normalized URL."""
+
+    url = models.URLField(max_length=500, unique=True)
+    title = models.CharField(max_length=300, blank=True)
+    created_at = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        return self.title or self.url
+
+
+class Question(models.Model):
+    """
+    A question of a form as it was asked.
+
+    Questions are never edited in place: when a form's wording, type or
+    options change a new row is created, so older answers keep pointing at
+    the question their respondents actually saw. Only ``position`` follows
+    the form, since moving a question does not change what was asked.
+    """
+
+    form = models.ForeignKey(Form, on_delete=models.CASCADE, related_name="questions")
+    # Where the question is in the form as last submitted
+    position = models.PositiveIntegerField()
+    text = models.TextField()
+    question_type = models.CharField(max_length=50)
+    options = models.JSONField(default=list, blank=True)
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        ordering = ["form", "position", "id"]
+        indexes = [models.Index(fields=["form", "position"])]
+
+    def __str__(self):
+        return self.text
+
+
+class Submission(models.Model):
+    """One respondent's set of answers to a form."""
+
+    form = models.ForeignKey(Form, on_delete=models.CASCADE, related_name="submissions")
+    submitted_at = models.DateTimeField(default=timezone.now)
+    # Where it came from: "chat", "voice", "synthetic", "import"...
+    source = models.CharField(max_length=20, default="chat")
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["form", "submitted_at"]),
+            models.Index(fields=["submitted_at"]),
+        ]
+
+
+class Answer(models.Model):
+    submission = models.ForeignKey(Submission, on_delete=models.CASCADE, related_name="answers")
+    question = models.ForeignKey(Question, on_delete=models.CASCADE, related_name="answers")
+    # Multiple selections are joined with "; ", as in the CSV files before
+    value = models.TextField(blank=True)
+    # Where the question was in the form when this answer was given
+    position = models.PositiveIntegerField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["submission", "question"], name="unique_answer_per_question"),
+        ]
+        indexes = [models.Index(fields=["question", "submission"])]
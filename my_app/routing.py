@@ -1,6 +1,12 @@
+from django.conf import settings
 from django.urls import re_path
 from my_app import consumers
 
 websocket_urlpatterns = [
     re_path(r'ws/audio/', consumers.AudioConsumer.as_asgi()),
 ]
+
+# Background consumers reached through the channel layer (`manage.py runworker <name>`)
+worker_channels = {
+    settings.VOICE_WORKER_CHANNEL: consumers.ASRWorkerConsumer.as_asgi(),
+}
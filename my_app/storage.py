@@ -0,0 +1,20 @@
+"""
+SQLite tuning applied to every database connection.
+
+Django opens connections lazily and per thread, so the pragmas are set from
+the connection_created signal rather than once at startup.
+"""
+from django.conf import settings
+from django.db.backends.signals import connection_created
+
+
+def apply_sqlite_pragmas(sender, connection, **kwargs):
+    if connection.vendor != "sqlite" or not settings.SQLITE_TUNING:
+        return
+    with connection.cursor() as cursor:
+        for name, value in settings.SQLITE_PRAGMAS.items():
+            cursor.execute(f"PRAGMA {name} = {value}")
+
+
+def connect_signals():
+    connection_created.connect(apply_sqlite_pragmas, dispatch_uid="my_app.storage.apply_sqlite_pragmas")
@@ -0,0 +1,212 @@
+"""
+Storing survey responses and reading them back.
+
+Every submission is stored as one Answer row per question, so changing a
+form's questions never shifts existing data. CSV or Parquet files are
+exported from the database on demand (``export_responses``) instead of
+being appended to per submission.
+"""
+import json
+import os
+from itertools import islice, repeat
+from urllib.parse import urlsplit, urlunsplit
+
+import pandas as pd
+from django.db import transaction
+from django.utils import timezone
+
+from my_app.models import Answer, Form, Question, Submission
+
+BATCH_SIZE = 1000
+
+
+def normalize_form_url(url):
+    """Form URL without query or fragment, so prefilled and plain links map to the same form."""
+    parts = urlsplit(url.strip())
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), parts.path.rstrip("/"), "", ""))
+
+
+def get_form(survey_url, title=""):
+    form, created = Form.objects.get_or_create(url=normalize_form_url(survey_url), defaults={"title": title})
+    if title and not created and form.title != title:
+        form.title = title
+        form.save(update_fields=["title"])
+    return form
+
+
+def get_questions(form, questions):
+    """
+    Question rows for the questions a form currently asks.
+
+    A question is reused when its wording, type and options are unchanged,
+    wherever it now is in the form (its position is updated); otherwise a
+    new row is created and the old one keeps its answers. A form asking the
+    same question twice gets a row for each.
+
+    Args:
+        form (Form): The form
+        questions (list): Question dicts ("question", "question type", "answer")
+
+    Returns:
+        list: Question objects, in the order of ``questions``
+    """
+    existing = {}
+    for question in Question.objects.filter(form=form).order_by("position", "id"):
+        existing.setdefault(question_key(question.text, question.question_type, question.options), []).append(question)
+    rows, moved = [], []
+    for position, question in enumerate(questions):
+        text = question["question"]
+        question_type = question.get("question type", "")
+        options = question.get("answer") or []
+        matches = existing.get(question_key(text, question_type, options))
+        if matches:
+            row = matches.pop(0)
+            if row.position != position:
+                row.position = position
+                moved.append(row)
+        else:
+            row = Question.objects.create(
+                form=form, position=position, text=text, question_type=question_type, options=options
+            )
+        rows.append(row)
+    if moved:
+        Question.objects.bulk_update(moved, ["position"])
+    return rows
+
+
+def question_key(text, question_type, options):
+    return text, question_type, json.dumps(options)
+
+
+def answer_value(response):
+    # Multiple selections are joined with a semicolon
+    if isinstance(response, list):
+        return "; ".join(str(item) for item in response)
+    return "" if response is None else str(response)
+
+
+def save_submissions(survey_url, questions, responses_list, source="chat", submitted_at=None, title="",
+                     batch_size=BATCH_SIZE):
+    """
+    Store many submissions to one form with bulk inserts.
+
+    Args:
+        survey_url (str): URL of the form
+        questions (list): Question dicts ("question", "question type", "answer")
+        responses_list (iterable): One dict per submission, keyed by question index
+        source (str): Where the submissions come from ("chat", "voice", "synthetic"...)
+        submitted_at (datetime or list): Time of every submission, or one per
+            submission; defaults to now
+        title (str): Form title, stored when given
+        batch_size (int): Rows per INSERT statement, and submissions built at a time
+
+    Returns:
+        list: The created Submission objects
+    """
+    if submitted_at is None or not isinstance(submitted_at, (list, tuple, pd.Series, pd.Index)):
+        submitted_at = repeat(submitted_at or timezone.now())
+    pending = zip(submitted_at, responses_list)
+    created = []
+    with transaction.atomic():
+        form = get_form(survey_url, title)
+        question_rows = get_questions(form, questions)
+        # A chunk of submissions at a time, so a large import never holds all its Answer objects at once
+        while chunk := list(islice(pending, batch_size)):
+            submissions = Submission.objects.bulk_create(
+                [Submission(form=form, submitted_at=when, source=source) for when, _ in chunk],
+                batch_size=batch_size,
+            )
+            Answer.objects.bulk_create(
+                [
+                    Answer(
+                        submission=submission, question=question, position=index,
+                        value=answer_value(responses.get(index, "")),
+                    )
+                    for submission, (_, responses) in zip(submissions, chunk)
+                    for index, question in enumerate(question_rows)
+                ],
+                batch_size=batch_size,
+            )
+            created.extend(submissions)
+    return created
+
+
+def save_submission(survey_url, questions, responses, source="chat", title=""):
+    """Store one submission; see save_submissions."""
+    return save_submissions(survey_url, questions, [responses], source=source, title=title)[0]
+
+
+def responses_frame(form, start=None, end=None, source=None):
+    """
+    Responses to a form as a table with one row per submission.
+
+    Filters use the (form, submitted_at) index. Columns are the form's
+    questions in their current order; a question whose wording, type or
+    options changed gets a column per version, the newest one under the
+    plain text and older ones suffixed with their id.
+
+    Args:
+        form (Form or str): The form, or its URL
+        start (datetime): Only submissions at or after this time
+        end (datetime): Only submissions before this time
+        source (str): Only submissions from this source
+
+    Returns:
+        pd.DataFrame: "submission_id", "submitted_at", "source", then one column per question
+    """
+    if isinstance(form, str):
+        form = Form.objects.get(url=normalize_form_url(form))
+    submissions = Submission.objects.filter(form=form)
+    if start is not None:
+        submissions = submissions.filter(submitted_at__gte=start)
+    if end is not None:
+        submissions = submissions.filter(submitted_at__lt=end)
+    if source is not None:
+        submissions = submissions.filter(source=source)
+
+    meta = pd.DataFrame(
+        list(submissions.order_by("submitted_at", "id").values_list("id", "submitted_at", "source")),
+        columns=["submission_id", "submitted_at", "source"],
+    )
+    answers = pd.DataFrame(
+        list(Answer.objects.filter(submission__in=submissions).values_list("submission_id", "question_id", "value")),
+        columns=["submission_id", "question_id", "value"],
+    )
+    question_rows = list(Question.objects.filter(form=form).order_by("position", "-id"))
+    names, seen = {}, set(meta.columns)
+    # Newest first, so the newest version of a question keeps the plain text as its name
+    for question in sorted(question_rows, key=lambda question: -question.id):
+        name = question.text if question.text not in seen else f"{question.text} [{question.id}]"
+        seen.add(question.text)
+        names[question.id] = name
+    answered = set(answers["question_id"])
+    used = [question.id for question in question_rows if question.id in answered]
+
+    wide = answers.pivot(index="submission_id", columns="question_id", values="value") if len(answers) else pd.DataFrame()
+    wide = wide.reindex(columns=used).rename(columns=names)
+    frame = meta.join(wide, on="submission_id")
+    frame.columns.name = None
+    return frame
+
+
+def export_responses(form, path, **filters):
+    """
+    Write a form's responses to a CSV or Parquet file, chosen by the extension.
+
+    Args:
+        form (Form or str): The form, or its URL
+        path (str): Output file (.csv or .parquet)
+        **filters: start, end and source, as for responses_frame
+
+    Returns:
+        int: Number of submissions written
+    """
+    frame = responses_frame(form, **filters)
+    extension = os.path.splitext(path)[1].lower()
+    if extension == ".csv":
+        frame.to_csv(path, index=False)
+    elif extension == ".parquet":
+        frame.to_parquet(path, index=False)
+    else:
+        raise ValueError(f"Unsupported export format {extension!r}; use .csv or .parquet")
+    return len(frame)
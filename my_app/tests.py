@@ -1,3 +1,359 @@
-from django.test import TestCase
+import asyncio
+import json
+from unittest import mock
 
-# Create your tests here.
+import numpy as np
+from channels.exceptions import ChannelFull
+from channels.layers import get_channel_layer
+from channels.routing import ChannelNameRouter
+from channels.testing import WebsocketCommunicator
+from channels.worker import Worker
+from django.db import IntegrityError
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+
+from my_app import asr
+from my_app.audio_pipeline import AudioPipeline
+from my_app.audio_protocol import pack_frame
+from my_app.consumers import AudioConsumer, ASRWorkerConsumer
+from my_app.models import Answer, Question, Submission
+from my_app.submissions import responses_frame, save_submission, save_submissions
+from my_app.write_queue import SubmissionWriter
+
+SAMPLE_RATE = 16000
+
+
+def tone(ms, amplitude, sample_rate=SAMPLE_RATE):
+    """16-bit mono PCM: a sine of the given amplitude (0 for silence)."""
+    samples = np.arange(sample_rate * ms // 1000)
+    return (amplitude * np.sin(samples / 5)).astype("<i2").tobytes()
+
+
+def silence(ms):
+    return tone(ms, 0)
+
+
+def speech(ms):
+    return tone(ms, 3000)
+
+
+def feed_all(transcriber, pcm, chunk_bytes=2048):
+    events = []
+    for offset in range(0, len(pcm), chunk_bytes):
+        events += transcriber.feed(pcm[offset:offset + chunk_bytes])
+    return events
+
+
+def finals(events):
+    return [event["text"] for event in events if event["type"] == "final"]
+
+
+@override_settings(VOICE_ASR_ENGINE="stub", VOICE_STUB_TRANSCRIPT="hello big world", VOICE_VAD_SILENCE_MS=300)
+class StreamingTranscriberTests(SimpleTestCase):
+    def transcriber(self):
+        return asr.StreamingTranscriber(sample_rate=SAMPLE_RATE)
+
+    def test_silence_produces_no_events(self):
+        self.assertEqual(feed_all(self.transcriber(), silence(2000)), [])
+
+    def test_utterance_ends_after_silence(self):
+        events = feed_all(self.transcriber(), silence(600) + speech(500) + silence(400))
+        self.assertEqual(finals(events), ["hello big world"])
+        # Partials come before the final and reveal one more word per 100 ms
+        partials = [event["text"] for event in events if event["type"] == "partial"]
+        self.assertEqual(partials, sorted(set(partials), key=len))
+        self.assertTrue(all("hello big world".startswith(text) for text in partials))
+        self.assertEqual(partials[-1], "hello big world")
+        self.assertEqual(events[-1]["type"], "final")
+
+    def test_short_pause_does_not_split_an_utterance(self):
+        events = feed_all(self.transcriber(), silence(600) + speech(300) + silence(150) + speech(300) + silence(400))
+        self.assertEqual(len(finals(events)), 1)
+
+    def test_long_pause_splits_utterances(self):
+        events = feed_all(self.transcriber(), silence(600) + speech(300) + silence(500) + speech(300) + silence(400))
+        self.assertEqual(finals(events), ["hello big world", "hello big world"])
+
+    def test_frame_boundaries_do_not_change_segmentation(self):
+        audio = silence(600) + speech(400) + silence(500) + speech(400) + silence(400)
+        for chunk_bytes in (333, 960, 4096):
+            self.assertEqual(len(finals(feed_all(self.transcriber(), audio, chunk_bytes))), 2)
+
+    def test_flush_finishes_the_segment_in_progress(self):
+        transcriber = self.transcriber()
+        events = feed_all(transcriber, silence(600) + speech(300))
+        self.assertEqual(finals(events), [])
+        self.assertEqual(finals(transcriber.flush()), ["hello big world"])
+        self.assertEqual(transcriber.flush(), [])
+
+    def test_speech_from_the_first_frame_does_not_raise_the_threshold_above_speech(self):
+        # The user talks through calibration, then says something more quietly
+        events = feed_all(self.transcriber(), speech(800) + silence(400) + tone(300, 2000) + silence(400))
+        self.assertEqual(finals(events), ["hello big world", "hello big world"])
+
+    def test_noise_floor_comes_from_the_quietest_frames(self):
+        session = asr.VoiceSession()
+        # Calibration window: mostly speech, with short gaps of low noise
+        feed_all(asr.StreamingTranscriber(SAMPLE_RATE, session=session), (speech(90) + tone(30, 100)) * 5)
+        self.assertTrue(session.calibrated)
+        self.assertLess(session.recognizer.energy_threshold, 200)
+
+    def test_threshold_carries_over_between_transcribers_of_a_session(self):
+        session = asr.VoiceSession()
+        feed_all(asr.StreamingTranscriber(SAMPLE_RATE, session=session), silence(600) + speech(300) + silence(400))
+        self.assertTrue(session.calibrated)
+        # A new turn on the same session needs no calibration before speech
+        events = feed_all(asr.StreamingTranscriber(SAMPLE_RATE, session=session), speech(300) + silence(400))
+        self.assertEqual(finals(events), ["hello big world"])
+
+
+@override_settings(VOICE_VAD_SILENCE_MS=300)
+class SegmentingTranscriberTests(SimpleTestCase):
+    def test_segment_holds_the_utterance_audio_with_preroll(self):
+        transcriber = asr.SegmentingTranscriber(sample_rate=SAMPLE_RATE)
+        events = feed_all(transcriber, silence(600) + speech(480) + silence(480))
+        segments = [event for event in events if event["type"] == "segment"]
+        self.assertEqual(len(segments), 1)
+        self.assertEqual(segments[0]["sample_rate"], SAMPLE_RATE)
+        audio = segments[0]["audio"]
+        # Speech plus up to 210 ms of preroll and 300 ms of trailing silence
+        self.assertGreaterEqual(len(audio), len(speech(480)))
+        self.assertLessEqual(len(audio), len(speech(480) + silence(540)))
+        self.assertIn(speech(480)[:960], audio)
+
+
+class FakeTranscriber:
+    def __init__(self, sample_rate):
+        self.sample_rate = sample_rate
+
+    def feed(self, pcm):
+        return []
+
+
+@override_settings(VOICE_MAX_BACKLOG_SECONDS=5, VOICE_MAX_QUEUED_JOBS=2)
+class AudioPipelineTests(SimpleTestCase):
+    async def send_events(self, events):
+        pass
+
+    async def test_backlog_cap_follows_the_stream_sample_rate(self):
+        for sample_rate in (8000, 48000):
+            pipeline = AudioPipeline(self.send_events)
+            transcriber = FakeTranscriber(sample_rate)
+            # Nothing runs until the test awaits, so everything fed stays queued
+            self.assertTrue(pipeline.feed(transcriber, bytes(5 * sample_rate * 2)))
+            self.assertFalse(pipeline.feed(transcriber, bytes(2)))
+            await pipeline.close()
+
+    async def test_failed_send_does_not_stop_the_pipeline(self):
+        sent = []
+
+        async def send_events(events):
+            sent.append(events)
+            if len(sent) == 1:
+                raise ConnectionError("socket gone")
+
+        pipeline = AudioPipeline(send_events)
+        pipeline.submit(lambda: [{"type": "final", "text": "one"}])
+        pipeline.submit(lambda: [{"type": "final", "text": "two"}])
+        for _ in range(100):
+            if len(sent) == 3:
+                break
+            await asyncio.sleep(0.01)
+        self.assertEqual(sent[1:], [[{"type": "error", "error": "send failed"}], [{"type": "final", "text": "two"}]])
+        await pipeline.close()
+
+    async def test_submit_rejects_jobs_beyond_the_queue_limit(self):
+        pipeline = AudioPipeline(self.send_events)
+        self.assertTrue(pipeline.submit(list))
+        self.assertTrue(pipeline.submit(list))
+        self.assertFalse(pipeline.submit(list))
+        await pipeline.close()
+
+
+class AudioConsumerTests(SimpleTestCase):
+    async def test_failed_voice_stack_load_rejects_the_connection(self):
+        with mock.patch("my_app.consumers.voice_stack.aload", side_effect=ImportError("no module named 'whisper'")):
+            communicator = WebsocketCommunicator(AudioConsumer.as_asgi(), "/ws/audio/")
+            connected, _ = await communicator.connect()
+        self.assertFalse(connected)
+        await communicator.disconnect()
+
+
+@override_settings(
+    VOICE_DISPATCH="worker",
+    VOICE_ASR_ENGINE="stub",
+    VOICE_STUB_TRANSCRIPT="hello world",
+    VOICE_RESULT_TIMEOUT=0.5,
+    CHANNEL_LAYERS={"default": {"BACKEND": "channels.layers.InMemoryChannelLayer"}},
+)
+class WorkerDispatchTests(SimpleTestCase):
+    """AudioConsumer with the ASR worker pool, over the in-memory channel layer instead of Redis."""
+
+    async def connect(self, utterances):
+        communicator = WebsocketCommunicator(AudioConsumer.as_asgi(), "/ws/audio/")
+        connected, _ = await communicator.connect()
+        self.assertTrue(connected)
+        await communicator.send_to(text_data=json.dumps({"type": "start", "sample_rate": SAMPLE_RATE}))
+        audio = silence(600) + (speech(300) + silence(400)) * utterances
+        for seq, offset in enumerate(range(0, len(audio), 2048)):
+            await communicator.send_to(bytes_data=pack_frame(audio[offset:offset + 2048], seq, sample_rate=SAMPLE_RATE))
+        return communicator
+
+    async def receive_events(self, communicator, count):
+        return [json.loads(await communicator.receive_from(timeout=5)) for _ in range(count)]
+
+    async def test_results_are_delivered_in_utterance_order(self):
+        layer = get_channel_layer()
+        communicator = await self.connect(3)
+        jobs = [await asyncio.wait_for(layer.receive("asr"), 5) for _ in range(3)]
+        self.assertEqual([job["seq"] for job in jobs], [0, 1, 2])
+        # Workers finish out of order
+        for job in reversed(jobs):
+            await layer.send(job["reply_channel"], {
+                "type": "asr.result", "seq": job["seq"], "clip": False, "text": f"utterance {job['seq']}",
+            })
+        events = await self.receive_events(communicator, 3)
+        self.assertEqual([event["text"] for event in events], ["utterance 0", "utterance 1", "utterance 2"])
+        await communicator.disconnect()
+
+    async def test_lost_result_does_not_hold_back_later_ones(self):
+        layer = get_channel_layer()
+        communicator = await self.connect(3)
+        jobs = [await asyncio.wait_for(layer.receive("asr"), 5) for _ in range(3)]
+        # The reply to utterance 1 never comes
+        for job in (jobs[2], jobs[0]):
+            await layer.send(job["reply_channel"], {
+                "type": "asr.result", "seq": job["seq"], "clip": False, "text": f"utterance {job['seq']}",
+            })
+        events = await self.receive_events(communicator, 3)
+        self.assertEqual(events[0], {"type": "final", "text": "utterance 0"})
+        self.assertEqual(events[1], {"type": "error", "error": "transcript lost", "seq": 1})
+        self.assertEqual(events[2], {"type": "final", "text": "utterance 2"})
+        # A reply arriving after the deadline is dropped
+        await layer.send(jobs[1]["reply_channel"], {"type": "asr.result", "seq": 1, "clip": False, "text": "late"})
+        self.assertTrue(await communicator.receive_nothing(0.2))
+        await communicator.disconnect()
+
+    async def test_failed_dispatch_does_not_stop_later_utterances(self):
+        layer = get_channel_layer()
+        send = layer.send
+        failures = []
+
+        async def flaky_send(channel, message):
+            # The first utterance finds the worker channel full
+            if channel == "asr" and not failures:
+                failures.append(message["seq"])
+                raise ChannelFull()
+            await send(channel, message)
+
+        worker = asyncio.create_task(Worker(ChannelNameRouter({"asr": ASRWorkerConsumer.as_asgi()}), ["asr"], layer).handle())
+        try:
+            with mock.patch.object(layer, "send", flaky_send):
+                communicator = await self.connect(2)
+                events = await self.receive_events(communicator, 2)
+            self.assertEqual(events, [
+                {"type": "error", "error": "dispatch failed", "seq": 0},
+                {"type": "final", "text": "hello world"},
+            ])
+            await communicator.disconnect()
+        finally:
+            worker.cancel()
+
+    async def test_worker_pool_transcribes_every_utterance(self):
+        # Two workers on the "asr" channel, like two `runworker asr` processes
+        layer = get_channel_layer()
+        workers = [
+            asyncio.create_task(Worker(ChannelNameRouter({"asr": ASRWorkerConsumer.as_asgi()}), ["asr"], layer).handle())
+            for _ in range(2)
+        ]
+        try:
+            communicator = await self.connect(4)
+            events = await self.receive_events(communicator, 4)
+            self.assertEqual(events, [{"type": "final", "text": "hello world"}] * 4)
+            await communicator.disconnect()
+        finally:
+            for worker in workers:
+                worker.cancel()
+
+
+FORM_URL = "https://docs.google.com/forms/d/e/parks/viewform"
+
+
+def survey(*texts):
+    return [{"question": text, "question type": "Short Answer", "answer": []} for text in texts]
+
+
+class SubmissionTests(TestCase):
+    def test_inserting_a_question_keeps_the_later_ones(self):
+        save_submission(FORM_URL, survey("Park", "Rating"), {0: "Nose Hill", 1: "5"})
+        save_submission(FORM_URL, survey("Name", "Park", "Rating"), {0: "Sam", 1: "Bowness", 2: "4"})
+        self.assertEqual(Question.objects.count(), 3)
+        frame = responses_frame(FORM_URL)
+        self.assertEqual(list(frame.columns[3:]), ["Name", "Park", "Rating"])
+        self.assertEqual(list(frame["Park"]), ["Nose Hill", "Bowness"])
+        self.assertEqual(list(frame["Rating"]), ["5", "4"])
+
+    def test_newest_version_of_a_question_keeps_the_plain_name(self):
+        rating = {"question": "Rating", "question type": "Multiple Choice", "answer": ["1", "2", "3"]}
+        old = save_submission(FORM_URL, [rating], {0: "3"})
+        save_submission(FORM_URL, [dict(rating, answer=["1", "2", "3", "4", "5"])], {0: "5"})
+        frame = responses_frame(FORM_URL)
+        old_question = old.answers.get().question
+        self.assertEqual(list(frame["Rating"].fillna("")), ["", "5"])
+        self.assertEqual(list(frame[f"Rating [{old_question.id}]"].fillna("")), ["3", ""])
+
+    def test_answers_record_their_position(self):
+        first = save_submission(FORM_URL, survey("Park", "Rating"), {0: "Nose Hill", 1: "5"})
+        second = save_submission(FORM_URL, survey("Rating", "Park"), {0: "4", 1: "Bowness"})
+        self.assertEqual({a.question.text: a.position for a in first.answers.all()}, {"Park": 0, "Rating": 1})
+        self.assertEqual({a.question.text: a.position for a in second.answers.all()}, {"Park": 1, "Rating": 0})
+        self.assertEqual(list(responses_frame(FORM_URL).columns[3:]), ["Rating", "Park"])
+
+    def test_repeated_question_gets_a_row_per_occurrence(self):
+        submission = save_submission(FORM_URL, survey("Comments", "Comments"), {0: "a", 1: "b"})
+        self.assertEqual(submission.answers.count(), 2)
+
+    def test_submissions_are_saved_in_chunks(self):
+        responses = ({0: f"Park {i}", 1: str(i % 5)} for i in range(5))
+        created = save_submissions(FORM_URL, survey("Park", "Rating"), responses, batch_size=2)
+        self.assertEqual(len(created), 5)
+        self.assertEqual(Answer.objects.count(), 10)
+        frame = responses_frame(FORM_URL)
+        self.assertEqual(list(frame["Park"]), [f"Park {i}" for i in range(5)])
+        self.assertEqual(list(frame["Rating"]), ["0", "1", "2", "3", "4"])
+
+
+# The writer thread has its own connection, so its writes must really be committed
+class SubmissionWriterTests(TransactionTestCase):
+    def writer(self, **options):
+        writer = SubmissionWriter(**options)
+        self.addCleanup(writer.close, 5)
+        return writer
+
+    def test_queued_submissions_are_written_in_one_batch(self):
+        writer = self.writer(max_batch=50, max_delay=0.2)
+        futures = [writer.submit(FORM_URL, survey("Park"), {0: f"Park {i}"}) for i in range(10)]
+        submissions = [future.result(5) for future in futures]
+        self.assertEqual(writer.batches, 1)
+        self.assertEqual(len({submission.id for submission in submissions}), 10)
+        self.assertEqual(list(responses_frame(FORM_URL)["Park"]), [f"Park {i}" for i in range(10)])
+
+    def test_batches_stay_within_max_batch(self):
+        writer = self.writer(max_batch=3, max_delay=0.2)
+        futures = [writer.submit(FORM_URL, survey("Park"), {0: "Bowness"}) for _ in range(7)]
+        writer.close(5)
+        self.assertTrue(all(future.result(0) for future in futures))
+        self.assertEqual(writer.batches, 3)
+
+    def test_failing_group_does_not_fail_the_batch(self):
+        writer = self.writer(max_batch=50, max_delay=0.2)
+        good = writer.submit(FORM_URL, survey("Park"), {0: "Bowness"})
+        # A question without text cannot be stored
+        bad = writer.submit(FORM_URL, [{"question": None, "question type": "Short Answer"}], {0: "x"})
+        other = writer.submit(FORM_URL, survey("Park"), {0: "Varsity"}, source="voice")
+        self.assertEqual(good.result(5).answers.get().value, "Bowness")
+        self.assertEqual(other.result(5).source, "voice")
+        with self.assertRaises(IntegrityError):
+            bad.result(5)
+        self.assertEqual(writer.batches, 1)
+        self.assertEqual(Submission.objects.count(), 2)
+        self.assertFalse(Question.objects.filter(text__isnull=True).exists())
@@ -0,0 +1,45 @@
+"""
+Deferred loading of the speech-recognition stack.
+
+``my_app.asr`` pulls in numpy, speech_recognition and the configured engine
+(a Vosk model takes seconds to load). Nothing imports it at startup: the
+first WebSocket connection (or ASR worker message) loads it through
+``load`` / ``aload``, so ASGI processes that only serve HTTP never pay for
+it. Set VOICE_PREWARM to load it in the background as soon as Django starts
+instead, so the first voice session does not wait.
+"""
+import asyncio
+import importlib
+import threading
+
+from django.conf import settings
+
+_asr = None
+_lock = threading.Lock()
+
+
+def load():
+    """Import the voice stack once per process and return the ``my_app.asr`` module."""
+    global _asr
+    if _asr is None:
+        with _lock:
+            if _asr is None:
+                asr = importlib.import_module("my_app.asr")
+                if settings.VOICE_ASR_ENGINE == "vosk":
+                    asr.get_vosk_model(settings.VOSK_MODEL_PATH)
+                _asr = asr
+    return _asr
+
+
+async def aload():
+    """``load`` for async code; the import runs in a thread so the event loop keeps serving."""
+    if _asr is not None:
+        return _asr
+    return await asyncio.to_thread(load)
+
+
+def prewarm():
+    """Start loading the voice stack in a background thread."""
+    thread = threading.Thread(target=load, name="voice-prewarm", daemon=True)
+    thread.start()
+    return thread
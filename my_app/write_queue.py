@@ -0,0 +1,144 @@
+"""
+Batched writes of survey submissions.
+
+SQLite allows one writer at a time, and each commit waits for the disk. When
+many sessions save submissions at once (voice sessions, Streamlit users,
+synthetic generation), a single writer thread collects them for a few
+milliseconds and stores them in one transaction, instead of every caller
+taking the write lock for its own.
+"""
+import json
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+
+from my_app.submissions import normalize_form_url, save_submissions
+
+_writer = None
+_writer_lock = threading.Lock()
+
+
+class SubmissionWriter:
+    """
+    A background thread that writes queued submissions in batches.
+
+    ``submit`` returns a Future resolved with the Submission once its batch is
+    committed. Submissions to the same form, with the same questions and
+    source, are stored with one bulk insert; each such group gets its own
+    savepoint, so a failing group does not fail the rest of the batch.
+    """
+
+    def __init__(self, max_batch=None, max_delay=None):
+        self.max_batch = max_batch or settings.SUBMISSION_BATCH_SIZE
+        self.max_delay = settings.SUBMISSION_BATCH_DELAY if max_delay is None else max_delay
+        self.queue = queue.Queue()
+        self.batches = 0
+        self.thread = threading.Thread(target=self.run, name="submission-writer", daemon=True)
+        self.thread.start()
+
+    def submit(self, survey_url, questions, responses, source="chat"):
+        """
+        Queue one submission.
+
+        Args:
+            survey_url (str): URL of the form
+            questions (list): Question dicts ("question", "question type", "answer")
+            responses (dict): Responses keyed by question index
+            source (str): Where the submission comes from
+
+        Returns:
+            Future: Resolves to the stored Submission
+        """
+        future = Future()
+        self.queue.put((survey_url, questions, responses, source, timezone.now(), future))
+        return future
+
+    def close(self, timeout=None):
+        """Write everything queued so far and stop the thread."""
+        self.queue.put(None)
+        self.thread.join(timeout)
+
+    def next_batch(self):
+        """Block for one item, then take whatever else arrives within max_delay."""
+        first = self.queue.get()
+        if first is None:
+            return None
+        batch = [first]
+        deadline = time.monotonic() + self.max_delay
+        while len(batch) < self.max_batch:
+            try:
+                item = self.queue.get(timeout=max(deadline - time.monotonic(), 0))
+            except queue.Empty:
+                break
+            if item is None:
+                # Finish this batch, then stop
+                self.queue.put(None)
+                break
+            batch.append(item)
+        return batch
+
+    def run(self):
+        try:
+            while True:
+                batch = self.next_batch()
+                if batch is None:
+                    return
+                self.write(batch)
+        finally:
+            connection.close()
+
+    def write(self, batch):
+        groups = {}
+        for item in batch:
+            survey_url, questions, _, source, _, _ = item
+            key = (normalize_form_url(survey_url), json.dumps(questions, sort_keys=True), source)
+            groups.setdefault(key, []).append(item)
+        # Futures are resolved only after the commit, so callers never see
+        # a submission that could still be rolled back
+        results = []
+        try:
+            with transaction.atomic():
+                for items in groups.values():
+                    # save_submissions runs in a savepoint inside this transaction
+                    try:
+                        submissions = save_submissions(
+                            items[0][0],
+                            items[0][1],
+                            [item[2] for item in items],
+                            source=items[0][3],
+                            submitted_at=[item[4] for item in items],
+                        )
+                    except Exception as e:
+                        results += [(item[5], None, e) for item in items]
+                    else:
+                        results += [(item[5], submission, None) for item, submission in zip(items, submissions)]
+        except Exception as e:
+            # The commit itself failed: nothing in the batch was stored.
+            # The writer keeps one connection open; start a new one next time.
+            results = [(item[5], None, e) for item in batch]
+            connection.close()
+        for future, submission, error in results:
+            if error is None:
+                future.set_result(submission)
+            else:
+                future.set_exception(error)
+        self.batches += 1
+
+
+def get_writer():
+    """The process-wide SubmissionWriter, started on first use."""
+    global _writer
+    with _writer_lock:
+        if _writer is None or not _writer.thread.is_alive():
+            _writer = SubmissionWriter()
+        return _writer
+
+
+def save_submission(survey_url, questions, responses, source="chat", timeout=30):
+    """Store one submission through the shared writer and wait for it to be committed."""
+    return get_writer().submit(survey_url, questions, responses, source).result(timeout)
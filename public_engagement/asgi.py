@@ -9,13 +9,19 @@ https://docs.djangoproject.com/en/5.1/howto/deployment/asgi/
 
 import os
 from django.core.asgi import get_asgi_application
-from channels.routing import ProtocolTypeRouter, URLRouter
-from my_app.routing import websocket_urlpatterns
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'public_engagement.settings')
 
-# application = get_asgi_application()
+# Set up Django before importing anything that reads settings or models.
+# Routing only pulls in the consumers; the voice stack itself is loaded by
+# the first WebSocket connection (see my_app/voice_stack.py).
+django_asgi_app = get_asgi_application()
+
+from channels.routing import ChannelNameRouter, ProtocolTypeRouter, URLRouter
+from my_app.routing import websocket_urlpatterns, worker_channels
+
 application = ProtocolTypeRouter({
-    "http": get_asgi_application(),
+    "http": django_asgi_app,
     "websocket": URLRouter(websocket_urlpatterns),
+    "channel": ChannelNameRouter(worker_channels),
 })
@@ -73,11 +73,63 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'public_engagement.wsgi.application'
 
-CHANNEL_LAYERS = {
-    "default": {
-        "BACKEND": "channels.layers.InMemoryChannelLayer",  # For development
-    },
-}
+# Set CHANNEL_REDIS_URL (any Redis-compatible server, e.g. redis://localhost:6379/0)
+# to share the channel layer between ASGI processes and ASR workers (needs the
+# channels-redis package from requirements.txt).
+CHANNEL_REDIS_URL = os.getenv("CHANNEL_REDIS_URL")
+# Seconds a message waits in a channel before the layer drops it
+CHANNEL_EXPIRY = 30
+
+if CHANNEL_REDIS_URL:
+    CHANNEL_LAYERS = {
+        "default": {
+            "BACKEND": "channels_redis.core.RedisChannelLayer",
+            "CONFIG": {
+                "hosts": [CHANNEL_REDIS_URL],
+                # Room for bursts of queued utterances per channel
+                "capacity": 1000,
+                "expiry": CHANNEL_EXPIRY,
+            },
+        },
+    }
+else:
+    CHANNEL_LAYERS = {
+        "default": {
+            "BACKEND": "channels.layers.InMemoryChannelLayer",  # For development
+        },
+    }
+
+# Speech recognition for the ws/audio/ consumer
+# Engines: "google" (Google Web Speech, final results only), "vosk" (local,
+# streaming partials; needs a model at VOSK_MODEL_PATH) or "stub" (tests).
+VOICE_ASR_ENGINE = os.getenv("VOICE_ASR_ENGINE", "google")
+VOSK_MODEL_PATH = os.getenv("VOSK_MODEL_PATH", str(BASE_DIR / "models" / "vosk-model-small-en-us-0.15"))
+VOICE_STUB_TRANSCRIPT = "hello world"
+VOICE_SAMPLE_RATE = 16000
+# ffmpeg binary used to decode compressed uploads (webm/ogg) through pipes
+VOICE_FFMPEG = os.getenv("FFMPEG_BINARY", "ffmpeg")
+# Where recognition runs: "local" (thread pool in the ASGI process, with
+# partial transcripts) or "worker" (finished utterances are sent through the
+# channel layer to `python manage.py runworker asr` processes; needs Redis).
+VOICE_DISPATCH = os.getenv("VOICE_DISPATCH", "local")
+VOICE_WORKER_CHANNEL = "asr"
+# Seconds to wait for a worker's transcript before reporting it lost, so
+# later transcripts are not held back. Not longer than the channel expiry: a
+# job still queued by then has been dropped by the layer.
+VOICE_RESULT_TIMEOUT = CHANNEL_EXPIRY
+# Streamed audio used once per session to calibrate the noise threshold
+VOICE_CALIBRATION_SECONDS = 0.5
+# Silence after speech that ends an utterance and triggers the final transcript
+VOICE_VAD_SILENCE_MS = 300
+# Threads shared by all voice sessions of a worker process for decoding and recognition
+VOICE_WORKER_THREADS = int(os.getenv("VOICE_WORKER_THREADS", "8"))
+# Per-session limits before audio is dropped and the client is told it is backlogged
+VOICE_MAX_BACKLOG_SECONDS = 5
+VOICE_MAX_QUEUED_JOBS = 8
+VOICE_MAX_CLIP_BYTES = 10 * 1024 * 1024
+# The voice stack (my_app/voice_stack.py) is imported by the first WebSocket
+# connection; set VOICE_PREWARM=1 to load it in the background at startup
+VOICE_PREWARM = os.getenv("VOICE_PREWARM", "0") == "1"
 
 
 # Database
@@ -86,10 +138,37 @@ CHANNEL_LAYERS = {
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+        'NAME': os.getenv("SQLITE_PATH", BASE_DIR / 'db.sqlite3'),
+        'OPTIONS': {
+            # Seconds a writer waits for the lock before "database is locked"
+            'timeout': 20,
+            # Take the write lock when a transaction starts, so concurrent
+            # writers queue up instead of failing on lock upgrade
+            'transaction_mode': 'IMMEDIATE',
+        },
     }
 }
 
+# Applied to every new SQLite connection (my_app.storage). WAL lets readers
+# (dashboards) run while a submission is written; synchronous=NORMAL is
+# durable in WAL mode except for the last transactions on power loss.
+# SQLITE_TUNING=0 keeps SQLite's defaults (used by the write benchmark).
+SQLITE_TUNING = os.getenv("SQLITE_TUNING", "1") == "1"
+SQLITE_PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "cache_size": -32000,  # KiB, i.e. 32 MB per connection
+    "temp_store": "MEMORY",
+    "mmap_size": 134217728,
+    "wal_autocheckpoint": 1000,
+}
+
+# my_app.write_queue writes every submission queued while the previous batch
+# was being committed in one transaction (up to SUBMISSION_BATCH_SIZE); a
+# SUBMISSION_BATCH_DELAY in seconds makes it wait for more before writing
+SUBMISSION_BATCH_SIZE = 500
+SUBMISSION_BATCH_DELAY = 0
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators